@@ -0,0 +1,187 @@
+"""Mergeable accumulators for block-wise (out-of-core) statistics.
+
+Every accumulator has an ``update`` method that folds in one block of
+data and a ``merge`` method that combines two accumulators built over
+disjoint blocks, so results can be assembled from any partition of the
+data in any order.
+"""
+
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from validation.analysis.sketch import QuantileSketch
+from validation.analysis.statistics import valid_mask
+
+
+@dataclass
+class StatsAccumulator:
+    """Count, min/max and Welford mean/variance of one variable."""
+
+    count: int = 0
+    nan_count: int = 0
+    min: float = math.inf
+    max: float = -math.inf
+    mean: float = 0.0
+    m2: float = 0.0
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def update(self, block: np.ndarray, mask: np.ndarray | None = None) -> None:
+        """Mask fill values in ``block`` and fold its valid values in.
+
+        ``mask`` overrides the default fill convention of ``valid_mask``.
+        """
+        if mask is None:
+            mask = valid_mask(block)
+        vals = block[mask]
+        self.nan_count += int(block.size - vals.size)
+        if vals.size == 0:
+            return
+        block_mean = float(vals.mean(dtype=np.float64))
+        dev = np.subtract(vals, block_mean, dtype=np.float64)
+        other = StatsAccumulator(
+            count=int(vals.size),
+            min=float(vals.min()),
+            max=float(vals.max()),
+            mean=block_mean,
+            m2=float(np.dot(dev, dev)),
+        )
+        self._merge_moments(other)
+        self.sketch.update(vals)
+
+    def merge(self, other: "StatsAccumulator") -> None:
+        self.nan_count += other.nan_count
+        if other.count:
+            self._merge_moments(other)
+            self.sketch.merge(other.sketch)
+
+    def _merge_moments(self, other: "StatsAccumulator") -> None:
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.count = total
+
+    def result(
+        self, shape: tuple, dtype: str, quantiles=(0.5,), keep_sketch: bool = False
+    ) -> dict:
+        """Return a dict with the same keys as ``compute_variable_stats``.
+
+        The median and ``quantiles`` are read from the sketch, whose rank
+        error bound is reported as ``quantile_rank_error``.  With
+        ``keep_sketch`` the sketch itself is included under ``sketch`` so
+        it can be merged with those of other files.
+        """
+        if self.count == 0:
+            return {
+                "min": None,
+                "max": None,
+                "mean": None,
+                "median": None,
+                "std": None,
+                "quantiles": None,
+                "quantile_rank_error": None,
+                "nan_count": self.nan_count,
+                "valid_count": 0,
+                "shape": shape,
+                "dtype": dtype,
+            }
+        estimates = self.sketch.quantile([0.5, *quantiles])
+        stats = {
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+            "median": float(estimates[0]),
+            "std": math.sqrt(self.m2 / self.count),
+            "quantiles": {q: float(v) for q, v in zip(quantiles, estimates[1:])},
+            "quantile_rank_error": self.sketch.rank_error,
+            "nan_count": self.nan_count,
+            "valid_count": self.count,
+            "shape": shape,
+            "dtype": dtype,
+        }
+        if keep_sketch:
+            stats["sketch"] = self.sketch
+        return stats
+
+
+@dataclass
+class DiffAccumulator:
+    """Difference metrics and Pearson co-moments between two variables."""
+
+    count: int = 0
+    max_abs: float = 0.0
+    sum_abs: float = 0.0
+    sum_sq: float = 0.0
+    mean_diff: float = 0.0
+    mean_a: float = 0.0
+    mean_b: float = 0.0
+    m2_a: float = 0.0
+    m2_b: float = 0.0
+    c_ab: float = 0.0
+
+    def update(self, a: np.ndarray, b: np.ndarray, both_valid: np.ndarray) -> None:
+        """Fold in the co-located valid elements of one block pair."""
+        av = a[both_valid].astype(np.float64, copy=False)
+        bv = b[both_valid].astype(np.float64, copy=False)
+        if av.size == 0:
+            return
+        d = bv - av
+        abs_d = np.abs(d)
+        mean_a = float(av.mean())
+        mean_b = float(bv.mean())
+        dev_a = av - mean_a
+        dev_b = bv - mean_b
+        self.merge(
+            DiffAccumulator(
+                count=int(av.size),
+                max_abs=float(abs_d.max()),
+                sum_abs=float(abs_d.sum()),
+                sum_sq=float(np.dot(d, d)),
+                mean_diff=float(d.mean()),
+                mean_a=mean_a,
+                mean_b=mean_b,
+                m2_a=float(np.dot(dev_a, dev_a)),
+                m2_b=float(np.dot(dev_b, dev_b)),
+                c_ab=float(np.dot(dev_a, dev_b)),
+            )
+        )
+
+    def merge(self, other: "DiffAccumulator") -> None:
+        if other.count == 0:
+            return
+        n_a, n_b = self.count, other.count
+        total = n_a + n_b
+        delta_a = other.mean_a - self.mean_a
+        delta_b = other.mean_b - self.mean_b
+        factor = n_a * n_b / total
+        self.m2_a += other.m2_a + delta_a * delta_a * factor
+        self.m2_b += other.m2_b + delta_b * delta_b * factor
+        self.c_ab += other.c_ab + delta_a * delta_b * factor
+        self.mean_a += delta_a * n_b / total
+        self.mean_b += delta_b * n_b / total
+        self.mean_diff += (other.mean_diff - self.mean_diff) * n_b / total
+        self.max_abs = max(self.max_abs, other.max_abs)
+        self.sum_abs += other.sum_abs
+        self.sum_sq += other.sum_sq
+        self.count = total
+
+    def result(self) -> dict:
+        """Return a dict with the same keys as ``compute_variable_diff``."""
+        if self.count == 0:
+            return {"max_abs_diff": None, "mean_abs_diff": None, "rmsd": None}
+        pearson_r = None
+        if self.count > 1:
+            denom = math.sqrt(self.m2_a * self.m2_b)
+            if denom > 0:
+                pearson_r = self.c_ab / denom
+        return {
+            "max_abs_diff": self.max_abs,
+            "mean_abs_diff": self.sum_abs / self.count,
+            "rmsd": math.sqrt(self.sum_sq / self.count),
+            "bias": self.mean_diff,
+            "pearson_r": pearson_r,
+        }
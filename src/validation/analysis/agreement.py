@@ -0,0 +1,45 @@
+"""Agreement of two fields at many thresholds from one pass."""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class AgreementCounter:
+    """Cumulative counts of |B - A| at a sorted list of thresholds.
+
+    Every difference is placed in its threshold bin with one
+    ``searchsorted`` and the bins are counted with ``bincount``, so the
+    whole agreement curve costs one pass over the data (O(n log T) for T
+    thresholds) instead of one masked pass per threshold.  Counters
+    built over disjoint blocks combine with ``merge``.
+    """
+
+    thresholds: np.ndarray
+    bins: np.ndarray = field(init=False)
+    total: int = 0
+
+    def __post_init__(self):
+        self.thresholds = np.unique(np.asarray(self.thresholds, dtype=np.float64))
+        self.bins = np.zeros(self.thresholds.size + 1, dtype=np.int64)
+
+    def update(self, abs_diff: np.ndarray) -> None:
+        """Fold in the absolute differences of one block."""
+        index = np.searchsorted(self.thresholds, abs_diff.reshape(-1), side="left")
+        self.bins += np.bincount(index, minlength=self.bins.size)
+        self.total += int(abs_diff.size)
+
+    def merge(self, other: "AgreementCounter") -> None:
+        self.bins += other.bins
+        self.total += other.total
+
+    def pct_within(self) -> dict[float, float | None]:
+        """Map each threshold to the % of differences with |B - A| <= it."""
+        if self.total == 0:
+            return {float(t): None for t in self.thresholds}
+        within = np.cumsum(self.bins[:-1])
+        return {
+            float(t): round(float(n) / self.total * 100, 2)
+            for t, n in zip(self.thresholds, within)
+        }
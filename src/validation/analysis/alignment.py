@@ -0,0 +1,116 @@
+"""Record alignment of along-track files on their time coordinate."""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class TimeAlignment:
+    """One-to-one matching of A and B records by time.
+
+    ``index_a[i]`` and ``index_b[i]`` are the positions of the i-th
+    matched pair, in increasing order of ``index_a``.
+    """
+
+    index_a: np.ndarray
+    index_b: np.ndarray
+    size_a: int
+    size_b: int
+    tolerance: float = 0.0
+
+    @property
+    def matched(self) -> int:
+        return int(self.index_a.size)
+
+    @property
+    def a_only(self) -> int:
+        return self.size_a - self.matched
+
+    @property
+    def b_only(self) -> int:
+        return self.size_b - self.matched
+
+    @property
+    def identity(self) -> bool:
+        """True when every record matches the one at the same position."""
+        return (
+            self.size_a == self.size_b == self.matched
+            and bool(np.all(self.index_a == self.index_b))
+        )
+
+    def summary(self) -> dict:
+        return {
+            "matched": self.matched,
+            "a_only": self.a_only,
+            "b_only": self.b_only,
+            "tolerance": self.tolerance,
+        }
+
+
+def _as_numeric(time: np.ndarray) -> tuple[np.ndarray, np.ndarray, float]:
+    """Return float64 times, their validity and the seconds-to-unit factor.
+
+    datetime64 times are converted to nanoseconds, so a tolerance given in
+    seconds is scaled by 1e9; numeric times are used as they are.
+    """
+    if np.issubdtype(time.dtype, np.datetime64):
+        valid = ~np.isnat(time)
+        values = time.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+        return values, valid, 1e9
+    values = np.asarray(time, dtype=np.float64)
+    return values, np.isfinite(values), 1.0
+
+
+def align_times(
+    time_a: np.ndarray, time_b: np.ndarray, tolerance: float = 0.0
+) -> TimeAlignment:
+    """Match records of A and B whose times differ by at most ``tolerance``.
+
+    B's times are sorted once and every A time is located with
+    ``np.searchsorted``, so the join is O(n log n).  Each A record is
+    paired with its nearest B record; when several A records pick the
+    same B record, only the closest (then earliest) one keeps it.
+    ``tolerance`` is in seconds for datetime64 times and in coordinate
+    units otherwise.  Missing times never match.
+    """
+    values_a, valid_a, unit = _as_numeric(np.asarray(time_a).reshape(-1))
+    values_b, valid_b, _ = _as_numeric(np.asarray(time_b).reshape(-1))
+    tol = tolerance * unit
+    empty = np.empty(0, dtype=np.intp)
+
+    candidates_b = np.flatnonzero(valid_b)
+    candidates_a = np.flatnonzero(valid_a)
+    if candidates_a.size == 0 or candidates_b.size == 0:
+        return TimeAlignment(empty, empty, values_a.size, values_b.size, tolerance)
+    order = candidates_b[np.argsort(values_b[candidates_b], kind="stable")]
+    sorted_b = values_b[order]
+    query = values_a[candidates_a]
+
+    # Nearest of the neighbours on either side of each insertion point.
+    pos = np.searchsorted(sorted_b, query, side="left")
+    left = np.clip(pos - 1, 0, sorted_b.size - 1)
+    right = np.clip(pos, 0, sorted_b.size - 1)
+    dist_left = np.abs(query - sorted_b[left])
+    dist_right = np.abs(sorted_b[right] - query)
+    nearest = np.where(dist_right < dist_left, right, left)
+    dist = np.minimum(dist_left, dist_right)
+
+    keep = dist <= tol
+    index_a = candidates_a[keep]
+    slot_b = nearest[keep]
+    dist = dist[keep]
+
+    # Resolve B records claimed by several A records: sort by (B, distance,
+    # A) and keep the first claim of each B record.
+    claims = np.lexsort((index_a, dist, slot_b))
+    first = np.ones(claims.size, dtype=bool)
+    first[1:] = slot_b[claims][1:] != slot_b[claims][:-1]
+    winners = np.sort(claims[first])
+    return TimeAlignment(
+        index_a=index_a[winners],
+        index_b=order[slot_b[winners]],
+        size_a=values_a.size,
+        size_b=values_b.size,
+        tolerance=tolerance,
+    )
@@ -40,7 +40,13 @@ def _values_differ(a, b) -> bool:
         import numpy as np
 
         if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
-            return not np.array_equal(a, b)
+            try:
+                return not np.array_equal(a, b, equal_nan=True)
+            except TypeError:
+                return not np.array_equal(a, b)
     except ImportError:
         pass
+    # NaN fill values read from a header compare equal to each other.
+    if isinstance(a, float) and isinstance(b, float) and a != a and b != b:
+        return False
     return a != b
@@ -0,0 +1,67 @@
+"""Per-basin statistics from a basin membership array."""
+
+import numpy as np
+
+
+def basin_sums(
+    membership: np.ndarray,
+    member_valid: np.ndarray,
+    values: np.ndarray,
+    valid: np.ndarray,
+) -> np.ndarray:
+    """Return per-basin (count, sum, sum of squares) of ``values``.
+
+    ``membership`` has the shape of ``values`` plus a trailing basins axis;
+    a nonzero, valid entry puts the point in that basin.  Each moment of
+    every basin comes from one ``einsum`` of the boolean membership matrix
+    with the valid mask, x or x**2, so the cost is one pass per moment
+    regardless of the number of basins.  The membership stays boolean and
+    is only cast to float64 in einsum's small buffers, so no points x
+    basins float array is built.  Results for disjoint blocks of points
+    add up.
+    """
+    n_basins = membership.shape[-1]
+    member = membership != 0
+    member &= member_valid
+    member = member.reshape(-1, n_basins)
+    flat_valid = valid.reshape(-1)
+    x = np.where(flat_valid, values.reshape(-1), 0).astype(np.float64, copy=False)
+    return np.stack(
+        [
+            np.einsum("nk,n->k", member, flat_valid, dtype=np.float64),
+            np.einsum("nk,n->k", member, x, dtype=np.float64),
+            np.einsum("nk,n,n->k", member, x, x, dtype=np.float64),
+        ],
+        axis=1,
+    )
+
+
+def basin_stats(sums: np.ndarray) -> dict:
+    """Per-basin count, mean and std from the output of ``basin_sums``."""
+    count, mean, mean_sq = _moments(sums)
+    std = np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+    return {
+        "count": count.tolist(),
+        "mean": _or_none(mean, count),
+        "std": _or_none(std, count),
+    }
+
+
+def basin_diffs(sums: np.ndarray) -> dict:
+    """Per-basin count, bias and rmsd from ``basin_sums`` of B - A."""
+    count, mean, mean_sq = _moments(sums)
+    return {
+        "count": count.tolist(),
+        "bias": _or_none(mean, count),
+        "rmsd": _or_none(np.sqrt(mean_sq), count),
+    }
+
+
+def _moments(sums: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    count = np.rint(sums[:, 0]).astype(np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return count, sums[:, 1] / count, sums[:, 2] / count
+
+
+def _or_none(values: np.ndarray, count: np.ndarray) -> list:
+    return [float(v) if n else None for v, n in zip(values, count)]
@@ -0,0 +1,88 @@
+"""Per-run cache of decoded variable arrays and validity masks."""
+
+import threading
+from concurrent.futures import CancelledError, Executor, Future
+
+import xarray as xr
+
+from validation.analysis.statistics import DecodedVariable, decode_variable
+
+
+class VariableCache:
+    """Decode and mask each variable of each file at most once.
+
+    Entries are keyed by ``(label, name)`` where ``label`` identifies the
+    file (``"a"`` or ``"b"``).  Callers evict a variable once every phase
+    that needs it has run.
+
+    The cache is safe to share between worker threads.  Decoding happens
+    outside the lock, so different variables decode concurrently, and
+    ``prefetch`` can start reading a variable on an I/O pool before it is
+    first requested.
+    """
+
+    def __init__(self):
+        self._entries: dict[tuple[str, str], DecodedVariable] = {}
+        self._pending: dict[tuple[str, str], Future] = {}
+        self._evicted: set[str] = set()
+        self._lock = threading.Lock()
+
+    def get(self, label: str, var: xr.DataArray) -> DecodedVariable:
+        """Return the decoded form of ``var``, decoding it on first use."""
+        key = (label, var.name)
+        with self._lock:
+            entry = self._entries.get(key)
+            future = self._pending.pop(key, None)
+        if entry is not None:
+            return entry
+        decoded = None
+        if future is not None:
+            try:
+                decoded = future.result()
+            except CancelledError:
+                # The I/O pool shut down before reaching this prefetch.
+                decoded = None
+        if decoded is None:
+            decoded = decode_variable(var.values)
+        with self._lock:
+            return self._entries.setdefault(key, decoded)
+
+    def put(self, label: str, name: str, decoded: DecodedVariable) -> None:
+        """Seed the cache with an already decoded variable."""
+        with self._lock:
+            self._entries[(label, name)] = decoded
+
+    def prefetch(self, label: str, var: xr.DataArray, executor: Executor) -> None:
+        """Start reading and decoding ``var`` on ``executor`` if not yet done."""
+        key = (label, var.name)
+        with self._lock:
+            if (
+                key in self._entries
+                or key in self._pending
+                or var.name in self._evicted
+            ):
+                return
+            self._pending[key] = executor.submit(lambda: decode_variable(var.values))
+
+    def evict(self, name: str) -> None:
+        """Drop every cached entry for variable ``name``."""
+        with self._lock:
+            self._evicted.add(name)
+            for key in [k for k in self._entries if k[1] == name]:
+                del self._entries[key]
+            for key in [k for k in self._pending if k[1] == name]:
+                self._pending.pop(key).cancel()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            self._evicted.clear()
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._entries or key in self._pending
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._pending)
@@ -0,0 +1,78 @@
+"""Block-wise statistics for variables too large to load at once."""
+
+from collections.abc import Iterator
+
+import numpy as np
+import xarray as xr
+
+from validation.analysis.accumulators import DiffAccumulator, StatsAccumulator
+from validation.analysis.sketch import DEFAULT_SKETCH_K, QuantileSketch
+from validation.analysis.statistics import (
+    DEFAULT_QUANTILES,
+    compute_variable_stats,
+    valid_mask,
+)
+
+
+def iter_blocks(
+    var: xr.DataArray, block_size: int, index: np.ndarray | None = None
+) -> Iterator[np.ndarray]:
+    """Yield ``var`` as arrays of at most ``block_size`` leading-axis rows.
+
+    Only the requested slab is read from a lazily opened dataset, so peak
+    memory scales with ``block_size`` rather than the variable size.
+    With ``index``, the rows at those leading-axis positions are yielded
+    instead, ``block_size`` positions at a time.
+    """
+    if block_size <= 0:
+        raise ValueError(f"block_size must be positive, got {block_size}")
+    if var.ndim == 0:
+        yield var.values
+        return
+    if index is not None:
+        for start in range(0, index.size, block_size):
+            yield var[index[start : start + block_size]].values
+        return
+    for start in range(0, var.shape[0], block_size):
+        yield var[start : start + block_size].values
+
+
+def compute_chunked_stats(
+    var: xr.DataArray,
+    block_size: int,
+    quantiles=DEFAULT_QUANTILES,
+    sketch_k: int = DEFAULT_SKETCH_K,
+    keep_sketch: bool = False,
+) -> dict:
+    """Block-wise equivalent of ``compute_variable_stats``.
+
+    The median and quantiles are estimated with a mergeable quantile
+    sketch of size ``sketch_k`` and are exact only while the variable has
+    fewer valid values than the sketch holds.  ``keep_sketch`` returns the
+    sketch under ``sketch``.
+    """
+    if not np.issubdtype(var.dtype, np.number):
+        return compute_variable_stats(var)
+    acc = StatsAccumulator(sketch=QuantileSketch(sketch_k))
+    for block in iter_blocks(var, block_size):
+        acc.update(block.reshape(-1))
+    return acc.result(var.shape, str(var.dtype), quantiles, keep_sketch)
+
+
+def compute_chunked_diff(
+    var_a: xr.DataArray, var_b: xr.DataArray, block_size: int
+) -> dict | None:
+    """Block-wise equivalent of ``compute_variable_diff``."""
+    if var_a.shape != var_b.shape:
+        return None
+    if not np.issubdtype(var_a.dtype, np.number) or not np.issubdtype(
+        var_b.dtype, np.number
+    ):
+        return None
+    acc = DiffAccumulator()
+    for block_a, block_b in zip(
+        iter_blocks(var_a, block_size), iter_blocks(var_b, block_size)
+    ):
+        both_valid = valid_mask(block_a) & valid_mask(block_b)
+        acc.update(block_a, block_b, both_valid)
+    return acc.result()
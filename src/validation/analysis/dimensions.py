@@ -11,11 +11,18 @@ def compare_dimensions(
     Returns a list of (dim_name, size_a, size_b) tuples for every dimension
     that differs in size or is present in only one dataset.
     """
-    all_dims = sorted(set(ds_a.sizes) | set(ds_b.sizes))
+    return compare_dimension_sizes(dict(ds_a.sizes), dict(ds_b.sizes))
+
+
+def compare_dimension_sizes(
+    sizes_a: dict[str, int], sizes_b: dict[str, int]
+) -> list[tuple[str, int | None, int | None]]:
+    """Compare two ``{dim_name: size}`` mappings, e.g. read from headers."""
+    all_dims = sorted(set(sizes_a) | set(sizes_b))
     diffs = []
     for dim in all_dims:
-        size_a = ds_a.sizes.get(dim)
-        size_b = ds_b.sizes.get(dim)
+        size_a = sizes_a.get(dim)
+        size_b = sizes_b.get(dim)
         if size_a != size_b:
             diffs.append((dim, size_a, size_b))
     return diffs
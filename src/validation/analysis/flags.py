@@ -0,0 +1,146 @@
+"""Flag-value distributions and A-vs-B transition matrices.
+
+Flag values are mapped to dense bin codes and counted with a single
+``np.bincount`` per flag variable.  Column offsets fold the per-column
+histograms of 2D flags (e.g. ``source_flag`` over ``src_flag_dim``) into
+the same pass.  Results of disjoint blocks combine with
+``merge_distributions`` and ``merge_transitions``.
+"""
+
+import numpy as np
+
+# Widest value range counted with offset indexing; wider ranges (e.g.
+# bit-mask flags) are first compressed to the distinct values present.
+_MAX_BINS = 1 << 16
+
+
+def _codes(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Map integer flag values to dense bin codes.
+
+    Returns (labels, codes) with ``labels[codes] == values``.
+    """
+    lo, hi = int(values.min()), int(values.max())
+    if hi - lo < _MAX_BINS:
+        return np.arange(lo, hi + 1), values.astype(np.int64) - lo
+    labels, codes = np.unique(values, return_inverse=True)
+    return labels, codes
+
+
+def _as_int(values: np.ndarray) -> np.ndarray:
+    # Flags decoded with a _FillValue arrive as floats; valid ones are integral.
+    if np.issubdtype(values.dtype, np.integer):
+        return values
+    return values.astype(np.int64)
+
+
+def _histogram(labels: np.ndarray, counts: np.ndarray) -> dict[int, int]:
+    return {int(labels[i]): int(counts[i]) for i in np.flatnonzero(counts)}
+
+
+def flag_distribution(values: np.ndarray, valid: np.ndarray) -> dict:
+    """Histogram the valid values of a 1D or 2D flag array.
+
+    Returns ``good`` (value 0), ``bad`` and ``total`` counts, the
+    per-value ``histogram`` and, for 2D flags, one histogram per column
+    of the second axis in ``columns``.
+    """
+    flags = _as_int(values[valid])
+    if flags.size == 0:
+        result = {"good": 0, "bad": 0, "total": 0, "histogram": {}}
+        if values.ndim == 2:
+            result["columns"] = [{} for _ in range(values.shape[1])]
+        return result
+
+    labels, codes = _codes(flags)
+    nbins = labels.size
+    if values.ndim == 2:
+        ncols = values.shape[1]
+        offsets = np.broadcast_to(np.arange(ncols) * nbins, values.shape)[valid]
+        counts = np.bincount(codes + offsets, minlength=ncols * nbins)
+        counts = counts.reshape(ncols, nbins)
+        totals = counts.sum(axis=0)
+    else:
+        totals = np.bincount(codes, minlength=nbins)
+
+    histogram = _histogram(labels, totals)
+    good = histogram.get(0, 0)
+    result = {
+        "good": good,
+        "bad": int(flags.size) - good,
+        "total": int(flags.size),
+        "histogram": histogram,
+    }
+    if values.ndim == 2:
+        result["columns"] = [_histogram(labels, column) for column in counts]
+    return result
+
+
+def flag_transitions(
+    values_a: np.ndarray,
+    valid_a: np.ndarray,
+    values_b: np.ndarray,
+    valid_b: np.ndarray,
+) -> dict | None:
+    """Confusion matrix of A vs B flag values at matching indices.
+
+    Only elements valid in both files are counted.  Returns ``values``
+    (the flag values indexing both axes), ``counts`` with
+    ``counts[i][j]`` elements flagged ``values[i]`` in A and ``values[j]``
+    in B, and the number of ``changed`` elements off the diagonal.
+    Returns None when the shapes differ.
+    """
+    if values_a.shape != values_b.shape:
+        return None
+    both_valid = valid_a & valid_b
+    flags_a = _as_int(values_a[both_valid])
+    flags_b = _as_int(values_b[both_valid])
+    n = flags_a.size
+    if n == 0:
+        return {"values": [], "counts": [], "changed": 0}
+    labels, codes = _codes(np.concatenate([flags_a, flags_b]))
+    # Drop labels absent from both files so the matrix stays compact.
+    present = np.bincount(codes, minlength=labels.size) > 0
+    remap = np.cumsum(present) - 1
+    labels, codes = labels[present], remap[codes]
+    k = labels.size
+    matrix = np.bincount(codes[:n] * k + codes[n:], minlength=k * k).reshape(k, k)
+    return {
+        "values": labels.tolist(),
+        "counts": matrix.tolist(),
+        "changed": int(n - np.trace(matrix)),
+    }
+
+
+def _add_histograms(left: dict[int, int], right: dict[int, int]) -> dict[int, int]:
+    merged = dict(left)
+    for value, count in right.items():
+        merged[value] = merged.get(value, 0) + count
+    return dict(sorted(merged.items()))
+
+
+def merge_distributions(left: dict, right: dict) -> dict:
+    """Combine ``flag_distribution`` results of two disjoint blocks."""
+    result = {key: left[key] + right[key] for key in ("good", "bad", "total")}
+    result["histogram"] = _add_histograms(left["histogram"], right["histogram"])
+    if "columns" in left:
+        result["columns"] = [
+            _add_histograms(a, b) for a, b in zip(left["columns"], right["columns"])
+        ]
+    return result
+
+
+def merge_transitions(left: dict | None, right: dict | None) -> dict | None:
+    """Combine ``flag_transitions`` results of two disjoint blocks."""
+    if left is None or right is None:
+        return None
+    labels = sorted(set(left["values"]) | set(right["values"]))
+    matrix = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    for part in (left, right):
+        if part["values"]:
+            pos = np.searchsorted(labels, part["values"])
+            matrix[np.ix_(pos, pos)] += np.asarray(part["counts"], dtype=np.int64)
+    return {
+        "values": labels,
+        "counts": matrix.tolist(),
+        "changed": left["changed"] + right["changed"],
+    }
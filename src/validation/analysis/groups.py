@@ -0,0 +1,77 @@
+"""Grouped difference statistics (e.g. per pass or per cycle)."""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class GroupedDiff:
+    """Per-group count, signed sum, sum of squares and max |B - A|.
+
+    ``keys`` is sorted and unique; the other arrays are aligned with it.
+    Instances built over disjoint blocks combine with ``merge``, so the
+    group-by can be streamed block by block.
+    """
+
+    keys: np.ndarray
+    count: np.ndarray
+    sum: np.ndarray
+    sum_sq: np.ndarray
+    max_abs: np.ndarray
+
+    @classmethod
+    def from_arrays(
+        cls, keys: np.ndarray, a: np.ndarray, b: np.ndarray, valid: np.ndarray
+    ) -> "GroupedDiff":
+        """Group ``b - a`` over the elements where ``valid`` is True by ``keys``."""
+        diff = np.subtract(b[valid], a[valid], dtype=np.float64)
+        return _reduce(
+            keys[valid],
+            np.ones(diff.size, dtype=np.int64),
+            diff,
+            diff * diff,
+            np.abs(diff),
+        )
+
+    def merge(self, other: "GroupedDiff") -> "GroupedDiff":
+        return _reduce(
+            np.concatenate([self.keys, other.keys]),
+            np.concatenate([self.count, other.count]),
+            np.concatenate([self.sum, other.sum]),
+            np.concatenate([self.sum_sq, other.sum_sq]),
+            np.concatenate([self.max_abs, other.max_abs]),
+        )
+
+    def result(self) -> dict:
+        """Return per-group lists of key, count, bias, rmsd and max_abs."""
+        return {
+            "keys": self.keys.tolist(),
+            "count": self.count.tolist(),
+            "bias": (self.sum / self.count).tolist(),
+            "rmsd": np.sqrt(self.sum_sq / self.count).tolist(),
+            "max_abs": self.max_abs.tolist(),
+        }
+
+
+def _reduce(keys, count, total, sum_sq, max_abs) -> GroupedDiff:
+    """Collapse rows with equal keys in one vectorized pass.
+
+    ``np.unique`` gives each row its group index; sums are ``bincount``
+    with weights and maxima a ``maximum.reduceat`` over the rows sorted by
+    group, so the cost does not depend on the number of groups.
+    """
+    groups, inverse = np.unique(keys, return_inverse=True)
+    n = groups.size
+    counts = np.bincount(inverse, weights=count, minlength=n).astype(np.int64)
+    if n == 0:
+        return GroupedDiff(groups, counts, np.zeros(0), np.zeros(0), np.zeros(0))
+    order = np.argsort(inverse, kind="stable")
+    starts = np.searchsorted(inverse[order], np.arange(n))
+    return GroupedDiff(
+        keys=groups,
+        count=counts,
+        sum=np.bincount(inverse, weights=total, minlength=n),
+        sum_sq=np.bincount(inverse, weights=sum_sq, minlength=n),
+        max_abs=np.maximum.reduceat(max_abs[order], starts),
+    )
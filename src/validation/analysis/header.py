@@ -0,0 +1,81 @@
+"""Header-only reading of NetCDF files for metadata comparisons.
+
+Uses netCDF4 directly so that no variable data, not even index
+coordinates, is read.
+"""
+
+from dataclasses import dataclass, field
+
+import netCDF4
+
+from validation.analysis.attributes import _values_differ
+
+
+@dataclass
+class VariableHeader:
+    """Storage layout and attributes of one variable."""
+
+    dims: tuple[str, ...]
+    shape: tuple[int, ...]
+    dtype: str
+    attrs: dict = field(default_factory=dict)
+    # "contiguous" or the chunk shape as a tuple.
+    chunking: str | tuple[int, ...] = "contiguous"
+    # Enabled filters and their settings (zlib, shuffle, complevel, ...).
+    compression: dict = field(default_factory=dict)
+
+
+@dataclass
+class FileHeader:
+    """Dimensions, global attributes and variable headers of one file."""
+
+    dimensions: dict[str, int] = field(default_factory=dict)
+    attrs: dict = field(default_factory=dict)
+    variables: dict[str, VariableHeader] = field(default_factory=dict)
+
+
+def _compression(var: netCDF4.Variable) -> dict:
+    """Return only the filters that are enabled on ``var``."""
+    return {key: value for key, value in (var.filters() or {}).items() if value}
+
+
+def read_header(path: str) -> FileHeader:
+    """Read the header of the root group of ``path``."""
+    with netCDF4.Dataset(path) as nc:
+        header = FileHeader(
+            dimensions={name: len(dim) for name, dim in nc.dimensions.items()},
+            attrs={name: nc.getncattr(name) for name in nc.ncattrs()},
+        )
+        for name, var in nc.variables.items():
+            # NETCDF3 files have no chunking and return None.
+            chunking = var.chunking() or "contiguous"
+            header.variables[name] = VariableHeader(
+                dims=tuple(var.dimensions),
+                shape=tuple(var.shape),
+                dtype=str(var.dtype),
+                attrs={attr: var.getncattr(attr) for attr in var.ncattrs()},
+                chunking=chunking if chunking == "contiguous" else tuple(chunking),
+                compression=_compression(var),
+            )
+    return header
+
+
+def compare_variable_layout(
+    var_a: VariableHeader, var_b: VariableHeader
+) -> list[tuple[str, object, object]]:
+    """Compare dims, dtype, chunking and compression of two variables.
+
+    Returns a list of (property, val_a, val_b) tuples, like
+    ``compare_attributes``.
+    """
+    diffs = []
+    for prop in ("dims", "shape", "dtype", "chunking"):
+        val_a, val_b = getattr(var_a, prop), getattr(var_b, prop)
+        if val_a != val_b:
+            diffs.append((prop, val_a, val_b))
+    for key in sorted(set(var_a.compression) | set(var_b.compression)):
+        val_a = var_a.compression.get(key)
+        val_b = var_b.compression.get(key)
+        if _values_differ(val_a, val_b):
+            diffs.append((f"compression.{key}", val_a, val_b))
+    return diffs
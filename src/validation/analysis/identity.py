@@ -0,0 +1,63 @@
+"""Raw-data digests used to short-circuit bit-identical variables."""
+
+import hashlib
+
+import numpy as np
+import xarray as xr
+
+from validation.analysis.chunked import iter_blocks
+
+# Attributes that change how stored values decode; two variables with the
+# same raw bytes only decode identically if these match as well.
+_DECODING_ATTRS = (
+    "scale_factor",
+    "add_offset",
+    "_FillValue",
+    "missing_value",
+    "_Unsigned",
+    "units",
+    "calendar",
+)
+
+# Leading-axis rows hashed at a time when no block size is given.
+_DIGEST_ROWS = 4096
+
+
+def raw_digest(var: xr.DataArray, block_size: int | None = None) -> str | None:
+    """Hash the stored (undecoded) values of ``var``.
+
+    ``var`` should come from a dataset opened with ``decode_cf=False``.
+    The digest covers dtype, shape, the decoding attributes and the raw
+    buffer, read ``block_size`` leading-axis rows at a time.  Returns None
+    for non-numeric data, which has no stable raw buffer.
+    """
+    if not np.issubdtype(var.dtype, np.number):
+        return None
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{var.dtype.str}|{var.shape}|".encode())
+    for name in _DECODING_ATTRS:
+        if name in var.attrs:
+            h.update(f"{name}={np.asarray(var.attrs[name]).tolist()!r}|".encode())
+    for block in iter_blocks(var, block_size or _DIGEST_ROWS):
+        h.update(np.ascontiguousarray(block).tobytes())
+    return h.hexdigest()
+
+
+def identical_diff(stats: dict) -> dict:
+    """Diff metrics of a variable compared with a bit-identical copy.
+
+    Matches what ``compute_variable_diff`` returns for identical inputs,
+    derived from the variable's own stats instead of a second pass.
+    """
+    if not stats.get("valid_count"):
+        return {"max_abs_diff": None, "mean_abs_diff": None, "rmsd": None}
+    # np.corrcoef of a series with itself is 1, or NaN when it is constant.
+    pearson_r = 1.0 if stats["valid_count"] > 1 and stats["std"] > 0 else None
+    return {
+        "max_abs_diff": 0.0,
+        "mean_abs_diff": 0.0,
+        "rmsd": 0.0,
+        "bias": 0.0,
+        "pearson_r": pearson_r,
+        "raw_identical": True,
+    }
@@ -0,0 +1,153 @@
+"""Comparison of packed integer variables without CF decoding.
+
+Variables stored as integers with ``scale_factor``/``add_offset`` are
+compared in their stored form, read from a dataset opened with
+``decode_cf=False``.  When both files use the same packing, differences
+are exact integer differences, and stats and diff metrics are converted
+to physical units analytically (``physical = scale * packed + offset``)
+instead of unpacking every element to floating point.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import xarray as xr
+
+from validation.analysis.accumulators import DiffAccumulator, StatsAccumulator
+from validation.analysis.chunked import iter_blocks
+from validation.analysis.sketch import DEFAULT_SKETCH_K, QuantileSketch
+from validation.analysis.statistics import (
+    DEFAULT_QUANTILES,
+    DecodedVariable,
+    compute_variable_stats,
+)
+
+
+@dataclass(frozen=True)
+class Packing:
+    """Packing parameters of a stored integer variable."""
+
+    scale: float = 1.0
+    offset: float = 0.0
+    # Stored values xarray would mask (_FillValue and missing_value).
+    fills: tuple = ()
+
+
+def packing_of(var: xr.DataArray) -> Packing | None:
+    """Return the packing of an undecoded variable, or None if unpacked.
+
+    Only signed integer variables with a ``scale_factor`` or
+    ``add_offset`` qualify; ``_Unsigned`` variables are left to the
+    decoded path.
+    """
+    attrs = var.attrs
+    if not np.issubdtype(var.dtype, np.signedinteger) or "_Unsigned" in attrs:
+        return None
+    if "scale_factor" not in attrs and "add_offset" not in attrs:
+        return None
+    fills = []
+    for name in ("_FillValue", "missing_value"):
+        if name in attrs:
+            fills.extend(np.atleast_1d(attrs[name]).tolist())
+    return Packing(
+        scale=float(attrs.get("scale_factor", 1.0)),
+        offset=float(attrs.get("add_offset", 0.0)),
+        fills=tuple(sorted(set(fills))),
+    )
+
+
+def _packed_valid_mask(block: np.ndarray, packing: Packing) -> np.ndarray:
+    """Mask the same elements CF decoding would turn into NaN."""
+    valid = np.ones(block.shape, dtype=bool)
+    for fill in packing.fills:
+        valid &= block != fill
+    return valid
+
+
+def _physical_stats(stats: dict, packing: Packing) -> dict:
+    """Convert stats of packed values to physical units."""
+    if not stats["valid_count"]:
+        return stats
+    scale, offset = packing.scale, packing.offset
+    lo = stats["min"] * scale + offset
+    hi = stats["max"] * scale + offset
+    if "sketch" in stats:
+        stats = {**stats, "sketch": stats["sketch"].affine(scale, offset)}
+    return {
+        **stats,
+        "min": min(lo, hi),
+        "max": max(lo, hi),
+        "mean": stats["mean"] * scale + offset,
+        "median": stats["median"] * scale + offset,
+        "std": stats["std"] * abs(scale),
+        "quantiles": {q: v * scale + offset for q, v in stats["quantiles"].items()},
+    }
+
+
+def compute_packed_stats(
+    var: xr.DataArray,
+    packing: Packing,
+    block_size: int | None = None,
+    quantiles=DEFAULT_QUANTILES,
+    sketch_k: int = DEFAULT_SKETCH_K,
+    keep_sketch: bool = False,
+) -> dict:
+    """Stats of an undecoded packed variable, in physical units.
+
+    With ``block_size`` the variable is read in blocks and the quantiles
+    are estimated as in ``compute_chunked_stats``.  ``keep_sketch``
+    returns a quantile sketch of the physical values under ``sketch``.
+    """
+    if block_size:
+        acc = StatsAccumulator(sketch=QuantileSketch(sketch_k))
+        for block in iter_blocks(var, block_size):
+            block = block.reshape(-1)
+            acc.update(block, _packed_valid_mask(block, packing))
+        stats = acc.result(var.shape, str(var.dtype), quantiles, keep_sketch)
+    else:
+        data = var.values
+        decoded = DecodedVariable(values=data, valid=_packed_valid_mask(data, packing))
+        stats = compute_variable_stats(
+            var, decoded, quantiles, sketch_k if keep_sketch else None
+        )
+    return _physical_stats(stats, packing)
+
+
+def compute_packed_diff(
+    var_a: xr.DataArray,
+    var_b: xr.DataArray,
+    packing: Packing,
+    block_size: int | None = None,
+) -> dict | None:
+    """Exact integer diff of two variables stored with the same packing.
+
+    Returns the keys of ``compute_variable_diff`` in physical units, plus
+    ``packed`` and ``exact_equal``: True when both files mask the same
+    elements and every valid stored integer is equal.  Differences of
+    integers up to 32 bits are exact in float64, so the packed metrics
+    are exact before scaling.
+    """
+    if var_a.shape != var_b.shape:
+        return None
+    # Without a block size the whole variable is one block.
+    rows = block_size or max(var_a.shape[:1], default=1) or 1
+    acc = DiffAccumulator()
+    same_mask = True
+    for block_a, block_b in zip(iter_blocks(var_a, rows), iter_blocks(var_b, rows)):
+        valid_a = _packed_valid_mask(block_a, packing)
+        valid_b = _packed_valid_mask(block_b, packing)
+        same_mask = same_mask and np.array_equal(valid_a, valid_b)
+        acc.update(block_a, block_b, valid_a & valid_b)
+    diff = acc.result()
+    exact_equal = same_mask and acc.max_abs == 0.0
+    diff["packed"] = True
+    diff["exact_equal"] = exact_equal
+    if diff["max_abs_diff"] is None:
+        return diff
+    scale = abs(packing.scale)
+    diff["max_abs_diff"] *= scale
+    diff["mean_abs_diff"] *= scale
+    diff["rmsd"] *= scale
+    diff["bias"] *= packing.scale
+    # Pearson r is invariant under the same affine map applied to A and B.
+    return diff
@@ -0,0 +1,152 @@
+"""Regridding of a lat/lon grid onto another grid's coordinates.
+
+Each axis is mapped independently.  When the source axis is an integer
+multiple finer than the target and its cells nest inside the target
+cells, the axis is coarsened by block averaging (a reshape and a sum);
+axes running in opposite directions (e.g. north-to-south latitudes
+against south-to-north) are matched in ascending order and flipped.
+Otherwise it is linearly interpolated with a sparse two-point operator
+(the neighbour indices and weights of each target coordinate).  Both
+are linear, so values and weights are mapped separately and divided,
+which ignores missing (NaN/fill) source cells and weights by ``counts``.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class AxisMap:
+    """Linear map of one grid axis onto target coordinates.
+
+    Either ``ratio`` (block averaging over ``ratio`` source cells, then
+    reversing the result when ``reverse`` is set) or ``index``/``weight``
+    (target-by-2 neighbour indices and weights; target points outside the
+    source range get zero weight) is set.
+    """
+
+    ratio: int | None = None
+    index: np.ndarray | None = None
+    weight: np.ndarray | None = None
+    reverse: bool = False
+
+    def apply(self, x: np.ndarray, axis: int) -> np.ndarray:
+        if self.ratio is not None:
+            if self.ratio != 1:
+                shape = x.shape[:axis] + (-1, self.ratio) + x.shape[axis + 1 :]
+                x = x.reshape(shape).sum(axis=axis + 1)
+            return np.flip(x, axis) if self.reverse else x
+        shape = [1] * x.ndim
+        shape[axis] = -1
+        w0 = self.weight[:, 0].reshape(shape)
+        w1 = self.weight[:, 1].reshape(shape)
+        return np.take(x, self.index[:, 0], axis=axis) * w0 + np.take(
+            x, self.index[:, 1], axis=axis
+        ) * w1
+
+    @property
+    def kind(self) -> str:
+        return "block" if self.ratio is not None else "interp"
+
+
+@dataclass(frozen=True)
+class RegridPlan:
+    """Per-axis maps of a 2D (lat, lon) source grid onto a target grid."""
+
+    lat: AxisMap
+    lon: AxisMap
+
+    @property
+    def method(self) -> str:
+        kinds = {self.lat.kind, self.lon.kind}
+        return kinds.pop() if len(kinds) == 1 else "block+interp"
+
+    def apply(
+        self,
+        values: np.ndarray,
+        valid: np.ndarray,
+        weights: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Map ``values`` (2D, lat first) onto the target grid.
+
+        Returns float64 values and their validity; a target cell is valid
+        when any source cell with nonzero weight contributes to it.
+        ``weights`` (e.g. ``counts``) weight the source cells.
+        """
+        w = valid.astype(np.float64)
+        if weights is not None:
+            w *= weights
+        num = np.where(w > 0, values, 0) * w
+        den = w
+        for axis, axis_map in enumerate((self.lat, self.lon)):
+            num = axis_map.apply(num, axis)
+            den = axis_map.apply(den, axis)
+        out_valid = den > 0
+        out = np.full(den.shape, np.nan)
+        np.divide(num, den, out=out, where=out_valid)
+        return out, out_valid
+
+
+def _descending(x: np.ndarray) -> bool:
+    return x.size > 1 and x[-1] < x[0]
+
+
+def _block_map(src: np.ndarray, dst: np.ndarray) -> AxisMap | None:
+    """Block averaging map if ``src`` cells nest exactly inside ``dst`` cells.
+
+    Both axes are compared in ascending order; when they run in opposite
+    directions the averaged cells are reversed into ``dst`` order.
+    """
+    if dst.size == 0 or src.size % dst.size:
+        return None
+    ratio = src.size // dst.size
+    reverse = _descending(src) != _descending(dst)
+    src_up = src[::-1] if _descending(src) else src
+    dst_up = dst[::-1] if _descending(dst) else dst
+    centres = src_up.reshape(-1, ratio).mean(axis=1)
+    step = abs(float(src[1] - src[0])) if src.size > 1 else 1.0
+    if not np.allclose(centres, dst_up, rtol=0.0, atol=step * 1e-3):
+        return None
+    return AxisMap(ratio=ratio, reverse=reverse)
+
+
+def _interp_map(src: np.ndarray, dst: np.ndarray) -> AxisMap:
+    """Two-point linear interpolation of ``src`` positions at ``dst``."""
+    order = np.argsort(src, kind="stable")
+    sorted_src = src[order]
+    pos = np.clip(np.searchsorted(sorted_src, dst, side="right") - 1, 0, src.size - 2)
+    lo, hi = sorted_src[pos], sorted_src[pos + 1]
+    frac = (dst - lo) / (hi - lo)
+    inside = (frac >= 0) & (frac <= 1)
+    weight = np.stack([1 - frac, frac], axis=1) * inside[:, None]
+    index = np.stack([order[pos], order[pos + 1]], axis=1)
+    return AxisMap(index=index, weight=weight)
+
+
+def _axis_map(src: np.ndarray, dst: np.ndarray) -> AxisMap:
+    if src.size == dst.size and np.allclose(src, dst):
+        return AxisMap(ratio=1)
+    return _block_map(src, dst) or _interp_map(src, dst)
+
+
+@lru_cache(maxsize=8)
+def _plan(src_lat: bytes, src_lon: bytes, dst_lat: bytes, dst_lon: bytes) -> RegridPlan:
+    coords = [np.frombuffer(c, dtype=np.float64) for c in (src_lat, src_lon, dst_lat, dst_lon)]
+    return RegridPlan(lat=_axis_map(coords[0], coords[2]), lon=_axis_map(coords[1], coords[3]))
+
+
+def regrid_plan(
+    src_lat: np.ndarray, src_lon: np.ndarray, dst_lat: np.ndarray, dst_lon: np.ndarray
+) -> RegridPlan | None:
+    """Return the (cached) plan mapping the source grid onto the target grid.
+
+    Plans are cached per grid pair, so the interpolation operators are
+    built once however many variables or files share the grids.  Returns
+    None if an axis has fewer than two coordinates.
+    """
+    coords = [np.asarray(c, dtype=np.float64) for c in (src_lat, src_lon, dst_lat, dst_lon)]
+    if min(c.size for c in coords) < 2:
+        return None
+    return _plan(*(c.tobytes() for c in coords))
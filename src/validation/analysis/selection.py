@@ -0,0 +1,27 @@
+"""Variable subset selection with glob patterns."""
+
+from fnmatch import fnmatchcase
+
+
+def select_names(
+    names: list[str],
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    restrict_to: list[str] | None = None,
+) -> tuple[list[str], list[str]]:
+    """Split variable names into selected and skipped lists.
+
+    A name is selected when it matches any ``include`` glob (all names if
+    ``include`` is empty), matches no ``exclude`` glob and, when
+    ``restrict_to`` is given, is one of those names.  Both returned lists
+    are sorted.
+    """
+    selected, skipped = [], []
+    for name in sorted(names):
+        keep = not include or any(fnmatchcase(name, pat) for pat in include)
+        if keep and exclude:
+            keep = not any(fnmatchcase(name, pat) for pat in exclude)
+        if keep and restrict_to is not None:
+            keep = name in restrict_to
+        (selected if keep else skipped).append(name)
+    return selected, skipped
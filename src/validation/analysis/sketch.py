@@ -0,0 +1,152 @@
+"""Mergeable streaming quantile sketch."""
+
+import hashlib
+import math
+
+import numpy as np
+
+DEFAULT_SKETCH_K = 200
+
+# Number of standard deviations of the accumulated compaction error
+# allowed in ``rank_error``.
+_ERROR_SIGMAS = 3.0
+
+
+class QuantileSketch:
+    """KLL-style mergeable quantile sketch.
+
+    Items are held in a stack of compactors; an item at level ``h``
+    stands for ``2**h`` input values.  When a level outgrows its capacity
+    it is sorted and every other item (random offset) is promoted to the
+    next level.  Until the first compaction the sketch holds every value
+    and answers quantiles exactly.
+
+    Error bound: after compaction, the rank of an estimated quantile
+    differs from the requested one by at most ``rank_error`` times the
+    number of values.  The bound is derived from the compactions that
+    actually happened, in this sketch and in every sketch merged into
+    it, so it grows with repeated merging (about 1-2% at ``k=200``).  It
+    holds with high probability, for any input distribution, as long as
+    merged sketches use independent seeds.  About ``k`` items are
+    retained whatever the number of values.
+
+    Parameters
+    ----------
+    k : int
+        Capacity of the top compactor; larger values trade memory for
+        accuracy.
+    seed : int, optional
+        Seed for the compaction offsets.  By default it is derived from
+        the values first compacted, so sketches of different data flip
+        independent coins while a report stays reproducible.
+    """
+
+    def __init__(self, k: int = DEFAULT_SKETCH_K, seed: int | None = None):
+        self.k = k
+        self.count = 0
+        self._levels: list[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = None if seed is None else np.random.default_rng(seed)
+        # Compaction history: sum of the squared and of the plain weights
+        # of every compaction so far, including those of merged sketches.
+        self._error_var = 0.0
+        self._error_max = 0.0
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(int(math.ceil(self.k * (2.0 / 3.0) ** depth)), 2)
+
+    def update(self, values: np.ndarray) -> None:
+        """Add a 1D array of valid values to the sketch."""
+        if values.size == 0:
+            return
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self.count += values.size
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Fold another sketch into this one."""
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.count += other.count
+        self._error_var += other._error_var
+        self._error_max += other._error_max
+        self._compress()
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # An odd item out stays behind so weights are preserved.
+                keep = items[-1:] if items.size % 2 else items[:0]
+                paired = items[: items.size - keep.size]
+                if self._rng is None:
+                    self._rng = np.random.default_rng(_content_seed(items))
+                offset = int(self._rng.integers(2))
+                self._levels[level + 1] = np.concatenate(
+                    [self._levels[level + 1], paired[offset::2]]
+                )
+                self._levels[level] = keep
+                weight = 2.0**level
+                self._error_var += weight * weight
+                self._error_max += weight
+                # Capacities depend on the number of levels; start over.
+                level = 0
+                continue
+            level += 1
+
+    @property
+    def exact(self) -> bool:
+        """True while no compaction has happened."""
+        return all(items.size == 0 for items in self._levels[1:])
+
+    @property
+    def rank_error(self) -> float:
+        """Bound on the normalized rank error of ``quantile`` estimates."""
+        if self.exact:
+            return 0.0
+        # Each compaction shifts the rank of any query by 0 or +/- its
+        # item weight, with a fair coin; independent shifts add up to at
+        # most _ERROR_SIGMAS standard deviations, never more than their
+        # sum.  Picking a retained item adds up to the top-level weight.
+        spread = min(_ERROR_SIGMAS * math.sqrt(self._error_var), self._error_max)
+        top = 2.0 ** (len(self._levels) - 1)
+        return min((spread + top) / self.count, 1.0)
+
+    def affine(self, scale: float, offset: float) -> "QuantileSketch":
+        """Return a sketch of ``scale * x + offset`` over the same values."""
+        other = QuantileSketch(self.k)
+        other.count = self.count
+        other._levels = [items * scale + offset for items in self._levels]
+        other._rng = self._rng
+        other._error_var = self._error_var
+        other._error_max = self._error_max
+        return other
+
+    def quantile(self, q) -> np.ndarray:
+        """Estimate quantiles ``q`` (fractions in [0, 1])."""
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+        if self.exact:
+            return np.quantile(self._levels[0], q)
+        values = np.concatenate(self._levels)
+        weights = np.concatenate(
+            [np.full(items.size, 2.0**level) for level, items in enumerate(self._levels)]
+        )
+        order = np.argsort(values, kind="stable")
+        values = values[order]
+        cum = np.cumsum(weights[order])
+        idx = np.searchsorted(cum, q * cum[-1], side="left")
+        return values[np.minimum(idx, values.size - 1)]
+
+
+def _content_seed(items: np.ndarray) -> int:
+    digest = hashlib.blake2b(items.tobytes(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
@@ -1,8 +1,12 @@
 """Per-variable statistics computation and diff analysis."""
 
+from dataclasses import dataclass
+
 import numpy as np
 import xarray as xr
 
+from validation.analysis.sketch import QuantileSketch
+
 # Fill values used by the pipeline encoding conventions.
 # Integer dtype-max values and non-finite floats are treated as fill.
 _INT_FILL_VALUES = {
@@ -12,74 +16,298 @@ _INT_FILL_VALUES = {
     np.dtype("int64"): np.iinfo(np.int64).max,
 }
 
+# Elements per block in the fused statistics kernel.  Large enough to
+# amortise per-block overhead, small enough that block temporaries stay
+# in cache.
+_BLOCK_SIZE = 1 << 16
+
+# Histogram bins per narrowing step of the exact quantile selection, and
+# the number of steps after which a still-large range is copied instead.
+_SELECT_BINS = 4096
+_SELECT_DEPTH = 8
+
+# Quantiles reported for every numeric variable; the median is 0.5.
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def resolve_quantiles(extra=None) -> tuple[float, ...]:
+    """Return the sorted union of ``DEFAULT_QUANTILES`` and ``extra``."""
+    return tuple(sorted(set(DEFAULT_QUANTILES) | set(extra or ())))
+
+
+@dataclass
+class DecodedVariable:
+    """A variable's values in their native dtype and its validity mask.
+
+    Fill elements keep their stored value in ``values``; only elements
+    where ``valid`` is True are meaningful.
+    """
+
+    values: np.ndarray
+    valid: np.ndarray
+
+
+def decode_variable(data: np.ndarray) -> DecodedVariable:
+    """Record which elements of ``data`` are valid, without upcasting.
+
+    Integer fill sentinels and non-finite floats are masked in the native
+    dtype, so int8 flags stay one byte per element and float32 grids four.
+    """
+    data = np.asarray(data)
+    return DecodedVariable(values=data, valid=valid_mask(data))
+
+
+def valid_mask(block: np.ndarray) -> np.ndarray:
+    """Return a boolean mask of the non-fill, finite elements of ``block``."""
+    if block.dtype in _INT_FILL_VALUES:
+        return block != _INT_FILL_VALUES[block.dtype]
+    if np.issubdtype(block.dtype, np.inexact):
+        return np.isfinite(block)
+    return np.ones(block.shape, dtype=bool)
+
+
+def _valid_blocks(
+    data: np.ndarray,
+    mask: np.ndarray | None = None,
+    block_size: int = _BLOCK_SIZE,
+):
+    """Yield the valid values of ``data``, ``block_size`` elements at a time.
+
+    Each yielded array is a block-sized temporary in the native dtype.  A
+    precomputed ``mask`` (e.g. from ``decode_variable``) replaces the
+    per-block masking.
+    """
+    flat = data.reshape(-1)
+    flat_mask = mask.reshape(-1) if mask is not None else None
+    for start in range(0, flat.size, block_size):
+        block = flat[start : start + block_size]
+        if flat_mask is not None:
+            yield block[flat_mask[start : start + block_size]]
+        else:
+            yield block[valid_mask(block)]
+
+
+def _quantiles(blocks, count: int, vmin: float, vmax: float, quantiles) -> dict[float, float]:
+    """Exact quantiles of the ``count`` valid values yielded by ``blocks()``.
 
-def _mask_fill(data: np.ndarray) -> np.ndarray:
-    """Return a float64 copy with fill/sentinel values replaced by NaN."""
-    result = data.astype(np.float64)
-    if data.dtype in _INT_FILL_VALUES:
-        result[data == _INT_FILL_VALUES[data.dtype]] = np.nan
-    # Mask non-finite floats (inf, -inf, nan already present)
-    result[~np.isfinite(result)] = np.nan
+    Uses the linear interpolation of ``np.quantile``'s default method;
+    every order statistic that any quantile needs is selected together
+    (see ``_select``) and the interpolation is done in float64.
+    """
+    last = count - 1
+    positions = [q * last for q in quantiles]
+    kth = sorted({int(np.floor(p)) for p in positions} | {int(np.ceil(p)) for p in positions})
+    order = {}
+    _select(blocks, vmin, vmax, count, 0, kth, order, 0)
+    result = {}
+    for q, pos in zip(quantiles, positions):
+        lo = int(np.floor(pos))
+        hi = int(np.ceil(pos))
+        a, b = order[lo], order[hi]
+        result[q] = a + (b - a) * (pos - lo)
     return result
 
 
-def compute_variable_stats(var: xr.DataArray) -> dict:
+def _select(blocks, lo, hi, count, below, ranks, out, depth) -> None:
+    """Store in ``out`` the order statistics ``ranks`` of the valid values.
+
+    ``count`` values lie in ``[lo, hi]``, which are their actual minimum
+    and maximum, and ``below`` values are smaller.  Ranges holding at
+    most ``_BLOCK_SIZE`` values are copied and partitioned in one call.
+    Larger ones are split into ``_SELECT_BINS`` equal-width bins: one pass
+    counts the bins, a second copies out the bins holding a rank, or
+    finds the minimum and maximum of those still too large to copy,
+    which are then narrowed recursively.  No full-size copy of the values
+    is made; ranges still large after ``_SELECT_DEPTH`` levels (values
+    clustered far below float resolution of the range) are copied rather
+    than narrowed further.
+    """
+    if lo == hi:
+        for rank in ranks:
+            out[rank] = float(lo)
+        return
+    width = float(hi) - float(lo)
+    if count <= _BLOCK_SIZE or depth == _SELECT_DEPTH or not np.isfinite(width):
+        values = np.concatenate([v[(v >= lo) & (v <= hi)] for v in blocks()])
+        _store_ranks(values, below, ranks, out)
+        return
+    scale = _SELECT_BINS / width
+
+    def binned():
+        # Binning is monotonic in the value, so every bin is a contiguous
+        # value range and its minimum and maximum delimit it exactly.
+        for v in blocks():
+            v = v[(v >= lo) & (v <= hi)]
+            idx = (np.subtract(v, lo, dtype=np.float64) * scale).astype(np.intp)
+            yield v, np.minimum(idx, _SELECT_BINS - 1, out=idx)
+
+    counts = np.zeros(_SELECT_BINS, dtype=np.int64)
+    for _, idx in binned():
+        counts += np.bincount(idx, minlength=_SELECT_BINS)
+    ends = below + np.cumsum(counts)
+    bins = np.searchsorted(ends, ranks, side="right")
+    needed = {int(j): [rank for rank, k in zip(ranks, bins) if k == j] for j in np.unique(bins)}
+    copied = {j: [] for j in needed if counts[j] <= _BLOCK_SIZE}
+    bounds = {j: [np.inf, -np.inf] for j in needed if j not in copied}
+    for v, idx in binned():
+        for j in needed:
+            members = v[idx == j]
+            if not members.size:
+                continue
+            if j in copied:
+                copied[j].append(members)
+            else:
+                bounds[j][0] = min(bounds[j][0], members.min())
+                bounds[j][1] = max(bounds[j][1], members.max())
+    for j, bin_ranks in needed.items():
+        bin_below = int(ends[j] - counts[j])
+        if j in copied:
+            _store_ranks(np.concatenate(copied[j]), bin_below, bin_ranks, out)
+        else:
+            bin_min, bin_max = bounds[j]
+            _select(blocks, bin_min, bin_max, int(counts[j]), bin_below, bin_ranks, out, depth + 1)
+
+
+def _store_ranks(values: np.ndarray, below: int, ranks, out) -> None:
+    """Select ``ranks`` (offset by ``below``) from ``values`` in place."""
+    values.partition([rank - below for rank in ranks])
+    for rank in ranks:
+        out[rank] = float(values[rank - below])
+
+
+def _fused_stats(
+    data: np.ndarray,
+    block_size: int = _BLOCK_SIZE,
+    mask: np.ndarray | None = None,
+) -> tuple:
+    """Mask, count, min/max and mean/variance in one blocked pass.
+
+    Partial moments of each block are merged with Chan's parallel update,
+    so no full-size float64 copy, compacted copy or boolean mask is ever
+    built.  Values stay in their native dtype; only the per-block sums
+    and deviations are taken in float64.  A precomputed ``mask``
+    (e.g. from ``decode_variable``) replaces the per-block masking.
+
+    Returns (count, min, max, mean, m2).
+    """
+    count = 0
+    vmin = np.inf
+    vmax = -np.inf
+    mean = 0.0
+    m2 = 0.0
+    for vals in _valid_blocks(data, mask, block_size):
+        n = vals.size
+        if n == 0:
+            continue
+        block_mean = float(vals.mean(dtype=np.float64))
+        dev = np.subtract(vals, block_mean, dtype=np.float64)
+        block_m2 = float(np.dot(dev, dev))
+        vmin = min(vmin, float(vals.min()))
+        vmax = max(vmax, float(vals.max()))
+        total = count + n
+        delta = block_mean - mean
+        mean += delta * n / total
+        m2 += block_m2 + delta * delta * count * n / total
+        count = total
+    return count, vmin, vmax, mean, m2
+
+
+def compute_variable_stats(
+    var: xr.DataArray,
+    decoded: DecodedVariable | None = None,
+    quantiles=DEFAULT_QUANTILES,
+    sketch_k: int | None = None,
+) -> dict:
     """Compute summary statistics for a single variable.
 
-    Returns a dict with keys: min, max, mean, median, std,
-    nan_count, valid_count, shape, dtype.
+    Returns a dict with keys: min, max, mean, median, std, quantiles,
+    nan_count, valid_count, shape, dtype.  ``quantiles`` maps each
+    requested quantile (a fraction) to its value; it and the median come
+    from one selection pass.
+
+    If ``decoded`` is given (e.g. from a per-run cache) its masked values
+    are used instead of reading ``var`` again.  With ``sketch_k`` the
+    valid values are also summarised in a ``QuantileSketch`` of that size,
+    returned under ``sketch`` for merging across files; the reported
+    quantiles stay exact (``quantile_rank_error`` is 0).
     """
-    data = var.values
-    shape = data.shape
-    dtype = str(data.dtype)
+    shape = var.shape
+    dtype = str(var.dtype)
 
-    if not np.issubdtype(data.dtype, np.number):
+    if not np.issubdtype(var.dtype, np.number):
         return {
             "min": None,
             "max": None,
             "mean": None,
             "median": None,
             "std": None,
+            "quantiles": None,
+            "quantile_rank_error": None,
             "nan_count": None,
             "valid_count": None,
             "shape": shape,
             "dtype": dtype,
         }
 
-    masked = _mask_fill(data)
-    valid = masked[np.isfinite(masked)]
+    if decoded is not None:
+        data, mask = decoded.values, decoded.valid
+    else:
+        data, mask = var.values, None
+    count, vmin, vmax, mean, m2 = _fused_stats(data, mask=mask)
 
-    if valid.size == 0:
+    if count == 0:
         return {
             "min": None,
             "max": None,
             "mean": None,
             "median": None,
             "std": None,
+            "quantiles": None,
+            "quantile_rank_error": None,
             "nan_count": int(data.size),
             "valid_count": 0,
             "shape": shape,
             "dtype": dtype,
         }
 
-    return {
-        "min": float(np.min(valid)),
-        "max": float(np.max(valid)),
-        "mean": float(np.mean(valid)),
-        "median": float(np.median(valid)),
-        "std": float(np.std(valid)),
-        "nan_count": int(data.size - valid.size),
-        "valid_count": int(valid.size),
+    def blocks():
+        return _valid_blocks(data, mask)
+
+    sketch = None
+    if sketch_k is not None:
+        sketch = QuantileSketch(sketch_k)
+        for vals in blocks():
+            sketch.update(vals)
+    values = _quantiles(blocks, count, vmin, vmax, sorted(set(quantiles) | {0.5}))
+    stats = {
+        "min": vmin,
+        "max": vmax,
+        "mean": mean,
+        "median": values[0.5],
+        "std": float(np.sqrt(m2 / count)),
+        "quantiles": {q: values[q] for q in quantiles},
+        "quantile_rank_error": 0.0,
+        "nan_count": int(data.size - count),
+        "valid_count": int(count),
         "shape": shape,
         "dtype": dtype,
     }
+    if sketch is not None:
+        stats["sketch"] = sketch
+    return stats
 
 
-def compute_variable_diff(var_a: xr.DataArray, var_b: xr.DataArray) -> dict | None:
+def compute_variable_diff(
+    var_a: xr.DataArray,
+    var_b: xr.DataArray,
+    decoded_a: DecodedVariable | None = None,
+    decoded_b: DecodedVariable | None = None,
+) -> dict | None:
     """Compute difference statistics between two variables.
 
     Returns dict with max_abs_diff, mean_abs_diff, rmsd,
     or None if shapes don't match or data is non-numeric.
+    Pre-decoded arrays may be passed to avoid masking the inputs again.
     """
     if var_a.shape != var_b.shape:
         return None
@@ -89,18 +317,35 @@ def compute_variable_diff(var_a: xr.DataArray, var_b: xr.DataArray) -> dict | No
     ):
         return None
 
-    a = _mask_fill(var_a.values)
-    b = _mask_fill(var_b.values)
+    if decoded_a is None:
+        decoded_a = decode_variable(var_a.values)
+    if decoded_b is None:
+        decoded_b = decode_variable(var_b.values)
+    return diff_decoded(decoded_a, decoded_b)
+
+
+def diff_decoded(decoded_a: DecodedVariable, decoded_b: DecodedVariable) -> dict:
+    """Difference statistics of two decoded arrays of the same shape.
+
+    The core of ``compute_variable_diff``, also used on arrays subset to
+    matching records (e.g. time-aligned along-track files).
+    """
+    a = decoded_a.values
+    b = decoded_b.values
 
     # Only compare where both are valid
-    both_valid = np.isfinite(a) & np.isfinite(b)
+    both_valid = decoded_a.valid & decoded_b.valid
     if not np.any(both_valid):
         return {"max_abs_diff": None, "mean_abs_diff": None, "rmsd": None}
 
     av = a[both_valid]
     bv = b[both_valid]
-    diff = np.abs(av - bv)
-    bias = float(np.mean(bv - av))
+    # Inputs stay in their native dtypes; the difference is taken in
+    # float64 so integer variables cannot overflow.
+    signed = np.subtract(bv, av, dtype=np.float64)
+    bias = float(np.mean(signed))
+    sum_sq = float(np.dot(signed, signed))
+    diff = np.abs(signed, out=signed)
 
     if av.size > 1:
         with np.errstate(invalid="ignore"):
@@ -112,7 +357,7 @@ def compute_variable_diff(var_a: xr.DataArray, var_b: xr.DataArray) -> dict | No
     return {
         "max_abs_diff": float(np.max(diff)),
         "mean_abs_diff": float(np.mean(diff)),
-        "rmsd": float(np.sqrt(np.mean(diff**2))),
+        "rmsd": float(np.sqrt(sum_sq / diff.size)),
         "bias": bias,
         "pearson_r": pearson_r,
     }
@@ -0,0 +1,140 @@
+"""Tiled (block-reduced) difference maps of 2D grids."""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class TileMap:
+    """Per-tile difference metrics of a 2D grid.
+
+    Every array has one element per tile, shape (tile rows, tile columns).
+    ``lat`` and ``lon`` hold the coordinate of each tile row's and
+    column's first cell.  Tiles without co-located valid cells have NaN
+    metrics.
+    """
+
+    lat: np.ndarray
+    lon: np.ndarray
+    count: np.ndarray
+    coverage_pct: np.ndarray
+    bias: np.ndarray
+    rmsd: np.ndarray
+    pct_within: np.ndarray
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.count.shape
+
+    def worst(self, n: int = 10, by: str = "rmsd") -> list[dict]:
+        """Return the ``n`` worst tiles by ``by`` (skipping tiles without data).
+
+        Worst means largest for ``rmsd``, largest magnitude for ``bias``
+        and smallest for ``pct_within`` and ``coverage_pct``.
+        """
+        metric = getattr(self, by)
+        if by == "bias":
+            metric = np.abs(metric)
+        elif by in ("pct_within", "coverage_pct"):
+            metric = -metric
+        flat = np.where(np.isnan(metric), -np.inf, metric).reshape(-1)
+        order = np.argsort(-flat, kind="stable")[:n]
+        tiles = []
+        for index in order:
+            if not np.isfinite(flat[index]):
+                break
+            i, j = np.unravel_index(index, self.shape)
+            tiles.append(
+                {
+                    "lat": float(self.lat[i]),
+                    "lon": float(self.lon[j]),
+                    "count": int(self.count[i, j]),
+                    "coverage_pct": round(float(self.coverage_pct[i, j]), 2),
+                    "bias": float(self.bias[i, j]),
+                    "rmsd": float(self.rmsd[i, j]),
+                    "pct_within": round(float(self.pct_within[i, j]), 2),
+                }
+            )
+        return tiles
+
+
+def _tile_sum(x: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Sum ``x`` over rows x cols tiles, zero-padding a partial last tile."""
+    pad_rows = -x.shape[0] % rows
+    pad_cols = -x.shape[1] % cols
+    if pad_rows or pad_cols:
+        x = np.pad(x, ((0, pad_rows), (0, pad_cols)))
+    n_rows, n_cols = x.shape[0] // rows, x.shape[1] // cols
+    return x.reshape(n_rows, rows, n_cols, cols).sum(axis=(1, 3))
+
+
+def tile_sums(
+    a: np.ndarray,
+    b: np.ndarray,
+    both_valid: np.ndarray,
+    rows: int,
+    cols: int,
+    threshold: float,
+) -> np.ndarray:
+    """Per-tile sums of ``b - a``, stacked as (5, tile rows, tile columns).
+
+    The layers are the co-located valid count, the cell count, the sum
+    and sum of squares of the difference and the count within
+    ``threshold``.  Sums of row bands that are whole multiples of
+    ``rows`` concatenate along the tile rows.
+    """
+    diff = np.zeros(a.shape, dtype=np.float64)
+    np.subtract(b, a, out=diff, where=both_valid)
+    return np.stack(
+        [
+            _tile_sum(both_valid.astype(np.int64), rows, cols),
+            _tile_sum(np.ones(a.shape, dtype=np.int64), rows, cols),
+            _tile_sum(diff, rows, cols),
+            _tile_sum(diff * diff, rows, cols),
+            _tile_sum(both_valid & (np.abs(diff) <= threshold), rows, cols),
+        ]
+    ).astype(np.float64)
+
+
+def tile_map_from_sums(
+    sums: np.ndarray, rows: int, cols: int, lat: np.ndarray, lon: np.ndarray
+) -> TileMap:
+    """Build a ``TileMap`` from ``tile_sums`` and the grid's cell coordinates."""
+    count, cells, total, sum_sq, within = sums
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return TileMap(
+            lat=np.asarray(lat)[::rows],
+            lon=np.asarray(lon)[::cols],
+            count=count.astype(np.int64),
+            coverage_pct=count / cells * 100,
+            bias=total / count,
+            rmsd=np.sqrt(sum_sq / count),
+            pct_within=within / count * 100,
+        )
+
+
+def tile_diff_map(
+    a: np.ndarray,
+    b: np.ndarray,
+    both_valid: np.ndarray,
+    rows: int,
+    cols: int,
+    threshold: float,
+    lat: np.ndarray | None = None,
+    lon: np.ndarray | None = None,
+) -> TileMap:
+    """Bias, RMSD, coverage and agreement of ``b - a`` per rows x cols tile.
+
+    The difference, its square and the validity and agreement masks are
+    each reduced with a reshape to (tiles, rows, tiles, cols) and one sum,
+    so every tile is computed in the same vectorized pass.  Grids whose
+    size is not a multiple of the tile are padded; padded cells are
+    neither valid nor counted towards coverage.
+    """
+    if lat is None:
+        lat = np.arange(a.shape[0], dtype=np.float64)
+    if lon is None:
+        lon = np.arange(a.shape[1], dtype=np.float64)
+    sums = tile_sums(a, b, both_valid, rows, cols, threshold)
+    return tile_map_from_sums(sums, rows, cols, lat, lon)
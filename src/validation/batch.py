@@ -0,0 +1,386 @@
+"""Batch comparison of many file pairs on a process pool."""
+
+import multiprocessing
+import os
+import re
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from validation.analysis.sketch import QuantileSketch
+from validation.analysis.statistics import DEFAULT_QUANTILES
+from validation.comparators import COMPARATORS
+from validation.comparators.base import ComparisonReport, Reference, load_reference
+
+NETCDF_SUFFIXES = (".nc", ".nc4", ".netcdf")
+
+
+@dataclass
+class FilePair:
+    """A pair of files to compare, with the key they were matched on."""
+
+    key: str
+    file_a: str
+    file_b: str
+
+
+@dataclass
+class PairResult:
+    """Outcome of comparing one file pair.
+
+    ``max_abs_diffs`` maps each variable with a nonzero difference to its
+    ``max_abs_diff``; ``error`` is set instead when the comparison raised.
+    """
+
+    key: str
+    file_a: str
+    file_b: str
+    has_differences: bool | None = None
+    dimension_diffs: int = 0
+    global_attr_diffs: int = 0
+    # Variable attribute, layout and inventory differences.
+    layout_diffs: int = 0
+    max_abs_diffs: dict[str, float] = field(default_factory=dict)
+    # Per variable, the quantile sketches of each side ("a", "b"); only
+    # filled when the comparison kept sketches (approximate quantiles).
+    sketches: dict[str, dict[str, QuantileSketch]] = field(default_factory=dict)
+    error: str | None = None
+
+
+@dataclass
+class BatchSummary:
+    """Roll-up over all pair results of a batch."""
+
+    total: int = 0
+    matched: int = 0
+    different: int = 0
+    failed: int = 0
+    unpaired_a: list[str] = field(default_factory=list)
+    unpaired_b: list[str] = field(default_factory=list)
+    # Per variable: number of differing pairs and the worst max_abs_diff.
+    variable_diff_counts: dict[str, int] = field(default_factory=dict)
+    variable_worst_diff: dict[str, float] = field(default_factory=dict)
+    # Per variable and side, a sketch merged over every distinct file, and
+    # the quantiles read from it.
+    quantile_sketches: dict[str, dict[str, QuantileSketch]] = field(default_factory=dict)
+    quantiles: tuple[float, ...] = DEFAULT_QUANTILES
+    sketched_files: dict[str, set[str]] = field(
+        default_factory=lambda: {"a": set(), "b": set()}
+    )
+
+    def add(self, result: PairResult) -> None:
+        self.total += 1
+        if result.error is not None:
+            self.failed += 1
+            return
+        self._merge_sketches(result)
+        if result.has_differences:
+            self.different += 1
+        else:
+            self.matched += 1
+        for name, value in result.max_abs_diffs.items():
+            self.variable_diff_counts[name] = self.variable_diff_counts.get(name, 0) + 1
+            worst = self.variable_worst_diff.get(name)
+            if worst is None or value > worst:
+                self.variable_worst_diff[name] = value
+
+    def _merge_sketches(self, result: PairResult) -> None:
+        """Merge the pair's sketches, counting each file only once.
+
+        A file shared by several pairs (e.g. the reference of a
+        multi-candidate run) contributes its values a single time.
+        """
+        for side, path in (("a", result.file_a), ("b", result.file_b)):
+            if path in self.sketched_files[side]:
+                continue
+            merged_any = False
+            for name, sides in result.sketches.items():
+                sketch = sides.get(side)
+                if sketch is None:
+                    continue
+                merged = self.quantile_sketches.setdefault(name, {})
+                if side not in merged:
+                    merged[side] = QuantileSketch(sketch.k)
+                merged[side].merge(sketch)
+                merged_any = True
+            if merged_any:
+                self.sketched_files[side].add(path)
+
+    @property
+    def has_differences(self) -> bool:
+        return bool(
+            self.different or self.failed or self.unpaired_a or self.unpaired_b
+        )
+
+
+def _pair_key(name: str, pattern: re.Pattern | None) -> str | None:
+    if pattern is None:
+        return name
+    match = pattern.search(name)
+    if match is None:
+        return None
+    return match.group(1) if match.groups() else match.group(0)
+
+
+def _list_files(directory: str) -> list[str]:
+    return sorted(
+        entry
+        for entry in os.listdir(directory)
+        if entry.endswith(NETCDF_SUFFIXES)
+        and os.path.isfile(os.path.join(directory, entry))
+    )
+
+
+def _key_files(directory: str, regex: re.Pattern | None) -> dict[str, str]:
+    """Map each pairing key to its file in ``directory``."""
+    keyed = {}
+    collisions = {}
+    for name in _list_files(directory):
+        key = _pair_key(name, regex)
+        if key is None:
+            continue
+        path = os.path.join(directory, name)
+        if key in keyed:
+            collisions.setdefault(key, [keyed[key]]).append(path)
+        keyed[key] = path
+    if collisions:
+        details = "; ".join(
+            f"{key!r}: {', '.join(paths)}" for key, paths in sorted(collisions.items())
+        )
+        raise ValueError(f"several files in {directory} share a pairing key: {details}")
+    return keyed
+
+
+def pair_directories(
+    dir_a: str, dir_b: str, pattern: str | None = None
+) -> tuple[list[FilePair], list[str], list[str]]:
+    """Pair NetCDF files in two directories.
+
+    Files are matched on their name, or on the first capture group (or
+    whole match) of ``pattern`` when given, e.g. ``r"(\\d{8})"`` to pair
+    daily files on their date.
+
+    Returns (pairs, unpaired_a, unpaired_b), each sorted by key/name.
+    Raises ValueError when several files of one directory share a key,
+    rather than silently comparing only one of them.
+    """
+    regex = re.compile(pattern) if pattern else None
+    keyed_a = _key_files(dir_a, regex)
+    keyed_b = _key_files(dir_b, regex)
+
+    pairs = [
+        FilePair(key=key, file_a=keyed_a[key], file_b=keyed_b[key])
+        for key in sorted(set(keyed_a) & set(keyed_b))
+    ]
+    unpaired_a = [keyed_a[key] for key in sorted(set(keyed_a) - set(keyed_b))]
+    unpaired_b = [keyed_b[key] for key in sorted(set(keyed_b) - set(keyed_a))]
+    return pairs, unpaired_a, unpaired_b
+
+
+def read_manifest(path: str) -> list[FilePair]:
+    """Read file pairs from a manifest.
+
+    Each non-blank line holds two paths separated by whitespace or a
+    comma; lines starting with ``#`` are ignored.
+    """
+    pairs = []
+    with open(path) as fh:
+        for lineno, line in enumerate(fh, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = [f for f in re.split(r"[,\s]+", line) if f]
+            if len(fields) != 2:
+                raise ValueError(f"{path}:{lineno}: expected two paths, got {line!r}")
+            file_a, file_b = fields
+            pairs.append(FilePair(key=os.path.basename(file_a), file_a=file_a, file_b=file_b))
+    return pairs
+
+
+def compare_pair(
+    pair: FilePair,
+    product_type: str,
+    ignore_attrs: list[str] | None = None,
+    comparator_kwargs: dict | None = None,
+    metadata_only: bool = False,
+) -> PairResult:
+    """Compare one pair and condense the report into a ``PairResult``.
+
+    Errors are captured on the result so one bad file does not abort a
+    batch.  With ``metadata_only`` only the file headers are compared.
+    """
+    try:
+        comparator = COMPARATORS[product_type](
+            pair.file_a, pair.file_b, **(comparator_kwargs or {})
+        )
+        if metadata_only:
+            report = comparator.run_metadata(ignore_attrs=ignore_attrs)
+        else:
+            report = comparator.run(ignore_attrs=ignore_attrs)
+    except Exception as exc:  # noqa: BLE001 - reported per pair
+        return PairResult(
+            key=pair.key,
+            file_a=pair.file_a,
+            file_b=pair.file_b,
+            error=f"{type(exc).__name__}: {exc}",
+        )
+    return condense_report(pair.key, report)
+
+
+def condense_report(key: str, report: ComparisonReport) -> PairResult:
+    """Reduce a full report to the fields kept for batch roll-ups."""
+    result = PairResult(key=key, file_a=report.file_a, file_b=report.file_b)
+    result.has_differences = report.has_differences
+    result.layout_diffs = sum(
+        len(vc.layout_diffs) + len(vc.attr_diffs) + (not vc.present_a or not vc.present_b)
+        for vc in report.variable_comparisons
+    )
+    result.dimension_diffs = len(report.dimension_diffs)
+    result.global_attr_diffs = len(report.global_attr_diffs)
+    for vc in report.variable_comparisons:
+        value = vc.diff.get("max_abs_diff") if vc.diff else None
+        if value not in (None, 0.0):
+            result.max_abs_diffs[vc.name] = value
+        for side, stats in (("a", vc.stats_a), ("b", vc.stats_b)):
+            if stats and "sketch" in stats:
+                result.sketches.setdefault(vc.name, {})[side] = stats["sketch"]
+    return result
+
+
+def run_batch(
+    pairs: list[FilePair],
+    product_type: str,
+    jobs: int = 1,
+    ordered: bool = True,
+    ignore_attrs: list[str] | None = None,
+    comparator_kwargs: dict | None = None,
+    metadata_only: bool = False,
+) -> Iterator[PairResult]:
+    """Compare every pair and yield results as they become available.
+
+    With ``jobs > 1`` pairs run on a process pool, so each worker pays the
+    interpreter and import start-up cost once.  ``ordered`` yields results
+    in input order; otherwise they are yielded as they complete.
+    """
+    args = (product_type, ignore_attrs, comparator_kwargs, metadata_only)
+    if jobs <= 1:
+        for pair in pairs:
+            yield compare_pair(pair, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(compare_pair, pair, *args) for pair in pairs]
+        if ordered:
+            for future in futures:
+                yield future.result()
+        else:
+            for future in as_completed(futures):
+                yield future.result()
+
+
+# Reference shared with forked worker processes; set only while a
+# process pool created by ``run_reference`` is alive.
+_SHARED_REFERENCE: Reference | None = None
+
+
+def _compare_to_reference(
+    candidate: str,
+    product_type: str,
+    ignore_attrs: list[str] | None,
+    comparator_kwargs: dict | None,
+    reference: Reference | None = None,
+) -> ComparisonReport | PairResult:
+    """Compare one candidate, returning an error ``PairResult`` if it raised."""
+    reference = reference if reference is not None else _SHARED_REFERENCE
+    try:
+        comparator = COMPARATORS[product_type](
+            reference.path, candidate, reference=reference, **(comparator_kwargs or {})
+        )
+        return comparator.run(ignore_attrs=ignore_attrs)
+    except Exception as exc:  # noqa: BLE001 - reported per candidate
+        return PairResult(
+            key=candidate,
+            file_a=reference.path,
+            file_b=candidate,
+            error=f"{type(exc).__name__}: {exc}",
+        )
+
+
+def run_reference(
+    reference_path: str,
+    candidates: list[str],
+    product_type: str,
+    jobs: int = 1,
+    processes: bool = False,
+    ignore_attrs: list[str] | None = None,
+    comparator_kwargs: dict | None = None,
+) -> Iterator[ComparisonReport | PairResult]:
+    """Compare several candidates against one reference file.
+
+    The reference is opened, masked and summarised once by
+    ``load_reference`` and shared read-only with every candidate
+    comparison.  ``jobs > 1`` runs candidates on a thread pool, or with
+    ``processes`` on a fork-based process pool whose workers inherit the
+    reference through copy-on-write shared memory rather than pickling
+    it.  Reports are yielded in candidate order; a candidate whose
+    comparison raised yields a ``PairResult`` carrying the error instead,
+    so one bad file does not abort the run.
+    """
+    global _SHARED_REFERENCE
+
+    # Only the variables the comparisons will select are loaded.
+    selector = COMPARATORS[product_type](
+        reference_path, reference_path, **(comparator_kwargs or {})
+    )
+    reference = load_reference(
+        reference_path,
+        select=selector.select_variables,
+        quantiles=selector.quantiles,
+        sketch_k=selector.sketch_k,
+        approx_quantiles=selector.approx_quantiles,
+        block_size=selector.block_size,
+    )
+    if jobs <= 1:
+        for candidate in candidates:
+            yield _compare_to_reference(
+                candidate, product_type, ignore_attrs, comparator_kwargs, reference
+            )
+        return
+
+    if processes:
+        _SHARED_REFERENCE = reference
+        try:
+            pool = ProcessPoolExecutor(
+                max_workers=jobs, mp_context=multiprocessing.get_context("fork")
+            )
+            with pool:
+                futures = [
+                    pool.submit(
+                        _compare_to_reference,
+                        candidate,
+                        product_type,
+                        ignore_attrs,
+                        comparator_kwargs,
+                    )
+                    for candidate in candidates
+                ]
+                for future in futures:
+                    yield future.result()
+        finally:
+            _SHARED_REFERENCE = None
+        return
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(
+                _compare_to_reference,
+                candidate,
+                product_type,
+                ignore_attrs,
+                comparator_kwargs,
+                reference,
+            )
+            for candidate in candidates
+        ]
+        for future in futures:
+            yield future.result()
@@ -3,23 +3,74 @@
 import argparse
 import sys
 
-from validation.comparators.along_track import AlongTrackComparator
-from validation.comparators.simple_grid import SimpleGridComparator
-from validation.report import format_report
+from validation.batch import (
+    BatchSummary,
+    PairResult,
+    condense_report,
+    pair_directories,
+    read_manifest,
+    run_batch,
+    run_reference,
+)
+from validation.analysis.sketch import DEFAULT_SKETCH_K
+from validation.analysis.statistics import resolve_quantiles
+from validation.comparators import COMPARATORS
+from validation.report import (
+    format_batch_summary,
+    format_first_difference,
+    format_pair_result,
+    format_report,
+)
+from validation.stats_cache import StatsCache
 
-COMPARATORS = {
-    "along_track": AlongTrackComparator,
-    "simple_grid": SimpleGridComparator,
-}
 
+def _quantile(value: str) -> float:
+    q = float(value)
+    if not 0.0 <= q <= 1.0:
+        raise argparse.ArgumentTypeError(f"quantile must be between 0 and 1: {value}")
+    return q
 
-def build_parser() -> argparse.ArgumentParser:
-    parser = argparse.ArgumentParser(
-        prog="validate-altimetry",
-        description="Compare two altimetry NetCDF product files.",
-    )
-    parser.add_argument("file_a", help="Path to first NetCDF file")
-    parser.add_argument("file_b", help="Path to second NetCDF file")
+
+def _thresholds(value: str) -> list[float]:
+    """Parse a threshold or a START:STOP:STEP range (STOP included)."""
+    parts = value.split(":")
+    try:
+        numbers = [float(part) for part in parts]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid threshold or range: {value}") from None
+    if len(numbers) == 1:
+        values = numbers
+    elif len(numbers) == 3 and numbers[2] > 0 and numbers[1] >= numbers[0]:
+        start, stop, step = numbers
+        count = int(round((stop - start) / step)) + 1
+        values = [round(start + i * step, 12) for i in range(count)]
+    else:
+        raise argparse.ArgumentTypeError(f"expected T or START:STOP:STEP: {value}")
+    if any(t < 0 for t in values):
+        raise argparse.ArgumentTypeError(f"thresholds must be non-negative: {value}")
+    return values
+
+
+def _flatten(groups: list[list[float]] | None) -> list[float] | None:
+    return [t for group in groups for t in group] if groups else None
+
+
+def _positive_int(value: str) -> int:
+    n = int(value)
+    if n <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value}")
+    return n
+
+
+def _positive_float(value: str) -> float:
+    x = float(value)
+    if not x > 0:
+        raise argparse.ArgumentTypeError(f"must be positive: {value}")
+    return x
+
+
+def _add_comparison_options(parser: argparse.ArgumentParser) -> None:
+    """Options shared by single-pair and batch comparisons."""
     parser.add_argument(
         "-t",
         "--product-type",
@@ -40,18 +91,355 @@ def build_parser() -> argparse.ArgumentParser:
         metavar="METERS",
         help="Absolute difference threshold in metres for the pct_within_threshold metric (default: 0.05)",
     )
+    parser.add_argument(
+        "--thresholds",
+        nargs="+",
+        type=_thresholds,
+        default=None,
+        metavar="T",
+        help="Extra agreement thresholds in metres, or START:STOP:STEP ranges; "
+        "all are read off one pass over |B - A|",
+    )
+    parser.add_argument(
+        "--quantiles",
+        type=_quantile,
+        nargs="+",
+        default=None,
+        metavar="Q",
+        help="Extra quantiles (fractions, e.g. 0.01 0.99) to report on top of p5/p25/p50/p75/p95",
+    )
+    parser.add_argument(
+        "--approx-quantiles",
+        action="store_true",
+        help="Keep mergeable quantile sketches in every variable's stats and roll them up across batch files",
+    )
+    parser.add_argument(
+        "--sketch-k",
+        type=int,
+        default=DEFAULT_SKETCH_K,
+        metavar="K",
+        help=f"Quantile sketch size; larger sizes lower the reported rank error bound (default: {DEFAULT_SKETCH_K})",
+    )
+    parser.add_argument(
+        "--block-size",
+        type=_positive_int,
+        default=None,
+        metavar="ROWS",
+        help="Compute stats and diffs out-of-core in blocks of ROWS along the leading dimension",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Compare variables on a pool of N threads (default: 1)",
+    )
+    parser.add_argument(
+        "--read-ahead",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Read and decode file A and B arrays for the next N variables on an I/O pool; reads stay serialised, only decoding overlaps (default: 0, off)",
+    )
+    parser.add_argument(
+        "--no-raw-compare",
+        action="store_true",
+        help="Always decode and diff variables, even when their stored bytes are identical",
+    )
+    parser.add_argument(
+        "--packed",
+        action="store_true",
+        help="Compare integer variables with identical scale_factor/add_offset as stored integers (exact diffs)",
+    )
+    parser.add_argument(
+        "--variables",
+        nargs="+",
+        default=None,
+        metavar="PATTERN",
+        help="Compare only variables matching these glob patterns (e.g. 'ssha*')",
+    )
+    parser.add_argument(
+        "--exclude-variables",
+        nargs="+",
+        default=None,
+        metavar="PATTERN",
+        help="Skip variables matching these glob patterns (e.g. basin_flag '*_flag')",
+    )
+    parser.add_argument(
+        "--expected-only",
+        action="store_true",
+        help="Compare only the variables expected for the product type",
+    )
+    parser.add_argument(
+        "--align-time",
+        action="store_true",
+        help="along_track only: match records on the time coordinate and diff matched records",
+    )
+    parser.add_argument(
+        "--time-tolerance",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="Largest time difference for records to match with --align-time (default: 0, exact)",
+    )
+    parser.add_argument(
+        "--tile-size",
+        type=_positive_float,
+        default=None,
+        metavar="DEG",
+        help="simple_grid only: also map the SSHA diff on DEG x DEG degree tiles and rank the worst",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        metavar="DIR",
+        help="Directory of the persistent stats cache used with --cache (default: $XDG_CACHE_HOME/altimetry-validation)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=512,
+        metavar="MB",
+        help="Maximum size of the persistent stats cache in MiB (default: 512)",
+    )
+    parser.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Reuse per-file stats across runs from a persistent SQLite cache in --cache-dir, ~/.cache/altimetry-validation unless $XDG_CACHE_HOME is set (default: off)",
+    )
+
+
+def _add_metadata_option(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--metadata-only",
+        action="store_true",
+        help="Compare only headers (dimensions, attributes, dtypes, chunking, compression); read no data",
+    )
+
+
+def _comparator_kwargs(args: argparse.Namespace, parser: argparse.ArgumentParser) -> dict:
+    stats_cache = None
+    if args.cache:
+        stats_cache = StatsCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024)
+    kwargs = {
+        "threshold": args.threshold,
+        "block_size": args.block_size,
+        "workers": args.workers,
+        "read_ahead": args.read_ahead,
+        "stats_cache": stats_cache,
+        "raw_compare": not args.no_raw_compare,
+        "variables": args.variables,
+        "exclude_variables": args.exclude_variables,
+        "expected_only": args.expected_only,
+        "packed_compare": args.packed,
+        "quantiles": args.quantiles,
+        "approx_quantiles": args.approx_quantiles,
+        "sketch_k": args.sketch_k,
+        "thresholds": _flatten(args.thresholds),
+    }
+    if args.align_time:
+        if args.product_type != "along_track":
+            parser.error("--align-time only applies to along_track products")
+        kwargs["align_time"] = True
+        kwargs["time_tolerance"] = args.time_tolerance
+    if args.tile_size is not None:
+        if args.product_type != "simple_grid":
+            parser.error("--tile-size only applies to simple_grid products")
+        kwargs["tile_size"] = args.tile_size
+    return kwargs
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="validate-altimetry",
+        description="Compare two altimetry NetCDF product files.",
+        epilog=(
+            "Use 'validate-altimetry batch --help' to compare many file pairs, or "
+            "'validate-altimetry multi --help' to compare candidates against one reference."
+        ),
+    )
+    parser.add_argument("file_a", help="Path to first NetCDF file")
+    parser.add_argument("file_b", help="Path to second NetCDF file")
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop at the first difference and skip the full report (for CI gating)",
+    )
+    parser.add_argument(
+        "--diff-output",
+        default=None,
+        metavar="PATH",
+        help="Also write the B - A difference fields of the compared variables to a NetCDF file",
+    )
+    parser.add_argument(
+        "--diff-mask",
+        action="store_true",
+        help="With --diff-output, also write a <name>_both_valid mask per variable",
+    )
+    _add_metadata_option(parser)
+    _add_comparison_options(parser)
+    return parser
+
+
+def build_batch_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="validate-altimetry batch",
+        description="Compare many pairs of altimetry NetCDF product files.",
+    )
+    parser.add_argument("dir_a", nargs="?", help="Directory of A files")
+    parser.add_argument("dir_b", nargs="?", help="Directory of B files")
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        metavar="FILE",
+        help="File listing one 'file_a file_b' pair per line (instead of directories)",
+    )
+    parser.add_argument(
+        "--pattern",
+        default=None,
+        metavar="REGEX",
+        help=r"Pair files on the first group of REGEX, e.g. '(\d{8})' for dates (default: same file name)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Compare N pairs at a time on a process pool (default: 1)",
+    )
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="Print pair results as they complete instead of in pair order",
+    )
+    _add_metadata_option(parser)
+    _add_comparison_options(parser)
+    return parser
+
+
+def build_multi_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="validate-altimetry multi",
+        description="Compare several candidate files against one reference file.",
+    )
+    parser.add_argument("reference", help="Path to the reference NetCDF file (file A)")
+    parser.add_argument(
+        "candidates", nargs="+", help="Paths to candidate NetCDF files (file B)"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Compare N candidates at a time (default: 1)",
+    )
+    parser.add_argument(
+        "--processes",
+        action="store_true",
+        help="Use forked worker processes sharing the loaded reference instead of threads",
+    )
+    _add_comparison_options(parser)
     return parser
 
 
+def multi_main(argv: list[str]) -> int:
+    parser = build_multi_parser()
+    args = parser.parse_args(argv)
+
+    summary = BatchSummary(quantiles=resolve_quantiles(args.quantiles))
+    reports = run_reference(
+        args.reference,
+        args.candidates,
+        args.product_type,
+        jobs=args.jobs,
+        processes=args.processes,
+        ignore_attrs=args.ignore_attrs,
+        comparator_kwargs=_comparator_kwargs(args, parser),
+    )
+    for report in reports:
+        if isinstance(report, PairResult):
+            summary.add(report)
+            print(format_pair_result(report))
+        else:
+            print(format_report(report))
+            summary.add(condense_report(report.file_b, report))
+        print()
+    print(format_batch_summary(summary))
+
+    return 1 if summary.has_differences else 0
+
+
+def batch_main(argv: list[str]) -> int:
+    parser = build_batch_parser()
+    args = parser.parse_args(argv)
+
+    summary = BatchSummary(quantiles=resolve_quantiles(args.quantiles))
+    try:
+        if args.manifest:
+            if args.dir_a or args.dir_b:
+                parser.error("give either two directories or --manifest, not both")
+            pairs = read_manifest(args.manifest)
+        elif args.dir_a and args.dir_b:
+            pairs, summary.unpaired_a, summary.unpaired_b = pair_directories(
+                args.dir_a, args.dir_b, pattern=args.pattern
+            )
+        else:
+            parser.error("two directories or --manifest are required")
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    results = run_batch(
+        pairs,
+        args.product_type,
+        jobs=args.jobs,
+        ordered=not args.unordered,
+        ignore_attrs=args.ignore_attrs,
+        comparator_kwargs=_comparator_kwargs(args, parser),
+        metadata_only=args.metadata_only,
+    )
+    for result in results:
+        summary.add(result)
+        print(format_pair_result(result), flush=True)
+    print(format_batch_summary(summary))
+
+    return 1 if summary.has_differences else 0
+
+
 def main(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "batch":
+        return batch_main(argv[1:])
+    if argv and argv[0] == "multi":
+        return multi_main(argv[1:])
+
     parser = build_parser()
     args = parser.parse_args(argv)
 
+    if args.diff_output and (args.fail_fast or args.metadata_only):
+        parser.error("--diff-output cannot be combined with --fail-fast or --metadata-only")
+    if args.diff_mask and not args.diff_output:
+        parser.error("--diff-mask requires --diff-output")
+
     comparator_cls = COMPARATORS[args.product_type]
-    comparator = comparator_cls(args.file_a, args.file_b, threshold=args.threshold)
+    comparator = comparator_cls(args.file_a, args.file_b, **_comparator_kwargs(args, parser))
+
+    if args.fail_fast:
+        difference = comparator.find_first_difference(ignore_attrs=args.ignore_attrs)
+        print(format_first_difference(args.file_a, args.file_b, difference))
+        return 1 if difference is not None else 0
 
-    report = comparator.run(ignore_attrs=args.ignore_attrs)
+    if args.metadata_only:
+        report = comparator.run_metadata(ignore_attrs=args.ignore_attrs)
+    else:
+        report = comparator.run(ignore_attrs=args.ignore_attrs)
     print(format_report(report))
+    if args.diff_output:
+        written = comparator.write_diff(args.diff_output, mask=args.diff_mask)
+        print(f"Wrote {len(written)} difference fields to {args.diff_output}")
 
     return 1 if report.has_differences else 0
 
@@ -0,0 +1,7 @@
+from validation.comparators.along_track import AlongTrackComparator
+from validation.comparators.simple_grid import SimpleGridComparator
+
+COMPARATORS = {
+    "along_track": AlongTrackComparator,
+    "simple_grid": SimpleGridComparator,
+}
@@ -1,14 +1,30 @@
 """Along-track (Level 2, 1D time-indexed) comparator."""
 
+import threading
+
 import numpy as np
 import xarray as xr
 
-from validation.analysis.statistics import _mask_fill
+from validation.analysis.alignment import TimeAlignment, align_times
+from validation.analysis.flags import (
+    flag_distribution,
+    flag_transitions,
+    merge_distributions,
+    merge_transitions,
+)
+from validation.analysis.groups import GroupedDiff
+from validation.analysis.statistics import valid_mask
 from validation.comparators.base import BaseComparator
 
 
 class AlongTrackComparator(BaseComparator):
-    """Comparator for along-track daily files."""
+    """Comparator for along-track daily files.
+
+    With ``align_time``, records are matched on the ``time`` coordinate
+    (within ``time_tolerance`` seconds) and time-indexed variables are
+    diffed on matched records, so files that differ by a few records can
+    still be compared.
+    """
 
     EXPECTED_DIMS = ["time", "src_flag_dim", "basins"]
 
@@ -27,6 +43,26 @@ class AlongTrackComparator(BaseComparator):
 
     QUALITY_VARS = ["nasa_flag", "source_flag", "median_filter_flag"]
 
+    # SSHA differences are also grouped by each of these record keys.
+    GROUP_VARS = ["pass", "cycle"]
+
+    # Kept decoded until compare_quality; basin_flag is dropped once
+    # basin_summary has used it.
+    RETAINED_VARS = QUALITY_VARS + ["ssha", "basin_flag"] + GROUP_VARS
+
+    def __init__(
+        self,
+        *args,
+        align_time: bool = False,
+        time_tolerance: float = 0.0,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.align_time = align_time
+        self.time_tolerance = time_tolerance
+        self._alignment: TimeAlignment | None = None
+        self._alignment_lock = threading.Lock()
+
     @property
     def product_type(self) -> str:
         return "along_track"
@@ -37,43 +73,156 @@ class AlongTrackComparator(BaseComparator):
     def get_quality_variables(self) -> list[str]:
         return list(self.QUALITY_VARS)
 
+    def time_alignment(self, ds_a: xr.Dataset, ds_b: xr.Dataset) -> TimeAlignment | None:
+        """Return the record matching on ``time``, computed once per comparator."""
+        if not self.align_time or "time" not in ds_a.coords or "time" not in ds_b.coords:
+            return None
+        with self._alignment_lock:
+            if self._alignment is None:
+                self._alignment = align_times(
+                    ds_a["time"].values, ds_b["time"].values, self.time_tolerance
+                )
+        return self._alignment
+
+    def aligned_records(
+        self, var_name: str, ds_a: xr.Dataset, ds_b: xr.Dataset
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        if ds_a[var_name].dims[:1] != ("time",) or ds_b[var_name].dims[:1] != ("time",):
+            return None
+        alignment = self.time_alignment(ds_a, ds_b)
+        if alignment is None or alignment.identity:
+            return None
+        return alignment.index_a, alignment.index_b
+
     def compare_quality(self, ds_a: xr.Dataset, ds_b: xr.Dataset) -> dict:
-        """Compare flag value distributions between two along-track files."""
+        """Compare flag value distributions between two along-track files.
+
+        Each flag gets per-value (and, for 2D flags, per-column) histograms
+        for both files plus an A-vs-B transition matrix.  SSHA differences
+        are summarised per pass and per cycle (keys taken from file A) and
+        per basin, and their agreement within the threshold(s) is reported.
+        """
         summary = {}
         for flag_var in self.QUALITY_VARS:
             entry = {}
             for label, ds in [("a", ds_a), ("b", ds_b)]:
-                if flag_var not in ds.data_vars:
-                    entry[label] = None
-                    continue
-                data = ds[flag_var].values
-                fill = np.iinfo(np.int8).max if data.dtype == np.int8 else None
-                if fill is not None:
-                    valid = data[data != fill]
-                else:
-                    valid = data
-                good = int(np.sum(valid == 0))
-                bad = int(np.sum(valid != 0))
-                entry[label] = {"good": good, "bad": bad, "total": int(valid.size)}
+                entry[label] = None
+                if flag_var in ds.data_vars:
+                    entry[label] = self._flag_distribution(label, ds, flag_var)
+            if flag_var in ds_a.data_vars and flag_var in ds_b.data_vars:
+                entry["transitions"] = self._flag_transitions(flag_var, ds_a, ds_b)
             summary[flag_var] = entry
 
-        # SSHA percentile distributions
+        alignment = self.time_alignment(ds_a, ds_b)
+        if alignment is not None:
+            summary["time_alignment"] = alignment.summary()
+
+        grouped = self._grouped_ssha_diffs(ds_a, ds_b)
+        for key in self.GROUP_VARS:
+            summary[f"ssha_by_{key}"] = grouped.get(key)
+        summary["ssha_agreement"] = self.agreement(ds_a, ds_b)
+        summary["ssha_basins"] = self.basin_summary(ds_a, ds_b)
+
+        # SSHA percentiles, shared with the per-variable stats (sketch
+        # estimates with their rank error in block-wise runs)
         for label, ds in [("a", ds_a), ("b", ds_b)]:
+            entry = None
             if "ssha" in ds.data_vars:
-                masked = _mask_fill(ds["ssha"].values)
-                valid = masked[np.isfinite(masked)]
-                if valid.size > 0:
-                    p = np.percentile(valid, [5, 25, 50, 75, 95])
-                    summary.setdefault("ssha_percentiles", {})[label] = {
-                        "p5": round(float(p[0]), 6),
-                        "p25": round(float(p[1]), 6),
-                        "p50": round(float(p[2]), 6),
-                        "p75": round(float(p[3]), 6),
-                        "p95": round(float(p[4]), 6),
+                stats = self.variable_stats(label, ds, "ssha")
+                if stats["quantiles"]:
+                    entry = {
+                        f"p{q * 100:g}": round(value, 6)
+                        for q, value in stats["quantiles"].items()
                     }
-                else:
-                    summary.setdefault("ssha_percentiles", {})[label] = None
-            else:
-                summary.setdefault("ssha_percentiles", {})[label] = None
+                    if stats.get("quantile_rank_error"):
+                        entry["rank_error"] = stats["quantile_rank_error"]
+            summary.setdefault("ssha_percentiles", {})[label] = entry
 
         return summary
+
+    def _flag_distribution(self, label: str, ds: xr.Dataset, name: str) -> dict:
+        """Value histograms of flag ``name``, merged block by block."""
+        empty = (0, *ds[name].shape[1:])
+        result = flag_distribution(np.zeros(empty), np.zeros(empty, dtype=bool))
+        for block in self._decoded_blocks(label, ds, name):
+            result = merge_distributions(
+                result, flag_distribution(block.values, block.valid)
+            )
+        return result
+
+    def _flag_transitions(
+        self, name: str, ds_a: xr.Dataset, ds_b: xr.Dataset
+    ) -> dict | None:
+        """A-vs-B transitions of flag ``name`` over matched records.
+
+        Block-wise runs stream the records and merge the blocks' matrices.
+        """
+        var_a, var_b = ds_a[name], ds_b[name]
+        aligned = self.aligned_records(name, ds_a, ds_b)
+        if self.block_size:
+            if var_a.shape[1:] != var_b.shape[1:] or (
+                aligned is None and var_a.shape != var_b.shape
+            ):
+                return None
+            result = {"values": [], "counts": [], "changed": 0}
+            for a, b in self._paired_blocks([var_a], [var_b], aligned):
+                result = merge_transitions(
+                    result, flag_transitions(a, valid_mask(a), b, valid_mask(b))
+                )
+            return result
+        dec_a = self.decoded("a", ds_a, name)
+        dec_b = self.decoded("b", ds_b, name)
+        index_a, index_b = aligned or (slice(None), slice(None))
+        return flag_transitions(
+            dec_a.values[index_a],
+            dec_a.valid[index_a],
+            dec_b.values[index_b],
+            dec_b.valid[index_b],
+        )
+
+    def _grouped_ssha_diffs(self, ds_a: xr.Dataset, ds_b: xr.Dataset) -> dict[str, dict]:
+        """Per-group SSHA bias, RMSD, max_abs and count for each ``GROUP_VARS`` key.
+
+        All keys are grouped in the same pass over the data.  Block-wise
+        runs stream ``ssha`` and the keys block by block; otherwise the
+        cached decoded arrays are used.
+        """
+        if "ssha" not in ds_a.data_vars or "ssha" not in ds_b.data_vars:
+            return {}
+        keys = [key for key in self.GROUP_VARS if key in ds_a.data_vars]
+        ssha_a, ssha_b = ds_a["ssha"], ds_b["ssha"]
+        if not keys or any(ds_a[key].shape != ssha_a.shape for key in keys):
+            return {}
+
+        aligned = self.aligned_records("ssha", ds_a, ds_b)
+        if aligned is None and ssha_a.shape != ssha_b.shape:
+            return {}
+        if self.block_size:
+            blocks = self._paired_blocks(
+                [ssha_a, *(ds_a[key] for key in keys)], [ssha_b], aligned
+            )
+            grouped = {}
+            for block_a, *key_blocks, block_b in blocks:
+                valid = valid_mask(block_a) & valid_mask(block_b)
+                for key, key_block in zip(keys, key_blocks):
+                    part = GroupedDiff.from_arrays(
+                        key_block, block_a, block_b, valid & valid_mask(key_block)
+                    )
+                    grouped[key] = grouped[key].merge(part) if key in grouped else part
+            return {key: grouped[key].result() for key in grouped}
+
+        dec_a = self.decoded("a", ds_a, "ssha")
+        dec_b = self.decoded_b(ds_a, ds_b, "ssha")
+        index_a, index_b = aligned if aligned is not None else (slice(None), slice(None))
+        values_a, values_b = dec_a.values[index_a], dec_b.values[index_b]
+        valid = dec_a.valid[index_a] & dec_b.valid[index_b]
+        result = {}
+        for key in keys:
+            dec_key = self.decoded("a", ds_a, key)
+            result[key] = GroupedDiff.from_arrays(
+                dec_key.values[index_a],
+                values_a,
+                values_b,
+                valid & dec_key.valid[index_a],
+            ).result()
+        return result
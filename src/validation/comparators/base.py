@@ -1,13 +1,46 @@
 """Base comparator ABC and result dataclasses."""
 
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 
+import numpy as np
 import xarray as xr
 
+from validation.analysis.accumulators import DiffAccumulator
+from validation.analysis.agreement import AgreementCounter
 from validation.analysis.attributes import compare_attributes
-from validation.analysis.dimensions import compare_dimensions
-from validation.analysis.statistics import compute_variable_diff, compute_variable_stats
+from validation.analysis.basins import basin_diffs, basin_stats, basin_sums
+from validation.analysis.cache import VariableCache
+from validation.analysis.chunked import (
+    compute_chunked_diff,
+    compute_chunked_stats,
+    iter_blocks,
+)
+from validation.analysis.dimensions import compare_dimension_sizes
+from validation.analysis.header import compare_variable_layout, read_header
+from validation.analysis.identity import identical_diff, raw_digest
+from validation.analysis.packing import (
+    Packing,
+    compute_packed_diff,
+    compute_packed_stats,
+    packing_of,
+)
+from validation.analysis.selection import select_names
+from validation.analysis.statistics import (
+    DEFAULT_QUANTILES,
+    DecodedVariable,
+    compute_variable_diff,
+    compute_variable_stats,
+    decode_variable,
+    diff_decoded,
+    resolve_quantiles,
+    valid_mask,
+)
+from validation.analysis.sketch import DEFAULT_SKETCH_K
+from validation.diff_output import write_diff_fields
+from validation.stats_cache import FileSummary, StatsCache
 
 
 @dataclass
@@ -21,6 +54,9 @@ class VariableComparison:
     stats_b: dict | None = None
     diff: dict | None = None
     attr_diffs: list[tuple[str, object, object]] = field(default_factory=list)
+    # Storage layout differences (dtype, chunking, compression); only
+    # filled by metadata-only comparisons.
+    layout_diffs: list[tuple[str, object, object]] = field(default_factory=list)
 
 
 @dataclass
@@ -36,6 +72,10 @@ class ComparisonReport:
     global_attr_diffs: list[tuple[str, object, object]] = field(default_factory=list)
     variable_comparisons: list[VariableComparison] = field(default_factory=list)
     quality_summary: dict = field(default_factory=dict)
+    # True when built from file headers only, without reading any data.
+    metadata_only: bool = False
+    # Variables excluded by the variable selection and never read.
+    skipped_variables: list[str] = field(default_factory=list)
 
     @property
     def has_differences(self) -> bool:
@@ -46,22 +86,203 @@ class ComparisonReport:
         for vc in self.variable_comparisons:
             if not vc.present_a or not vc.present_b:
                 return True
-            if vc.attr_diffs:
+            if vc.attr_diffs or vc.layout_diffs:
                 return True
             if vc.diff and vc.diff.get("max_abs_diff") not in (None, 0.0):
                 return True
         return False
 
 
+@dataclass
+class Reference:
+    """A reference file loaded, masked and summarised once.
+
+    Shared read-only between the comparisons of several candidate files
+    against the same reference (see ``load_reference``).
+    """
+
+    path: str
+    ds: xr.Dataset
+    # Dimension sizes of the whole file; ``ds`` may hold only a subset of
+    # its variables.
+    sizes: dict[str, int] = field(default_factory=dict)
+    stats: dict[str, dict] = field(default_factory=dict)
+    decoded: dict[str, DecodedVariable] = field(default_factory=dict)
+    digests: dict[str, str] = field(default_factory=dict)
+    # Lazy undecoded view of the file, shared for raw and packed
+    # comparisons instead of being reopened per candidate.
+    raw: xr.Dataset | None = None
+    # How ``stats`` were computed (see ``stats_variant``); comparators
+    # computing stats another way recompute them instead of reusing them.
+    variant: str = "full"
+
+
+def stats_variant(
+    block_size: int | None = None,
+    packed: bool = False,
+    approx_quantiles: bool = False,
+    sketch_k: int = DEFAULT_SKETCH_K,
+    quantiles=DEFAULT_QUANTILES,
+) -> str:
+    """Label for how per-variable stats are computed.
+
+    Chunked runs estimate medians and packed runs scale stats
+    analytically, so their stats are kept apart.  Non-default quantile
+    sets and sketch settings are kept apart too.
+    """
+    variant = "block" if block_size else "full"
+    if packed:
+        variant += "-packed"
+    if approx_quantiles:
+        variant += "-sketched"
+    if block_size or approx_quantiles:
+        variant += f"-k{sketch_k}"
+    if tuple(quantiles) != DEFAULT_QUANTILES:
+        variant += "-q" + ",".join(f"{q:g}" for q in quantiles)
+    return variant
+
+
+def load_reference(
+    path: str,
+    select: Callable[[Iterable[str]], tuple[list[str], list[str]]] | None = None,
+    quantiles=DEFAULT_QUANTILES,
+    sketch_k: int = DEFAULT_SKETCH_K,
+    approx_quantiles: bool = False,
+    block_size: int | None = None,
+) -> Reference:
+    """Load ``path`` and precompute its stats, masks and raw digests.
+
+    ``select`` (e.g. ``BaseComparator.select_variables``) restricts the
+    variables that are loaded.  The stats are computed the way a
+    comparator with the same ``quantiles``, ``sketch_k``,
+    ``approx_quantiles`` and ``block_size`` computes them, so the
+    reference and the candidates report like-for-like medians.
+
+    Without ``block_size`` the file is loaded into memory and its masks
+    are kept.  With ``block_size`` it stays lazy: stats and digests are
+    streamed block by block, nothing is decoded up front, and candidates
+    read the reference block by block as they would read file A.  The
+    file handles are closed afterwards (lazy variables reopen the file
+    on access), so the result can be shared across threads or inherited
+    by forked worker processes.
+    """
+    with xr.open_dataset(path) as ds:
+        sizes = dict(ds.sizes)
+        if select is not None:
+            ds = ds[select(ds.data_vars)[0]]
+        if not block_size:
+            ds = ds.load()
+    with xr.open_dataset(path, decode_cf=False) as raw:
+        raw = raw[list(ds.data_vars)]
+    variant = stats_variant(block_size, False, approx_quantiles, sketch_k, quantiles)
+    reference = Reference(path=path, ds=ds, sizes=sizes, raw=raw, variant=variant)
+    for name in ds.data_vars:
+        var = ds[name]
+        if not np.issubdtype(var.dtype, np.number):
+            reference.stats[name] = compute_variable_stats(var)
+        elif block_size:
+            reference.stats[name] = compute_chunked_stats(
+                var, block_size, quantiles, sketch_k, approx_quantiles
+            )
+        else:
+            decoded = decode_variable(var.values)
+            decoded.values.flags.writeable = False
+            decoded.valid.flags.writeable = False
+            reference.decoded[name] = decoded
+            reference.stats[name] = compute_variable_stats(
+                var, decoded, quantiles, sketch_k if approx_quantiles else None
+            )
+        digest = raw_digest(raw[name], block_size)
+        if digest is not None:
+            reference.digests[name] = digest
+    return reference
+
+
 class BaseComparator(ABC):
     """Abstract base for product-type comparators."""
 
-    def __init__(self, file_a: str, file_b: str, threshold: float = 0.05):
+    # Variables whose decoded arrays stay cached after their own
+    # comparison because ``compare_quality`` reads them again; everything
+    # else is evicted as soon as it has been compared.
+    RETAINED_VARS: list[str] = []
+
+    def __init__(
+        self,
+        file_a: str,
+        file_b: str,
+        threshold: float = 0.05,
+        block_size: int | None = None,
+        workers: int = 1,
+        read_ahead: int = 0,
+        reference: Reference | None = None,
+        stats_cache: StatsCache | None = None,
+        raw_compare: bool = True,
+        variables: list[str] | None = None,
+        exclude_variables: list[str] | None = None,
+        expected_only: bool = False,
+        packed_compare: bool = False,
+        quantiles: list[float] | None = None,
+        approx_quantiles: bool = False,
+        sketch_k: int = DEFAULT_SKETCH_K,
+        thresholds: list[float] | None = None,
+    ):
         self.file_a = file_a
         self.file_b = file_b
         self.threshold = threshold
+        if block_size is not None and block_size <= 0:
+            raise ValueError(f"block_size must be positive, got {block_size}")
+        # Extra thresholds of the SSHA agreement curve; all of them are
+        # read off one pass over |B - A|.
+        self.thresholds = thresholds
+        # Leading-axis rows per block for out-of-core stats and diffs;
+        # None loads each variable whole.
+        self.block_size = block_size
+        # Variables are independent and their NumPy reductions release
+        # the GIL, so they can be compared on a thread pool.
+        self.workers = max(1, workers)
+        # Number of variables, starting with the current one, whose A and
+        # B arrays are read and decoded ahead on an I/O pool.  Reads still
+        # take xarray's global netCDF4 lock, so only the decoding runs
+        # concurrently; off by default, and no pool is started when 0.
+        self.read_ahead = max(0, read_ahead)
+        # Preloaded file A shared with other comparisons; its stats and
+        # masks are reused instead of being recomputed.
+        self.reference = reference
+        # Persistent per-file stats reused across runs for unchanged files.
+        self.stats_cache = stats_cache
+        # Hash the stored bytes of each variable first and skip decoding
+        # and diffing when A and B are bit-identical.
+        self.raw_compare = raw_compare
+        # Variable selection: glob patterns to include and exclude, and
+        # whether to restrict to get_expected_variables().  Unselected
+        # variables are never read.
+        self.variables = variables
+        self.exclude_variables = exclude_variables
+        self.expected_only = expected_only
+        # Compare integer variables packed with the same scale_factor and
+        # add_offset in their stored form, without CF decoding.
+        self.packed_compare = packed_compare
+        # Quantiles (fractions) reported for every numeric variable, on
+        # top of the defaults used by the quality summaries.
+        self.quantiles = resolve_quantiles(quantiles)
+        # Keep a mergeable quantile sketch in every variable's stats (for
+        # batch roll-ups).
+        self.approx_quantiles = approx_quantiles
+        # Size of the quantile sketches; see QuantileSketch for the error
+        # bound.
+        self.sketch_k = sketch_k
+        # Per-file stats and raw digests known before the run (from the
+        # reference or the stats cache), and digests computed during it.
+        self._known = {"a": FileSummary(), "b": FileSummary()}
+        self._digests: dict[str, dict[str, str | Future | None]] = {"a": {}, "b": {}}
+        # Per-file stats computed by this run, shared with compare_quality.
+        self._stats: dict[str, dict[str, dict]] = {"a": {}, "b": {}}
+        self._io_pool: ThreadPoolExecutor | None = None
         self.ds_a: xr.Dataset | None = None
         self.ds_b: xr.Dataset | None = None
+        self.raw_a: xr.Dataset | None = None
+        self.raw_b: xr.Dataset | None = None
+        self.cache = VariableCache()
 
     @property
     @abstractmethod
@@ -82,45 +303,633 @@ class BaseComparator(ABC):
     ) -> dict:
         """Product-specific quality comparison. Returns a summary dict."""
 
+    def select_variables(self, names: Iterable[str]) -> tuple[list[str], list[str]]:
+        """Split ``names`` into sorted (selected, skipped) lists."""
+        expected = self.get_expected_variables() if self.expected_only else None
+        return select_names(
+            list(names), self.variables, self.exclude_variables, restrict_to=expected
+        )
+
+    @staticmethod
+    def _subset(ds: xr.Dataset, names: list[str]) -> xr.Dataset:
+        """Lazily restrict ``ds`` to the data variables in ``names``."""
+        return ds[[name for name in names if name in ds.data_vars]]
+
+    def aligned_records(
+        self, var_name: str, ds_a: xr.Dataset, ds_b: xr.Dataset
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        """Matched leading-axis positions in A and B, if ``var_name`` needs them.
+
+        Products whose files can hold different records override this to
+        diff matched records instead of comparing index by index.  None
+        means positions correspond one-to-one.
+        """
+        return None
+
+    def regrid_pair(
+        self, var_name: str, ds_a: xr.Dataset, ds_b: xr.Dataset
+    ) -> tuple[DecodedVariable, DecodedVariable, str] | None:
+        """A and B values of ``var_name`` on a common grid, if shapes differ.
+
+        Products whose files can come at different resolutions override
+        this to return both decoded arrays on one grid plus a short
+        description of the regridding.  None means no diff is possible.
+        """
+        return None
+
+    def decoded(self, label: str, ds: xr.Dataset, name: str) -> DecodedVariable:
+        """Return the cached masked values of ``ds[name]`` for file ``label``."""
+        return self.cache.get(label, ds[name])
+
+    def decoded_b(self, ds_a: xr.Dataset, ds_b: xr.Dataset, name: str) -> DecodedVariable:
+        """Return B's decoded ``name``, reusing A's when the stored data is identical."""
+        if self.raw_compare and name in ds_a.data_vars and self._raw_identical(name):
+            return self.decoded("a", ds_a, name)
+        return self.decoded("b", ds_b, name)
+
+    def _decoded_blocks(
+        self, label: str, ds: xr.Dataset, name: str
+    ) -> Iterator[DecodedVariable]:
+        """Yield ``ds[name]`` decoded, block by block in block-wise runs.
+
+        Otherwise the cached decoded array is yielded whole.
+        """
+        if not self.block_size:
+            yield self.decoded(label, ds, name)
+            return
+        for block in iter_blocks(ds[name], self.block_size):
+            yield DecodedVariable(values=block, valid=valid_mask(block))
+
+    def _decoded_blocks_b(
+        self, ds_a: xr.Dataset, ds_b: xr.Dataset, name: str
+    ) -> Iterator[DecodedVariable]:
+        """``_decoded_blocks`` of B, reusing A's whole array like ``decoded_b``."""
+        if not self.block_size:
+            yield self.decoded_b(ds_a, ds_b, name)
+            return
+        yield from self._decoded_blocks("b", ds_b, name)
+
+    def _paired_blocks(
+        self,
+        vars_a: list[xr.DataArray],
+        vars_b: list[xr.DataArray],
+        aligned: tuple[np.ndarray, np.ndarray] | None = None,
+    ) -> Iterator[tuple[np.ndarray, ...]]:
+        """Stream corresponding ``block_size`` blocks of A and B variables.
+
+        Each item holds one block of every variable in ``vars_a`` followed
+        by one of every variable in ``vars_b``.  With ``aligned``, blocks
+        hold the matched records rather than equal positions.
+        """
+        index_a, index_b = aligned or (None, None)
+        return zip(
+            *(iter_blocks(var, self.block_size, index_a) for var in vars_a),
+            *(iter_blocks(var, self.block_size, index_b) for var in vars_b),
+        )
+
+    def variable_stats(self, label: str, ds: xr.Dataset, name: str) -> dict:
+        """Return the stats of ``ds[name]``, reusing those of the current run.
+
+        Block-wise runs never load the variable: their median and
+        quantiles are sketch estimates, bounded by ``quantile_rank_error``.
+        """
+        stats = self._stats[label].get(name)
+        if stats is None and self.block_size:
+            stats = self._chunked_stats(ds[name])
+        elif stats is None:
+            stats = self._full_stats(ds[name], self.decoded(label, ds, name))
+        return stats
+
+    def agreement(self, ds_a: xr.Dataset, ds_b: xr.Dataset, name: str = "ssha") -> dict | None:
+        """Percentage of co-located valid values of ``name`` with |B - A| <= threshold.
+
+        With ``thresholds``, ``curve`` maps every threshold (including
+        ``threshold``) to its percentage; all come from the same pass.
+        Block-wise runs stream the data.  Returns None when the values
+        cannot be paired.
+        """
+        if name not in ds_a.data_vars or name not in ds_b.data_vars:
+            return None
+        aligned = self.aligned_records(name, ds_a, ds_b)
+        regridded = None
+        if aligned is None and ds_a[name].shape != ds_b[name].shape:
+            regridded = self.regrid_pair(name, ds_a, ds_b)
+            if regridded is None:
+                return None
+        counter = AgreementCounter([self.threshold, *(self.thresholds or ())])
+        if regridded is not None:
+            dec_a, dec_b, _ = regridded
+            both_valid = dec_a.valid & dec_b.valid
+            counter.update(
+                np.abs(np.subtract(dec_b.values[both_valid], dec_a.values[both_valid]))
+            )
+        elif self.block_size:
+            for a, b in self._paired_blocks([ds_a[name]], [ds_b[name]], aligned):
+                both_valid = valid_mask(a) & valid_mask(b)
+                counter.update(np.abs(np.subtract(b[both_valid], a[both_valid], dtype=np.float64)))
+        else:
+            dec_a = self.decoded("a", ds_a, name)
+            dec_b = self.decoded_b(ds_a, ds_b, name)
+            index_a, index_b = aligned or (slice(None), slice(None))
+            a, b = dec_a.values[index_a], dec_b.values[index_b]
+            both_valid = dec_a.valid[index_a] & dec_b.valid[index_b]
+            counter.update(np.abs(np.subtract(b[both_valid], a[both_valid], dtype=np.float64)))
+        curve = counter.pct_within()
+        result = {
+            "threshold_m": self.threshold,
+            "pct_within_threshold": curve[float(self.threshold)],
+        }
+        if self.thresholds:
+            result["curve"] = curve
+        return result
+
+    def basin_summary(
+        self, ds_a: xr.Dataset, ds_b: xr.Dataset, name: str = "ssha"
+    ) -> dict | None:
+        """Per-basin stats of ``name`` in each file and of its B - A diff.
+
+        ``basin_flag`` (the shape of ``name`` plus a trailing ``basins``
+        axis) is used as a membership matrix; see ``basin_sums``.  The
+        diff uses file A's membership.  Block-wise runs stream the data.
+        """
+        flag = "basin_flag"
+        datasets = {"a": ds_a, "b": ds_b}
+        sides = [
+            label
+            for label, ds in datasets.items()
+            if name in ds.data_vars
+            and flag in ds.data_vars
+            and ds[flag].shape[:-1] == ds[name].shape
+        ]
+        if not sides:
+            return None
+        n_basins = datasets[sides[0]][flag].shape[-1]
+        aligned = None
+        if len(sides) == 2:
+            aligned = self.aligned_records(name, ds_a, ds_b)
+        with_diff = (
+            len(sides) == 2
+            and ds_b[flag].shape[-1] == n_basins
+            and (aligned is not None or ds_a[name].shape == ds_b[name].shape)
+        )
+        sums = {label: np.zeros((n_basins, 3)) for label in sides}
+        diff_sums = np.zeros((n_basins, 3))
+
+        if self.block_size:
+            streams = {
+                label: zip(
+                    iter_blocks(datasets[label][name], self.block_size),
+                    iter_blocks(datasets[label][flag], self.block_size),
+                )
+                for label in sides
+            }
+            if with_diff and aligned is None:
+                for (a, flag_a), (b, flag_b) in zip(streams["a"], streams["b"]):
+                    valid_a, valid_b = valid_mask(a), valid_mask(b)
+                    member_a = valid_mask(flag_a)
+                    sums["a"] += basin_sums(flag_a, member_a, a, valid_a)
+                    sums["b"] += basin_sums(flag_b, valid_mask(flag_b), b, valid_b)
+                    diff_sums += basin_sums(
+                        flag_a,
+                        member_a,
+                        np.subtract(b, a, dtype=np.float64),
+                        valid_a & valid_b,
+                    )
+            else:
+                for label in sides:
+                    for values, flags in streams[label]:
+                        sums[label] += basin_sums(
+                            flags, valid_mask(flags), values, valid_mask(values)
+                        )
+                if with_diff:
+                    for a, flag_a, b in self._paired_blocks(
+                        [ds_a[name], ds_a[flag]], [ds_b[name]], aligned
+                    ):
+                        diff_sums += basin_sums(
+                            flag_a,
+                            valid_mask(flag_a),
+                            np.subtract(b, a, dtype=np.float64),
+                            valid_mask(a) & valid_mask(b),
+                        )
+        else:
+            decoded, flags = {}, {}
+            for label in sides:
+                for out, var in ((decoded, name), (flags, flag)):
+                    if label == "a":
+                        out[label] = self.decoded("a", ds_a, var)
+                    else:
+                        out[label] = self.decoded_b(ds_a, ds_b, var)
+            for label in sides:
+                sums[label] = basin_sums(
+                    flags[label].values,
+                    flags[label].valid,
+                    decoded[label].values,
+                    decoded[label].valid,
+                )
+            if with_diff:
+                index_a, index_b = aligned or (slice(None), slice(None))
+                dec_a, dec_b = decoded["a"], decoded["b"]
+                diff_sums = basin_sums(
+                    flags["a"].values[index_a],
+                    flags["a"].valid[index_a],
+                    np.subtract(
+                        dec_b.values[index_b], dec_a.values[index_a], dtype=np.float64
+                    ),
+                    dec_a.valid[index_a] & dec_b.valid[index_b],
+                )
+            # Nothing else reads the basin membership.
+            self.cache.evict(flag)
+
+        labels_ds = datasets[sides[0]]
+        if "basins" in labels_ds.coords:
+            basins = labels_ds["basins"].values.tolist()
+        else:
+            basins = list(range(n_basins))
+        return {
+            "basins": basins,
+            "a": basin_stats(sums["a"]) if "a" in sums else None,
+            "b": basin_stats(sums["b"]) if "b" in sums else None,
+            "diff": basin_diffs(diff_sums) if with_diff else None,
+        }
+
+    def _full_stats(self, var: xr.DataArray, decoded: DecodedVariable | None) -> dict:
+        sketch_k = self.sketch_k if self.approx_quantiles else None
+        return compute_variable_stats(var, decoded, self.quantiles, sketch_k)
+
+    def _chunked_stats(self, var: xr.DataArray) -> dict:
+        return compute_chunked_stats(
+            var, self.block_size, self.quantiles, self.sketch_k, self.approx_quantiles
+        )
+
+    def _packed_stats(self, var: xr.DataArray, packing: Packing) -> dict:
+        return compute_packed_stats(
+            var,
+            packing,
+            self.block_size,
+            self.quantiles,
+            self.sketch_k,
+            self.approx_quantiles,
+        )
+
     def load_datasets(self) -> tuple[xr.Dataset, xr.Dataset]:
-        self.ds_a = xr.open_dataset(self.file_a)
-        self.ds_b = xr.open_dataset(self.file_b)
+        """Open both files lazily.
+
+        Files are opened one after the other.  xarray serialises every
+        netCDF4/HDF5 call, opens and data reads alike, behind one global
+        lock, so opening on several threads gains nothing.  For the same
+        reason read-ahead cannot overlap storage reads with each other;
+        it only overlaps the decoding and masking that follow a read.
+        """
+        if self.reference is not None:
+            self.ds_a = self.reference.ds
+            self.ds_b = xr.open_dataset(self.file_b)
+        else:
+            self.ds_a = xr.open_dataset(self.file_a)
+            self.ds_b = xr.open_dataset(self.file_b)
+        if self.raw_compare or self.packed_compare:
+            # Lazy, undecoded views of the same files for raw digests and
+            # packed comparisons.
+            if self.reference is not None and self.reference.raw is not None:
+                self.raw_a = self.reference.raw
+            else:
+                self.raw_a = xr.open_dataset(self.file_a, decode_cf=False)
+            self.raw_b = xr.open_dataset(self.file_b, decode_cf=False)
         return self.ds_a, self.ds_b
 
+    def close_datasets(self) -> None:
+        """Close every file opened by ``load_datasets``."""
+        if self.reference is None:
+            for ds in (self.ds_a, self.raw_a):
+                if ds is not None:
+                    ds.close()
+        elif self.reference.raw is None and self.raw_a is not None:
+            self.raw_a.close()
+        for ds in (self.ds_b, self.raw_b):
+            if ds is not None:
+                ds.close()
+
+    def _compare_dimensions(
+        self, ds_a: xr.Dataset, ds_b: xr.Dataset
+    ) -> list[tuple[str, int | None, int | None]]:
+        sizes_a = self.reference.sizes if self.reference is not None else ds_a.sizes
+        return compare_dimension_sizes(dict(sizes_a), dict(ds_b.sizes))
+
+    def _raw_digest(self, label: str, name: str) -> str | None:
+        """Return the raw digest of variable ``name`` in file ``label``."""
+        known = self._known[label].digests
+        if name in known:
+            return known[name]
+        digest = self._digests[label].get(name)
+        if isinstance(digest, Future):
+            try:
+                digest = digest.result()
+            except CancelledError:
+                digest = None
+                del self._digests[label][name]
+        if name not in self._digests[label]:
+            raw = self.raw_a if label == "a" else self.raw_b
+            digest = raw_digest(raw[name], self.block_size)
+        self._digests[label][name] = digest
+        return digest
+
+    def _raw_identical(self, name: str) -> bool:
+        digest_a = self._raw_digest("a", name)
+        return digest_a is not None and digest_a == self._raw_digest("b", name)
+
+    def _shared_packing(self, name: str) -> Packing | None:
+        """Packing of ``name`` if both files store it packed identically."""
+        if not self.packed_compare:
+            return None
+        packing = packing_of(self.raw_a[name])
+        if packing is None or packing != packing_of(self.raw_b[name]):
+            return None
+        return packing
+
+    def _prefetch(self, names: list[str], ds_a: xr.Dataset, ds_b: xr.Dataset) -> None:
+        """Queue A and B reads of ``names`` on the I/O pool.
+
+        Variables present in both files only have their raw digests read
+        ahead when raw comparison is on; their decoded arrays are fetched
+        once the digests show a difference.
+        """
+        for name in names:
+            in_both = name in ds_a.data_vars and name in ds_b.data_vars
+            if in_both and self.aligned_records(name, ds_a, ds_b) is None:
+                if self.raw_compare:
+                    for label, raw in (("a", self.raw_a), ("b", self.raw_b)):
+                        if name in self._known[label].digests or name in self._digests[label]:
+                            continue
+                        self._digests[label][name] = self._io_pool.submit(
+                            raw_digest, raw[name], self.block_size
+                        )
+                    continue
+                if self._shared_packing(name) is not None:
+                    # Compared in packed form; never decoded.
+                    continue
+            self._prefetch_decode("a", ds_a, name)
+            self._prefetch_decode("b", ds_b, name)
+
+    def _prefetch_decode(self, label: str, ds: xr.Dataset, name: str) -> None:
+        if (
+            self._io_pool is not None
+            and name in ds.data_vars
+            and np.issubdtype(ds[name].dtype, np.number)
+        ):
+            self.cache.prefetch(label, ds[name], self._io_pool)
+
+    def _decoded_if_numeric(
+        self, label: str, ds: xr.Dataset, name: str
+    ) -> DecodedVariable | None:
+        if not np.issubdtype(ds[name].dtype, np.number):
+            return None
+        return self.decoded(label, ds, name)
+
+    def compare_variable(
+        self,
+        var_name: str,
+        ds_a: xr.Dataset,
+        ds_b: xr.Dataset,
+        ignore_attrs: list[str] | None = None,
+    ) -> VariableComparison:
+        """Compute stats, diff and attribute diffs for one variable."""
+        in_a = var_name in ds_a.data_vars
+        in_b = var_name in ds_b.data_vars
+        vc = VariableComparison(name=var_name, present_a=in_a, present_b=in_b)
+
+        if in_a:
+            vc.stats_a = self._known["a"].stats.get(var_name)
+        if in_b:
+            vc.stats_b = self._known["b"].stats.get(var_name)
+
+        aligned = None
+        if in_a and in_b:
+            aligned = self.aligned_records(var_name, ds_a, ds_b)
+        identical = (
+            aligned is None
+            and in_a
+            and in_b
+            and self.raw_compare
+            and self._raw_identical(var_name)
+        )
+        packing = None
+        if in_a and in_b and aligned is None and not identical:
+            packing = self._shared_packing(var_name)
+
+        if aligned is not None:
+            # Per-file stats as usual; the diff covers matched records only.
+            for label, ds in (("a", ds_a), ("b", ds_b)):
+                if getattr(vc, f"stats_{label}") is None:
+                    if self.block_size:
+                        stats = self._chunked_stats(ds[var_name])
+                    else:
+                        decoded = self._decoded_if_numeric(label, ds, var_name)
+                        stats = self._full_stats(ds[var_name], decoded)
+                    setattr(vc, f"stats_{label}", stats)
+            vc.diff = self._aligned_diff(var_name, ds_a, ds_b, *aligned)
+        elif identical:
+            # Bit-identical stored data: B's stats and the diff follow
+            # from A's stats without decoding B at all.
+            if vc.stats_a is None and self.block_size:
+                vc.stats_a = self._chunked_stats(ds_a[var_name])
+            elif vc.stats_a is None:
+                dec_a = self._decoded_if_numeric("a", ds_a, var_name)
+                vc.stats_a = self._full_stats(ds_a[var_name], dec_a)
+            vc.stats_b = dict(vc.stats_a)
+            if np.issubdtype(ds_a[var_name].dtype, np.number):
+                vc.diff = identical_diff(vc.stats_a)
+        elif packing is not None:
+            # Exact integer diffs of the stored values, scaled afterwards.
+            raw_a, raw_b = self.raw_a[var_name], self.raw_b[var_name]
+            if vc.stats_a is None:
+                vc.stats_a = self._packed_stats(raw_a, packing)
+            if vc.stats_b is None:
+                vc.stats_b = self._packed_stats(raw_b, packing)
+            vc.diff = compute_packed_diff(raw_a, raw_b, packing, self.block_size)
+        elif self.block_size:
+            if in_a and vc.stats_a is None:
+                vc.stats_a = self._chunked_stats(ds_a[var_name])
+            if in_b and vc.stats_b is None:
+                vc.stats_b = self._chunked_stats(ds_b[var_name])
+            if in_a and in_b:
+                vc.diff = compute_chunked_diff(
+                    ds_a[var_name], ds_b[var_name], self.block_size
+                )
+        else:
+            # Known stats skip decoding unless the diff needs the array.
+            # B is decoded on the I/O pool while A decodes here.
+            if in_a and in_b:
+                self._prefetch_decode("b", ds_b, var_name)
+            dec_a = dec_b = None
+            if in_a and (vc.stats_a is None or in_b):
+                dec_a = self._decoded_if_numeric("a", ds_a, var_name)
+            if in_b and (vc.stats_b is None or in_a):
+                dec_b = self._decoded_if_numeric("b", ds_b, var_name)
+            if in_a and vc.stats_a is None:
+                vc.stats_a = self._full_stats(ds_a[var_name], dec_a)
+            if in_b and vc.stats_b is None:
+                vc.stats_b = self._full_stats(ds_b[var_name], dec_b)
+            if in_a and in_b:
+                vc.diff = compute_variable_diff(
+                    ds_a[var_name], ds_b[var_name], dec_a, dec_b
+                )
+
+        if in_a and in_b and vc.diff is None and ds_a[var_name].shape != ds_b[var_name].shape:
+            regridded = self.regrid_pair(var_name, ds_a, ds_b)
+            if regridded is not None:
+                dec_a, dec_b, method = regridded
+                vc.diff = diff_decoded(dec_a, dec_b)
+                vc.diff["regridded"] = method
+
+        if in_a and in_b:
+            vc.attr_diffs = compare_attributes(
+                dict(ds_a[var_name].attrs),
+                dict(ds_b[var_name].attrs),
+                ignore=ignore_attrs,
+            )
+        return vc
+
+    def _aligned_diff(
+        self,
+        var_name: str,
+        ds_a: xr.Dataset,
+        ds_b: xr.Dataset,
+        index_a: np.ndarray,
+        index_b: np.ndarray,
+    ) -> dict | None:
+        """Diff of the records at ``index_a`` in A and ``index_b`` in B.
+
+        Block-wise runs stream the matched records.
+        """
+        var_a, var_b = ds_a[var_name], ds_b[var_name]
+        if var_a.shape[1:] != var_b.shape[1:]:
+            return None
+        if not np.issubdtype(var_a.dtype, np.number) or not np.issubdtype(
+            var_b.dtype, np.number
+        ):
+            return None
+        if self.block_size:
+            acc = DiffAccumulator()
+            for a, b in self._paired_blocks([var_a], [var_b], (index_a, index_b)):
+                acc.update(a, b, valid_mask(a) & valid_mask(b))
+            diff = acc.result()
+            diff["aligned_records"] = int(index_a.size)
+            return diff
+        dec_a = self.decoded("a", ds_a, var_name)
+        dec_b = self.decoded("b", ds_b, var_name)
+        diff = diff_decoded(
+            DecodedVariable(dec_a.values[index_a], dec_a.valid[index_a]),
+            DecodedVariable(dec_b.values[index_b], dec_b.valid[index_b]),
+        )
+        diff["aligned_records"] = int(index_a.size)
+        return diff
+
+    @property
+    def _cache_variant(self) -> str:
+        return stats_variant(
+            self.block_size,
+            self.packed_compare,
+            self.approx_quantiles,
+            self.sketch_k,
+            self.quantiles,
+        )
+
+    def _load_known_stats(self) -> None:
+        """Collect stats and digests from the reference or the stats cache."""
+        self._known = {"a": FileSummary(), "b": FileSummary()}
+        self._digests = {"a": {}, "b": {}}
+        if self.reference is not None:
+            # Stats computed another way (e.g. exact vs block-wise medians)
+            # would not be like-for-like with B's, so only digests are kept.
+            stats = {}
+            if self.reference.variant == self._cache_variant:
+                stats = dict(self.reference.stats)
+            self._known["a"] = FileSummary(
+                stats=stats, digests=dict(self.reference.digests)
+            )
+        if self.stats_cache is None:
+            return
+        for label, path in (("a", self.file_a), ("b", self.file_b)):
+            if label == "a" and self.reference is not None:
+                continue
+            summary = self.stats_cache.load(path, self._cache_variant)
+            if summary is not None:
+                self._known[label] = summary
+
+    def _store_stats(self, var_comparisons: list[VariableComparison]) -> None:
+        """Persist newly computed per-file stats to the stats cache."""
+        if self.stats_cache is None:
+            return
+        for label, path in (("a", self.file_a), ("b", self.file_b)):
+            if label == "a" and self.reference is not None:
+                continue
+            known = self._known[label]
+            computed = {}
+            for vc in var_comparisons:
+                stats = vc.stats_a if label == "a" else vc.stats_b
+                if stats is not None and vc.name not in known.stats:
+                    computed[vc.name] = stats
+            digests = {
+                name: digest
+                for name, digest in self._digests[label].items()
+                if isinstance(digest, str)
+            }
+            if not computed and not digests:
+                continue
+            summary = FileSummary(stats=computed, digests=digests)
+            self.stats_cache.store(path, summary, self._cache_variant)
+
     def run(self, ignore_attrs: list[str] | None = None) -> ComparisonReport:
         """Orchestrate a full comparison and return a structured report."""
         ds_a, ds_b = self.load_datasets()
 
-        dim_diffs = compare_dimensions(ds_a, ds_b)
+        dim_diffs = self._compare_dimensions(ds_a, ds_b)
         global_attr_diffs = compare_attributes(
             dict(ds_a.attrs), dict(ds_b.attrs), ignore=ignore_attrs
         )
 
-        all_vars = sorted(set(ds_a.data_vars) | set(ds_b.data_vars))
-        var_comparisons = []
-        for var_name in all_vars:
-            in_a = var_name in ds_a.data_vars
-            in_b = var_name in ds_b.data_vars
-            vc = VariableComparison(name=var_name, present_a=in_a, present_b=in_b)
-
-            if in_a:
-                vc.stats_a = compute_variable_stats(ds_a[var_name])
-            if in_b:
-                vc.stats_b = compute_variable_stats(ds_b[var_name])
-            if in_a and in_b:
-                vc.diff = compute_variable_diff(ds_a[var_name], ds_b[var_name])
-                vc.attr_diffs = compare_attributes(
-                    dict(ds_a[var_name].attrs),
-                    dict(ds_b[var_name].attrs),
-                    ignore=ignore_attrs,
-                )
+        self._load_known_stats()
 
-            var_comparisons.append(vc)
+        retained = set(self.RETAINED_VARS)
+        all_vars, skipped = self.select_variables(set(ds_a.data_vars) | set(ds_b.data_vars))
+        ds_a, ds_b = self._subset(ds_a, all_vars), self._subset(ds_b, all_vars)
+        if self.reference is not None:
+            for name, decoded in self.reference.decoded.items():
+                if name in all_vars:
+                    self.cache.put("a", name, decoded)
+        if self.read_ahead and not self.block_size:
+            self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="io")
 
+        def compare(index: int) -> VariableComparison:
+            var_name = all_vars[index]
+            if self._io_pool is not None:
+                window = all_vars[index : index + self.read_ahead]
+                self._prefetch(window, ds_a, ds_b)
+            vc = self.compare_variable(var_name, ds_a, ds_b, ignore_attrs)
+            if var_name not in retained:
+                self.cache.evict(var_name)
+            return vc
+
+        try:
+            if self.workers > 1:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    var_comparisons = list(pool.map(compare, range(len(all_vars))))
+            else:
+                var_comparisons = [compare(i) for i in range(len(all_vars))]
+        finally:
+            if self._io_pool is not None:
+                self._io_pool.shutdown(wait=True, cancel_futures=True)
+                self._io_pool = None
+
+        self._store_stats(var_comparisons)
+        for vc in var_comparisons:
+            for label, stats in (("a", vc.stats_a), ("b", vc.stats_b)):
+                if stats is not None:
+                    self._stats[label][vc.name] = stats
         quality_summary = self.compare_quality(ds_a, ds_b)
+        self.cache.clear()
+        self._stats = {"a": {}, "b": {}}
 
-        ds_a.close()
-        ds_b.close()
+        self.close_datasets()
 
         return ComparisonReport(
             file_a=self.file_a,
@@ -130,4 +939,132 @@ class BaseComparator(ABC):
             global_attr_diffs=global_attr_diffs,
             variable_comparisons=var_comparisons,
             quality_summary=quality_summary,
+            skipped_variables=skipped,
+        )
+
+    def write_diff(self, path: str, mask: bool = False) -> list[str]:
+        """Write B - A of the selected variables to the NetCDF file ``path``.
+
+        Covers numeric variables with at least one dimension and the same
+        dims and shape in both files; see ``write_diff_fields``.  Variables
+        diffed on time-aligned records are skipped.  Returns the names
+        written.
+        """
+        ds_a, ds_b = self.load_datasets()
+        try:
+            selected, _ = self.select_variables(set(ds_a.data_vars) & set(ds_b.data_vars))
+            names = [
+                name
+                for name in selected
+                if ds_a[name].ndim
+                and ds_a[name].dims == ds_b[name].dims
+                and ds_a[name].shape == ds_b[name].shape
+                and np.issubdtype(ds_a[name].dtype, np.number)
+                and np.issubdtype(ds_b[name].dtype, np.number)
+                and self.aligned_records(name, ds_a, ds_b) is None
+            ]
+            return write_diff_fields(
+                path, self.file_a, self.file_b, ds_a, ds_b, names, self.block_size, mask
+            )
+        finally:
+            self.close_datasets()
+
+    def find_first_difference(
+        self, ignore_attrs: list[str] | None = None
+    ) -> str | None:
+        """Return a description of the first difference found, or None.
+
+        A fail-fast alternative to ``run`` for gating: checks run from
+        cheapest to most expensive (dimensions, global attributes,
+        variable inventory and attributes, then per variable, smallest
+        first, raw-byte equality and a numeric diff) and stop at the first
+        difference, so later variables are never read.  "Difference" has
+        the same meaning as ``ComparisonReport.has_differences``; the
+        quality summary is not computed.
+        """
+        ds_a, ds_b = self.load_datasets()
+        try:
+            for dim, size_a, size_b in self._compare_dimensions(ds_a, ds_b):
+                return f"dimension {dim}: A={size_a} B={size_b}"
+            for attr, _, _ in compare_attributes(
+                dict(ds_a.attrs), dict(ds_b.attrs), ignore=ignore_attrs
+            ):
+                return f"global attribute {attr} differs"
+
+            selected, _ = self.select_variables(set(ds_a.data_vars) | set(ds_b.data_vars))
+            names_a = set(ds_a.data_vars) & set(selected)
+            names_b = set(ds_b.data_vars) & set(selected)
+            for name in sorted(names_a ^ names_b):
+                side = "B" if name in names_a else "A"
+                return f"variable {name} missing in file {side}"
+
+            common = sorted(names_a & names_b)
+            for name in common:
+                for attr, _, _ in compare_attributes(
+                    dict(ds_a[name].attrs), dict(ds_b[name].attrs), ignore=ignore_attrs
+                ):
+                    return f"variable {name} attribute {attr} differs"
+
+            self._load_known_stats()
+            # One variable at a time, smallest first: a difference in a
+            # small variable is found before a large one is even hashed.
+            for name in sorted(common, key=lambda name: (ds_a[name].nbytes, name)):
+                if self.raw_compare and self._raw_identical(name):
+                    continue
+                packing = self._shared_packing(name)
+                if packing is not None:
+                    diff = compute_packed_diff(
+                        self.raw_a[name], self.raw_b[name], packing, self.block_size
+                    )
+                elif self.block_size:
+                    diff = compute_chunked_diff(ds_a[name], ds_b[name], self.block_size)
+                else:
+                    diff = compute_variable_diff(ds_a[name], ds_b[name])
+                if diff and diff.get("max_abs_diff") not in (None, 0.0):
+                    return f"variable {name} values differ (max_abs_diff={diff['max_abs_diff']:.6g})"
+            return None
+        finally:
+            self.close_datasets()
+
+    def run_metadata(self, ignore_attrs: list[str] | None = None) -> ComparisonReport:
+        """Compare headers only: dimensions, attributes and storage layout.
+
+        Reads nothing but the NetCDF headers, so it is suitable for sweeping
+        large archives for schema drift.  Every variable, including
+        coordinates, is compared; statistics, diffs and the quality summary
+        are left empty.
+        """
+        header_a = read_header(self.file_a)
+        header_b = read_header(self.file_b)
+
+        selected, skipped = self.select_variables(
+            set(header_a.variables) | set(header_b.variables)
+        )
+        var_comparisons = []
+        for name in selected:
+            var_a = header_a.variables.get(name)
+            var_b = header_b.variables.get(name)
+            vc = VariableComparison(
+                name=name, present_a=var_a is not None, present_b=var_b is not None
+            )
+            if var_a is not None and var_b is not None:
+                vc.attr_diffs = compare_attributes(
+                    var_a.attrs, var_b.attrs, ignore=ignore_attrs
+                )
+                vc.layout_diffs = compare_variable_layout(var_a, var_b)
+            var_comparisons.append(vc)
+
+        return ComparisonReport(
+            file_a=self.file_a,
+            file_b=self.file_b,
+            product_type=self.product_type,
+            dimension_diffs=compare_dimension_sizes(
+                header_a.dimensions, header_b.dimensions
+            ),
+            global_attr_diffs=compare_attributes(
+                header_a.attrs, header_b.attrs, ignore=ignore_attrs
+            ),
+            variable_comparisons=var_comparisons,
+            metadata_only=True,
+            skipped_variables=skipped,
         )
@@ -3,12 +3,35 @@
 import numpy as np
 import xarray as xr
 
-from validation.analysis.statistics import _mask_fill
+from validation.analysis.chunked import iter_blocks
+from validation.analysis.regrid import regrid_plan
+from validation.analysis.statistics import DecodedVariable, valid_mask
+from validation.analysis.tiles import (
+    TileMap,
+    tile_diff_map,
+    tile_map_from_sums,
+    tile_sums,
+)
+from validation.analysis.weights import (
+    diff_stats,
+    latitude_weights,
+    moments_stats,
+    row_diff_sums,
+    row_moments,
+)
 from validation.comparators.base import BaseComparator
 
 
 class SimpleGridComparator(BaseComparator):
-    """Comparator for simple-grid (gridded) product files."""
+    """Comparator for simple-grid (gridded) product files.
+
+    With ``tile_size`` (degrees), the SSHA difference is also mapped per
+    tile so localized regressions stand out from the global numbers.
+
+    Grids of different resolution are diffed after mapping the finer
+    grid onto the coarser one (except in block-wise runs); see
+    ``regrid_pair``.
+    """
 
     EXPECTED_DIMS = ["latitude", "longitude", "basins"]
 
@@ -20,6 +43,17 @@ class SimpleGridComparator(BaseComparator):
 
     QUALITY_VARS = ["counts", "ssha"]
 
+    # Kept decoded until compare_quality; basin_flag is dropped once
+    # basin_summary has used it.
+    RETAINED_VARS = QUALITY_VARS + ["basin_flag"]
+
+    # Tiles listed in the quality summary's worst-tiles ranking.
+    WORST_TILES = 10
+
+    def __init__(self, *args, tile_size: float | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tile_size = tile_size
+
     @property
     def product_type(self) -> str:
         return "simple_grid"
@@ -31,31 +65,29 @@ class SimpleGridComparator(BaseComparator):
         return list(self.QUALITY_VARS)
 
     def compare_quality(self, ds_a: xr.Dataset, ds_b: xr.Dataset) -> dict:
-        """Compare counts distribution and spatial coverage."""
+        """Compare counts distribution, spatial coverage and per-basin SSHA.
+
+        ``ssha_area_weighted`` repeats the SSHA mean/std, bias, RMSD and
+        agreement with cos-latitude cell weights.  Block-wise runs stream
+        every summary over latitude bands (and skip regridded diffs).
+        """
         summary = {}
 
         # Counts distribution
         for label, ds in [("a", ds_a), ("b", ds_b)]:
             if "counts" in ds.data_vars:
-                data = ds["counts"].values
-                masked = _mask_fill(data)
-                valid = masked[np.isfinite(masked)]
-                summary.setdefault("counts", {})[label] = {
-                    "min": int(np.min(valid)) if valid.size > 0 else None,
-                    "max": int(np.max(valid)) if valid.size > 0 else None,
-                    "mean": float(np.mean(valid)) if valid.size > 0 else None,
-                    "zero_count": int(np.sum(valid == 0)) if valid.size > 0 else None,
-                }
+                summary.setdefault("counts", {})[label] = self._counts_summary(label, ds)
             else:
                 summary.setdefault("counts", {})[label] = None
 
         # SSHA spatial coverage
         for label, ds in [("a", ds_a), ("b", ds_b)]:
             if "ssha" in ds.data_vars:
-                data = ds["ssha"].values
-                masked = _mask_fill(data)
-                total = masked.size
-                valid_count = int(np.sum(np.isfinite(masked)))
+                total = ds["ssha"].size
+                valid_count = sum(
+                    int(np.count_nonzero(block.valid))
+                    for block in self._decoded_blocks(label, ds, "ssha")
+                )
                 coverage_pct = (valid_count / total * 100) if total > 0 else 0.0
                 summary.setdefault("ssha_coverage", {})[label] = {
                     "valid_cells": valid_count,
@@ -65,21 +97,204 @@ class SimpleGridComparator(BaseComparator):
             else:
                 summary.setdefault("ssha_coverage", {})[label] = None
 
-        # SSHA grid-cell agreement (cross-file, configurable threshold)
+        # SSHA grid-cell agreement (cross-file, configurable thresholds)
         if "ssha" in ds_a.data_vars and "ssha" in ds_b.data_vars:
-            a = _mask_fill(ds_a["ssha"].values)
-            b = _mask_fill(ds_b["ssha"].values)
-            both_valid = np.isfinite(a) & np.isfinite(b)
-            if np.any(both_valid):
-                pct = float(np.mean(np.abs(b[both_valid] - a[both_valid]) <= self.threshold) * 100)
-                summary["ssha_agreement"] = {
-                    "threshold_m": self.threshold,
-                    "pct_within_threshold": round(pct, 2),
-                }
-            else:
-                summary["ssha_agreement"] = {
-                    "threshold_m": self.threshold,
-                    "pct_within_threshold": None,
-                }
+            summary["ssha_agreement"] = self.agreement(ds_a, ds_b)
+            if self.tile_size:
+                tiles = self.tile_map(ds_a, ds_b)
+                summary["ssha_tiles"] = None
+                if tiles is not None:
+                    summary["ssha_tiles"] = {
+                        "tile_size": self.tile_size,
+                        "map": tiles,
+                        "worst": tiles.worst(self.WORST_TILES),
+                    }
+
+        summary["ssha_area_weighted"] = self.area_weighted(ds_a, ds_b)
+        summary["ssha_basins"] = self.basin_summary(ds_a, ds_b)
 
         return summary
+
+    def _counts_summary(self, label: str, ds: xr.Dataset) -> dict:
+        """Min, max, mean and number of zeros of the valid ``counts``."""
+        n = zeros = 0
+        total = 0.0
+        lo = hi = None
+        for block in self._decoded_blocks(label, ds, "counts"):
+            valid = block.values[block.valid]
+            if valid.size == 0:
+                continue
+            n += valid.size
+            total += float(np.sum(valid, dtype=np.float64))
+            zeros += int(np.count_nonzero(valid == 0))
+            block_lo, block_hi = int(np.min(valid)), int(np.max(valid))
+            lo = block_lo if lo is None else min(lo, block_lo)
+            hi = block_hi if hi is None else max(hi, block_hi)
+        return {
+            "min": lo,
+            "max": hi,
+            "mean": total / n if n else None,
+            "zero_count": zeros if n else None,
+        }
+
+    def regrid_pair(
+        self, var_name: str, ds_a: xr.Dataset, ds_b: xr.Dataset
+    ) -> tuple[DecodedVariable, DecodedVariable, str] | None:
+        """Map ``var_name`` of the finer grid onto the coarser grid.
+
+        Applies to (latitude, longitude) variables other than ``counts``
+        (a resolution-dependent quantity, used instead as the averaging
+        weight when the finer file has it).  Axes with an integer
+        resolution ratio whose cells nest are block averaged, others are
+        linearly interpolated at the target cell centres (point samples,
+        not area means); plans are cached per grid pair.  The description
+        is e.g. "b block 3x3 -> a".  Regridding needs both
+        grids whole, so block-wise runs skip it.
+        """
+        if self.block_size:
+            return None
+        dims = ("latitude", "longitude")
+        if var_name == "counts" or ds_a[var_name].dims != dims or ds_b[var_name].dims != dims:
+            return None
+        if any(dim not in ds.coords for ds in (ds_a, ds_b) for dim in dims):
+            return None
+        if not all(np.issubdtype(ds[var_name].dtype, np.number) for ds in (ds_a, ds_b)):
+            return None
+        fine, coarse = ("b", "a") if ds_b[var_name].size > ds_a[var_name].size else ("a", "b")
+        datasets = {"a": ds_a, "b": ds_b}
+        src, dst = datasets[fine], datasets[coarse]
+        plan = regrid_plan(
+            src["latitude"].values,
+            src["longitude"].values,
+            dst["latitude"].values,
+            dst["longitude"].values,
+        )
+        if plan is None:
+            return None
+        weights = None
+        if "counts" in src.data_vars and src["counts"].dims == dims:
+            counts = self.decoded(fine, src, "counts")
+            weights = np.where(counts.valid, counts.values, 0)
+        dec_fine = self.decoded(fine, src, var_name)
+        values, valid = plan.apply(dec_fine.values, dec_fine.valid, weights)
+        mapped = DecodedVariable(values=values, valid=valid)
+        target = self.decoded(coarse, dst, var_name)
+        if plan.method == "block":
+            method = f"{fine} block {plan.lat.ratio}x{plan.lon.ratio} -> {coarse}"
+        elif plan.method == "interp":
+            method = f"{fine} interp -> {coarse} (point samples, not area means)"
+        else:
+            method = f"{fine} block+interp -> {coarse} (interpolated axis point-sampled)"
+        pair = {fine: mapped, coarse: target}
+        return pair["a"], pair["b"], method
+
+    def area_weighted(
+        self, ds_a: xr.Dataset, ds_b: xr.Dataset, name: str = "ssha"
+    ) -> dict | None:
+        """Cos-latitude weighted stats of ``name`` per file and of B - A.
+
+        Returns None when ``name`` has no ``latitude`` dimension with a
+        coordinate in file A.  Block-wise runs reduce one latitude band at
+        a time, which needs ``latitude`` to be the leading dimension;
+        otherwise they return None.
+        """
+        if name not in ds_a.data_vars or "latitude" not in ds_a[name].dims:
+            return None
+        if "latitude" not in ds_a.coords:
+            return None
+        axis = ds_a[name].dims.index("latitude")
+        if self.block_size and axis != 0:
+            return None
+        datasets = {"a": ds_a, "b": ds_b}
+        labels = ["a"]
+        if (
+            name in ds_b.data_vars
+            and ds_b[name].dims == ds_a[name].dims
+            and "latitude" in ds_b.coords
+        ):
+            labels.append("b")
+        with_diff = "b" in labels and ds_b[name].shape == ds_a[name].shape
+
+        # Per-latitude reductions, one part per block (a single part
+        # unless block-wise).
+        moments = {label: [] for label in labels}
+        diff_sums = []
+        if with_diff:
+            blocks = zip(
+                self._decoded_blocks("a", ds_a, name),
+                self._decoded_blocks_b(ds_a, ds_b, name),
+            )
+            for dec_a, dec_b in blocks:
+                moments["a"].append(row_moments(dec_a.values, dec_a.valid, axis))
+                moments["b"].append(row_moments(dec_b.values, dec_b.valid, axis))
+                diff_sums.append(
+                    row_diff_sums(
+                        dec_a.values,
+                        dec_b.values,
+                        dec_a.valid & dec_b.valid,
+                        self.threshold,
+                        axis,
+                    )
+                )
+        else:
+            for label in labels:
+                for dec in self._decoded_blocks(label, datasets[label], name):
+                    moments[label].append(row_moments(dec.values, dec.valid, axis))
+
+        result = {}
+        for label, ds in datasets.items():
+            result[label] = None
+            if label in moments:
+                file_weights = latitude_weights(ds["latitude"].values)
+                result[label] = moments_stats(
+                    np.concatenate(moments[label], axis=1), file_weights
+                )
+        result["diff"] = None
+        if with_diff:
+            weights = latitude_weights(ds_a["latitude"].values)
+            result["diff"] = diff_stats(np.concatenate(diff_sums, axis=1), weights)
+        return result
+
+    def tile_map(self, ds_a: xr.Dataset, ds_b: xr.Dataset) -> TileMap | None:
+        """Per-tile SSHA diff map for ``tile_size``-degree tiles.
+
+        The tile size is converted to cells with the grid spacing of the
+        ``latitude`` and ``longitude`` coordinates (one cell per degree if
+        they are missing).  Returns None unless both grids are 2D and of
+        the same shape.  Block-wise runs read whole rows of tiles at a time.
+        """
+        var_a, var_b = ds_a["ssha"], ds_b["ssha"]
+        if var_a.ndim != 2 or var_a.shape != var_b.shape:
+            return None
+        coords = [
+            ds_a[dim].values if dim in ds_a.coords else None for dim in var_a.dims
+        ]
+        cells = [
+            max(1, round(self.tile_size / abs(float(c[1] - c[0]))))
+            if c is not None and c.size > 1
+            else max(1, round(self.tile_size))
+            for c in coords
+        ]
+        if not self.block_size:
+            dec_a = self.decoded("a", ds_a, "ssha")
+            dec_b = self.decoded_b(ds_a, ds_b, "ssha")
+            return tile_diff_map(
+                dec_a.values,
+                dec_b.values,
+                dec_a.valid & dec_b.valid,
+                *cells,
+                self.threshold,
+                *coords,
+            )
+        # Round the block up to whole tile rows so blocks' tiles never
+        # straddle two blocks.
+        rows = -(-self.block_size // cells[0]) * cells[0]
+        sums = [
+            tile_sums(a, b, valid_mask(a) & valid_mask(b), *cells, self.threshold)
+            for a, b in zip(iter_blocks(var_a, rows), iter_blocks(var_b, rows))
+        ]
+        lat, lon = (
+            c if c is not None else np.arange(n, dtype=np.float64)
+            for c, n in zip(coords, var_a.shape)
+        )
+        return tile_map_from_sums(np.concatenate(sums, axis=1), *cells, lat, lon)
@@ -0,0 +1,114 @@
+"""Streaming NetCDF output of B - A difference fields.
+
+Differences are written block by block along the leading dimension into
+compressed NetCDF variables, so only one block of each input and of the
+difference is in memory at a time.  Uses netCDF4 directly so that the
+dimensions and coordinate variables of file A are copied as stored.
+"""
+
+import netCDF4
+import numpy as np
+import xarray as xr
+
+from validation.analysis.chunked import iter_blocks
+from validation.analysis.statistics import valid_mask
+
+# Elements per written block when no block size is given.
+_BLOCK_ELEMENTS = 1 << 20
+
+_COMPRESSION = {"zlib": True, "complevel": 4, "shuffle": True}
+
+
+def _rows_per_block(shape: tuple, block_size: int | None) -> int:
+    if block_size:
+        return block_size
+    row = int(np.prod(shape[1:], dtype=np.int64)) or 1
+    return max(1, _BLOCK_ELEMENTS // row)
+
+
+def _copy_coordinate(src: netCDF4.Variable, out: netCDF4.Dataset) -> None:
+    """Copy a coordinate variable's stored values and attributes verbatim."""
+    attrs = {key: src.getncattr(key) for key in src.ncattrs()}
+    fill = attrs.pop("_FillValue", None)
+    var = out.createVariable(src.name, src.dtype, src.dimensions, fill_value=fill)
+    var.set_auto_maskandscale(False)
+    var.setncatts(attrs)
+    var[:] = src[:]
+
+
+def write_diff_fields(
+    path: str,
+    file_a: str,
+    file_b: str,
+    ds_a: xr.Dataset,
+    ds_b: xr.Dataset,
+    names: list[str],
+    block_size: int | None = None,
+    mask: bool = False,
+) -> list[str]:
+    """Write ``ds_b[name] - ds_a[name]`` for each of ``names`` to ``path``.
+
+    Each variable must have the same dims and shape in both datasets.
+    Differences are NaN wherever either input is fill; with ``mask`` a
+    ``<name>_both_valid`` byte variable records where both are valid.
+    The difference is stored as float32 unless an input needs float64.
+    Returns the names written.
+    """
+    with netCDF4.Dataset(file_a) as src, netCDF4.Dataset(path, "w") as out:
+        src.set_auto_maskandscale(False)
+        out.setncatts(
+            {
+                "title": "Difference fields (B - A)",
+                "file_a": file_a,
+                "file_b": file_b,
+            }
+        )
+        for name in names:
+            var_a, var_b = ds_a[name], ds_b[name]
+            for dim, size in zip(var_a.dims, var_a.shape):
+                if dim not in out.dimensions:
+                    out.createDimension(dim, size)
+                    if dim in src.variables and src.variables[dim].dimensions == (dim,):
+                        _copy_coordinate(src.variables[dim], out)
+
+            rows = _rows_per_block(var_a.shape, block_size)
+            chunks = (min(rows, var_a.shape[0]), *var_a.shape[1:])
+            dtype = np.result_type(var_a.dtype, var_b.dtype, np.float32)
+            diff = out.createVariable(
+                name,
+                dtype,
+                var_a.dims,
+                fill_value=dtype.type(np.nan),
+                chunksizes=chunks,
+                **_COMPRESSION,
+            )
+            attrs = {
+                "long_name": f"{var_a.attrs.get('long_name', name)} difference (B - A)"
+            }
+            if "units" in var_a.attrs:
+                attrs["units"] = var_a.attrs["units"]
+            diff.setncatts(attrs)
+            valid_out = None
+            if mask:
+                valid_out = out.createVariable(
+                    f"{name}_both_valid", "i1", var_a.dims, chunksizes=chunks, **_COMPRESSION
+                )
+                valid_out.setncatts(
+                    {
+                        "long_name": f"{name} valid in both files",
+                        "flag_values": np.array([0, 1], dtype=np.int8),
+                        "flag_meanings": "not_both_valid both_valid",
+                    }
+                )
+
+            start = 0
+            for block_a, block_b in zip(iter_blocks(var_a, rows), iter_blocks(var_b, rows)):
+                both_valid = valid_mask(block_a) & valid_mask(block_b)
+                block = np.full(block_a.shape, np.nan, dtype=dtype)
+                np.subtract(block_b, block_a, out=block, where=both_valid, dtype=dtype)
+                stop = start + block.shape[0]
+                diff[start:stop] = block
+                if valid_out is not None:
+                    valid_out[start:stop] = both_valid.astype(np.int8)
+                start = stop
+    return list(names)
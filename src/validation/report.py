@@ -1,5 +1,6 @@
 """Plain-text report formatting for comparison results."""
 
+from validation.batch import BatchSummary, PairResult
 from validation.comparators.base import ComparisonReport, VariableComparison
 
 
@@ -9,7 +10,8 @@ def format_report(report: ComparisonReport) -> str:
 
     # Header
     lines.append("=" * 72)
-    lines.append(f"Altimetry Product Comparison Report  [{report.product_type}]")
+    mode = "  (metadata only)" if report.metadata_only else ""
+    lines.append(f"Altimetry Product Comparison Report  [{report.product_type}]{mode}")
     lines.append("=" * 72)
     lines.append(f"  File A: {report.file_a}")
     lines.append(f"  File B: {report.file_b}")
@@ -45,17 +47,27 @@ def format_report(report: ComparisonReport) -> str:
         lines.append(f"  Only in A: {', '.join(only_a)}")
     if only_b:
         lines.append(f"  Only in B: {', '.join(only_b)}")
+    if report.skipped_variables:
+        lines.append(
+            f"  Not selected ({len(report.skipped_variables)}): "
+            f"{', '.join(report.skipped_variables)}"
+        )
     lines.append("")
 
     # Per-variable statistics
-    lines.append("--- Per-Variable Statistics ---")
+    if report.metadata_only:
+        lines.append("--- Per-Variable Metadata ---")
+    else:
+        lines.append("--- Per-Variable Statistics ---")
     for vc in report.variable_comparisons:
         lines.append(_format_variable(vc))
     lines.append("")
 
     # Quality summary
     lines.append("--- Quality Summary ---")
-    if report.quality_summary:
+    if report.metadata_only:
+        lines.append("  Skipped (metadata only).")
+    elif report.quality_summary:
         for key, value in report.quality_summary.items():
             lines.append(f"  {key}:")
             if key == "ssha_agreement" and isinstance(value, dict):
@@ -63,6 +75,17 @@ def format_report(report: ComparisonReport) -> str:
                 pct = value["pct_within_threshold"]
                 pct_str = f"{pct}%" if pct is not None else "N/A"
                 lines.append(f"    threshold: {t} m  |  pct_within: {pct_str}")
+                for threshold, pct in value.get("curve", {}).items():
+                    pct_str = f"{pct}%" if pct is not None else "N/A"
+                    lines.append(f"      <= {threshold:g} m: {pct_str}")
+            elif isinstance(value, dict) and "transitions" in value:
+                lines.extend(_format_flags(value))
+            elif key == "ssha_tiles" and isinstance(value, dict):
+                lines.extend(_format_tiles(value))
+            elif key == "ssha_basins" and isinstance(value, dict):
+                lines.extend(_format_basins(value))
+            elif key.startswith("ssha_by_") and isinstance(value, dict):
+                lines.extend(_format_groups(key.removeprefix("ssha_by_"), value))
             elif isinstance(value, dict):
                 for side, data in value.items():
                     lines.append(f"    {side}: {data}")
@@ -81,6 +104,84 @@ def format_report(report: ComparisonReport) -> str:
     return "\n".join(lines)
 
 
+def format_first_difference(file_a: str, file_b: str, difference: str | None) -> str:
+    """Format the outcome of a fail-fast comparison."""
+    lines = [f"  File A: {file_a}", f"  File B: {file_b}"]
+    if difference is None:
+        lines.append("RESULT: FILES MATCH")
+    else:
+        lines.append(f"  First difference: {difference}")
+        lines.append("RESULT: DIFFERENCES FOUND")
+    return "\n".join(lines)
+
+
+def format_pair_result(result: PairResult) -> str:
+    """Format one batch pair result as a single status line."""
+    if result.error is not None:
+        return f"ERROR  {result.key}: {result.error}"
+    if not result.has_differences:
+        return f"MATCH  {result.key}"
+    details = []
+    if result.dimension_diffs:
+        details.append(f"dims={result.dimension_diffs}")
+    if result.global_attr_diffs:
+        details.append(f"global_attrs={result.global_attr_diffs}")
+    if result.layout_diffs:
+        details.append(f"var_metadata={result.layout_diffs}")
+    if result.max_abs_diffs:
+        worst = max(result.max_abs_diffs, key=result.max_abs_diffs.get)
+        details.append(
+            f"vars={len(result.max_abs_diffs)}  "
+            f"worst={worst} ({result.max_abs_diffs[worst]:.6g})"
+        )
+    suffix = "  " + "  ".join(details) if details else ""
+    return f"DIFF   {result.key}{suffix}"
+
+
+def format_batch_summary(summary: BatchSummary) -> str:
+    """Format the roll-up of a batch run."""
+    lines: list[str] = []
+    lines.append("=" * 72)
+    lines.append("Batch Summary")
+    lines.append("=" * 72)
+    lines.append(
+        f"  Pairs: {summary.total}  |  Match: {summary.matched}  |  "
+        f"Differ: {summary.different}  |  Failed: {summary.failed}"
+    )
+    if summary.unpaired_a:
+        lines.append(f"  Unpaired in A: {len(summary.unpaired_a)}")
+        for path in summary.unpaired_a:
+            lines.append(f"    {path}")
+    if summary.unpaired_b:
+        lines.append(f"  Unpaired in B: {len(summary.unpaired_b)}")
+        for path in summary.unpaired_b:
+            lines.append(f"    {path}")
+    if summary.variable_diff_counts:
+        lines.append("  Variables with differences:")
+        for name in sorted(summary.variable_diff_counts):
+            lines.append(
+                f"    {name}: pairs={summary.variable_diff_counts[name]}  "
+                f"worst_max_abs={summary.variable_worst_diff[name]:.6g}"
+            )
+    if summary.quantile_sketches:
+        lines.append("  Quantiles over all files (merged sketches):")
+        for name in sorted(summary.quantile_sketches):
+            lines.append(f"    {name}:")
+            for side, sketch in sorted(summary.quantile_sketches[name].items()):
+                values = sketch.quantile(summary.quantiles)
+                quantiles = dict(zip(summary.quantiles, values.tolist()))
+                lines.append(
+                    f"      {side.upper()}: n={sketch.count}  {_format_quantiles(quantiles)}"
+                    f"  (rank error <= {sketch.rank_error:.2%})"
+                )
+    lines.append("")
+    if summary.has_differences:
+        lines.append("RESULT: DIFFERENCES FOUND")
+    else:
+        lines.append("RESULT: ALL PAIRS MATCH")
+    return "\n".join(lines)
+
+
 def _format_variable(vc: VariableComparison) -> str:
     """Format a single variable comparison block."""
     parts = [f"\n  {vc.name}:"]
@@ -102,19 +203,39 @@ def _format_variable(vc: VariableComparison) -> str:
                     f"       min={stats['min']:.6g}  max={stats['max']:.6g}  "
                     f"mean={stats['mean']:.6g}  std={stats['std']:.6g}"
                 )
+                if stats.get("quantiles"):
+                    error = stats.get("quantile_rank_error")
+                    approx = f"  (rank error <= {error:.2%})" if error else ""
+                    parts.append(
+                        "       "
+                        + _format_quantiles(stats["quantiles"])
+                        + approx
+                    )
 
     if vc.diff:
         d = vc.diff
-        if d.get("max_abs_diff") is not None:
+        if d.get("raw_identical"):
+            parts.append("    Diff: bit-identical stored data")
+        elif d.get("exact_equal"):
+            parts.append("    Diff: packed values exactly equal")
+        elif d.get("max_abs_diff") is not None:
             r_str = f"  r={d['pearson_r']:.4f}" if d.get("pearson_r") is not None else ""
+            packed_str = "  (packed)" if d.get("packed") else ""
+            if d.get("regridded"):
+                packed_str += f"  (regridded: {d['regridded']})"
             parts.append(
                 f"    Diff: max_abs={d['max_abs_diff']:.6g}  "
                 f"mean_abs={d['mean_abs_diff']:.6g}  rmsd={d['rmsd']:.6g}  "
-                f"bias={d['bias']:.6g}{r_str}"
+                f"bias={d['bias']:.6g}{r_str}{packed_str}"
             )
         else:
             parts.append("    Diff: no overlapping valid data")
 
+    if vc.layout_diffs:
+        parts.append("    Layout diffs:")
+        for prop, val_a, val_b in vc.layout_diffs:
+            parts.append(f"      {prop}: A={_truncate(val_a)} | B={_truncate(val_b)}")
+
     if vc.attr_diffs:
         parts.append("    Attribute diffs:")
         for attr, val_a, val_b in vc.attr_diffs:
@@ -123,6 +244,83 @@ def _format_variable(vc: VariableComparison) -> str:
     return "\n".join(parts)
 
 
+def _format_quantiles(quantiles: dict[float, float]) -> str:
+    return "  ".join(f"p{q * 100:g}={value:.6g}" for q, value in quantiles.items())
+
+
+def _format_flags(entry: dict) -> list[str]:
+    """Format the per-file histograms and transitions of one flag."""
+    lines = []
+    for side in ("a", "b"):
+        dist = entry[side]
+        lines.append(
+            f"    {side}: good={dist['good']}  bad={dist['bad']}  "
+            f"total={dist['total']}  values={dist['histogram']}"
+        )
+        for i, column in enumerate(dist.get("columns", [])):
+            lines.append(f"       column {i}: {column}")
+    transitions = entry["transitions"]
+    if transitions is None:
+        lines.append("    transitions: shapes differ")
+        return lines
+    lines.append(f"    transitions: {transitions['changed']} changed")
+    values = transitions["values"]
+    for i, row in enumerate(transitions["counts"]):
+        for j, count in enumerate(row):
+            if i != j and count:
+                lines.append(f"      {values[i]} -> {values[j]}: {count}")
+    return lines
+
+
+def _format_groups(name: str, groups: dict, worst: int = 5) -> list[str]:
+    """Format a grouped diff as its group count and the worst groups by rmsd."""
+    lines = [f"    groups: {len(groups['keys'])}"]
+    order = sorted(range(len(groups["keys"])), key=lambda i: -groups["rmsd"][i])
+    if order:
+        lines.append("    worst by rmsd:")
+    for i in order[:worst]:
+        lines.append(
+            f"      {name} {groups['keys'][i]}: n={groups['count'][i]}  "
+            f"bias={groups['bias'][i]:.6g}  rmsd={groups['rmsd'][i]:.6g}  "
+            f"max_abs={groups['max_abs'][i]:.6g}"
+        )
+    return lines
+
+
+def _format_tiles(tiles: dict) -> list[str]:
+    """Format the tile grid size and the worst tiles by rmsd."""
+    rows, cols = tiles["map"].shape
+    lines = [f"    {tiles['tile_size']:g} deg tiles: {rows} x {cols}"]
+    if tiles["worst"]:
+        lines.append("    worst by rmsd:")
+    for tile in tiles["worst"]:
+        lines.append(
+            f"      lat={tile['lat']:g} lon={tile['lon']:g}: n={tile['count']}  "
+            f"coverage={tile['coverage_pct']}%  bias={tile['bias']:.6g}  "
+            f"rmsd={tile['rmsd']:.6g}  pct_within={tile['pct_within']}%"
+        )
+    return lines
+
+
+def _format_basins(summary: dict) -> list[str]:
+    """Format per-basin stats of each file and of the diff, one basin per line."""
+    lines = []
+    for i, basin in enumerate(summary["basins"]):
+        parts = []
+        for side in ("a", "b"):
+            stats = summary[side]
+            if stats is not None and stats["count"][i]:
+                parts.append(
+                    f"{side}: n={stats['count'][i]} mean={stats['mean'][i]:.6g} "
+                    f"std={stats['std'][i]:.6g}"
+                )
+        diff = summary["diff"]
+        if diff is not None and diff["count"][i]:
+            parts.append(f"bias={diff['bias'][i]:.6g} rmsd={diff['rmsd'][i]:.6g}")
+        lines.append(f"    basin {basin}: " + ("  ".join(parts) or "no data"))
+    return lines
+
+
 def _truncate(value, max_len: int = 80) -> str:
     """Truncate a value's string representation for display."""
     s = str(value) if value is not None else "<missing>"
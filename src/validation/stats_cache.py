@@ -0,0 +1,162 @@
+"""Persistent on-disk cache of per-file variable statistics.
+
+Entries live in a single SQLite database and are keyed by a fingerprint
+of the file (absolute path, size, mtime and a sampled content hash), so
+a file that is rewritten, even in place, misses the cache.  The database
+is bounded in size and evicts least-recently-used entries.
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+# Bump whenever the layout or meaning of cached stats changes.
+_SCHEMA_VERSION = 6
+
+# Bytes hashed from each of the head, middle and tail of a file.
+_HASH_SAMPLE = 1 << 20
+
+_DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def default_cache_dir() -> str:
+    """Return ``$XDG_CACHE_HOME/altimetry-validation`` (or ``~/.cache/...``)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "altimetry-validation")
+
+
+def file_fingerprint(path: str) -> str:
+    """Fingerprint ``path`` from its metadata and a sampled content hash.
+
+    Only three fixed-size samples (head, middle, tail) are read, so the
+    cost is independent of the file size.
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\0".encode())
+    with open(path, "rb") as fh:
+        for offset in (0, st.st_size // 2, st.st_size - _HASH_SAMPLE):
+            fh.seek(max(0, offset))
+            h.update(fh.read(_HASH_SAMPLE))
+    return h.hexdigest()
+
+
+@dataclass
+class FileSummary:
+    """Single-file parts of a report that can be reused across runs.
+
+    ``stats`` holds ``compute_variable_stats`` results, which include the
+    valid/fill counts summarising each variable's mask; ``digests`` holds
+    raw-data digests used to detect bit-identical variables.
+    """
+
+    stats: dict[str, dict] = field(default_factory=dict)
+    digests: dict[str, str] = field(default_factory=dict)
+
+
+class StatsCache:
+    """Size-bounded LRU cache of ``FileSummary`` objects in SQLite.
+
+    Each operation opens its own connection, so an instance can be
+    shared between threads and pickled to worker processes.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Directory holding the database; defaults to ``default_cache_dir()``.
+    max_bytes : int
+        Upper bound on the total size of cached payloads.
+    """
+
+    def __init__(self, directory: str | None = None, max_bytes: int = _DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.path = os.path.join(self.directory, "stats.sqlite")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, commit on success and always close it."""
+        os.makedirs(self.directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    " key TEXT PRIMARY KEY,"
+                    " path TEXT NOT NULL,"
+                    " payload BLOB NOT NULL,"
+                    " nbytes INTEGER NOT NULL,"
+                    " last_access REAL NOT NULL)"
+                )
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _key(path: str, variant: str) -> str:
+        return f"v{_SCHEMA_VERSION}:{variant}:{file_fingerprint(path)}"
+
+    def load(self, path: str, variant: str = "") -> FileSummary | None:
+        """Return the cached summary of ``path``, or None on a miss.
+
+        ``variant`` separates summaries computed in different modes (e.g.
+        exact vs sketch-based medians) for the same file.
+        """
+        key = self._key(path, variant)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+        return pickle.loads(row[0])
+
+    def store(self, path: str, summary: FileSummary, variant: str = "") -> None:
+        """Cache ``summary`` for ``path``, merging with any existing entry."""
+        existing = self.load(path, variant)
+        if existing is not None:
+            existing.stats.update(summary.stats)
+            existing.digests.update(summary.digests)
+            summary = existing
+        payload = pickle.dumps(summary, protocol=pickle.HIGHEST_PROTOCOL)
+        key = self._key(path, variant)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, os.path.abspath(path), payload, len(payload), time.time()),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least-recently-used entries until under ``max_bytes``."""
+        (total,) = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT key, nbytes FROM entries ORDER BY last_access ASC"
+        ).fetchall()
+        for key, nbytes in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= nbytes
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            (count,) = conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return count
@@ -5,6 +5,12 @@ import pytest
 import xarray as xr
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache_home(tmp_path, monkeypatch):
+    """Keep the CLI's persistent stats cache out of the user's home."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg-cache"))
+
+
 @pytest.fixture
 def along_track_ds():
     """Create a synthetic along-track dataset."""
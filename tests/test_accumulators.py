@@ -0,0 +1,143 @@
+"""Tests for analysis.accumulators and analysis.chunked modules."""
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from validation.analysis.accumulators import (
+    DiffAccumulator,
+    QuantileSketch,
+    StatsAccumulator,
+)
+from validation.analysis.chunked import compute_chunked_diff, compute_chunked_stats
+from validation.analysis.statistics import compute_variable_diff, compute_variable_stats
+
+
+class TestStatsAccumulator:
+    def test_merge_matches_single_pass(self):
+        rng = np.random.default_rng(1)
+        data = rng.normal(size=1000)
+        data[::7] = np.nan
+        whole = StatsAccumulator()
+        whole.update(data)
+        left, right = StatsAccumulator(), StatsAccumulator()
+        left.update(data[:333])
+        right.update(data[333:])
+        left.merge(right)
+        assert left.count == whole.count
+        assert left.nan_count == whole.nan_count
+        assert left.mean == pytest.approx(whole.mean, rel=1e-12)
+        assert left.m2 == pytest.approx(whole.m2, rel=1e-12)
+        assert (left.min, left.max) == (whole.min, whole.max)
+
+
+class TestDiffAccumulator:
+    def test_merge_matches_single_pass(self):
+        rng = np.random.default_rng(2)
+        a = rng.normal(size=500)
+        b = a + rng.normal(scale=0.1, size=500)
+        valid = np.ones(500, dtype=bool)
+        whole = DiffAccumulator()
+        whole.update(a, b, valid)
+        left, right = DiffAccumulator(), DiffAccumulator()
+        left.update(a[:100], b[:100], valid[:100])
+        right.update(a[100:], b[100:], valid[100:])
+        left.merge(right)
+        for key, value in whole.result().items():
+            assert left.result()[key] == pytest.approx(value, rel=1e-10)
+
+
+class TestQuantileSketch:
+    def test_exact_when_small(self):
+        data = np.arange(101, dtype=np.float64)
+        sketch = QuantileSketch(k=200)
+        sketch.update(data)
+        assert sketch.exact
+        assert sketch.quantile(0.5)[0] == 50.0
+
+    def test_approximate_when_large(self):
+        rng = np.random.default_rng(3)
+        data = rng.uniform(size=200_000)
+        sketch = QuantileSketch(k=200)
+        for block in np.array_split(data, 37):
+            sketch.update(block)
+        assert not sketch.exact
+        assert sketch.count == data.size
+        est = sketch.quantile([0.05, 0.5, 0.95])
+        assert np.allclose(est, [0.05, 0.5, 0.95], atol=0.02)
+
+    @pytest.mark.parametrize("k", [50, 200])
+    def test_rank_error_bound_across_merges(self, k):
+        rng = np.random.default_rng(k)
+        data = rng.lognormal(size=120_000)
+        # One sketch per "file", each fed in blocks, then merged.
+        merged = QuantileSketch(k, seed=0)
+        for seed, part in enumerate(np.array_split(data, 6), start=1):
+            sketch = QuantileSketch(k, seed=seed)
+            for block in np.array_split(part, 5):
+                sketch.update(block)
+            merged.merge(sketch)
+        assert merged.count == data.size
+        qs = np.linspace(0.01, 0.99, 99)
+        ranks = np.searchsorted(np.sort(data), merged.quantile(qs)) / data.size
+        assert np.max(np.abs(ranks - qs)) <= merged.rank_error
+
+    @pytest.mark.parametrize("k", [50, 200])
+    def test_rank_error_bound_across_many_merges(self, k):
+        # Default seeds come from each part's values, as for per-file
+        # sketches merged into a batch summary.
+        rng = np.random.default_rng(k + 1)
+        data = rng.normal(size=100_000)
+        merged = QuantileSketch(k)
+        for part in np.array_split(data, 100):
+            sketch = QuantileSketch(k)
+            sketch.update(part)
+            merged.merge(sketch)
+        qs = np.linspace(0.001, 0.999, 999)
+        ranks = np.searchsorted(np.sort(data), merged.quantile(qs)) / data.size
+        assert np.max(np.abs(ranks - qs)) <= merged.rank_error
+        single = QuantileSketch(k)
+        single.update(data)
+        assert merged.rank_error > single.rank_error
+
+    def test_affine(self):
+        sketch = QuantileSketch(k=20)
+        sketch.update(np.arange(1000, dtype=np.float64))
+        flipped = sketch.affine(-2.0, 1.0)
+        assert flipped.count == sketch.count
+        assert flipped.quantile(0.25)[0] == pytest.approx(
+            -2.0 * sketch.quantile(0.75)[0] + 1.0, abs=2 * 1000 * sketch.rank_error
+        )
+
+
+class TestChunked:
+    def test_stats_match_in_memory(self):
+        rng = np.random.default_rng(4)
+        data = rng.normal(size=(12, 8))
+        data[3, :] = np.nan
+        var = xr.DataArray(data)
+        chunked = compute_chunked_stats(var, block_size=7)
+        full = compute_variable_stats(var)
+        for key in ("min", "max", "median", "valid_count", "nan_count"):
+            assert chunked[key] == full[key]
+        assert chunked["mean"] == pytest.approx(full["mean"], rel=1e-12)
+        assert chunked["std"] == pytest.approx(full["std"], rel=1e-12)
+
+    def test_diff_matches_in_memory(self):
+        rng = np.random.default_rng(5)
+        a = xr.DataArray(rng.normal(size=(25, 4)))
+        b = xr.DataArray(a.values + rng.normal(scale=0.01, size=(25, 4)))
+        chunked = compute_chunked_diff(a, b, block_size=3)
+        full = compute_variable_diff(a, b)
+        for key, value in full.items():
+            assert chunked[key] == pytest.approx(value, rel=1e-10)
+
+    def test_shape_mismatch(self):
+        a = xr.DataArray(np.zeros(3))
+        b = xr.DataArray(np.zeros(4))
+        assert compute_chunked_diff(a, b, block_size=2) is None
+
+    @pytest.mark.parametrize("block_size", [0, -1])
+    def test_non_positive_block_size(self, block_size):
+        with pytest.raises(ValueError):
+            compute_chunked_stats(xr.DataArray(np.zeros(3)), block_size=block_size)
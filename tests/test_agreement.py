@@ -0,0 +1,36 @@
+"""Tests for analysis.agreement module."""
+
+import numpy as np
+import pytest
+
+from validation.analysis.agreement import AgreementCounter
+
+
+class TestAgreementCounter:
+    def test_matches_per_threshold_passes(self):
+        rng = np.random.default_rng(0)
+        abs_diff = np.abs(rng.normal(scale=0.05, size=10_000))
+        abs_diff[:10] = 0.02  # exactly on a threshold: counted as within
+        thresholds = [0.1, 0.01, 0.02, 0.05, 0.05]
+        counter = AgreementCounter(thresholds)
+        counter.update(abs_diff)
+        curve = counter.pct_within()
+        assert list(curve) == [0.01, 0.02, 0.05, 0.1]
+        for t, pct in curve.items():
+            assert pct == pytest.approx(round(np.mean(abs_diff <= t) * 100, 2))
+
+    def test_merge(self):
+        abs_diff = np.linspace(0, 1, 101)
+        whole = AgreementCounter([0.25, 0.5])
+        whole.update(abs_diff)
+        left = AgreementCounter([0.25, 0.5])
+        left.update(abs_diff[:40])
+        right = AgreementCounter([0.25, 0.5])
+        right.update(abs_diff[40:])
+        left.merge(right)
+        assert left.pct_within() == whole.pct_within() == {0.25: 25.74, 0.5: 50.5}
+
+    def test_empty(self):
+        counter = AgreementCounter([0.05])
+        counter.update(np.empty(0))
+        assert counter.pct_within() == {0.05: None}
@@ -0,0 +1,56 @@
+"""Tests for analysis.alignment module."""
+
+import numpy as np
+
+from validation.analysis.alignment import align_times
+
+
+class TestAlignTimes:
+    def test_identical(self):
+        t = np.arange(5, dtype=np.float64)
+        alignment = align_times(t, t)
+        assert alignment.identity
+        assert alignment.summary() == {
+            "matched": 5,
+            "a_only": 0,
+            "b_only": 0,
+            "tolerance": 0.0,
+        }
+
+    def test_dropped_and_inserted_records(self):
+        time_a = np.array([0.0, 1.0, 2.0, 3.0, 4.0])
+        time_b = np.array([0.0, 1.0, 3.0, 3.5, 4.0])
+        alignment = align_times(time_a, time_b)
+        assert alignment.index_a.tolist() == [0, 1, 3, 4]
+        assert alignment.index_b.tolist() == [0, 1, 2, 4]
+        assert (alignment.a_only, alignment.b_only) == (1, 1)
+        assert not alignment.identity
+
+    def test_tolerance(self):
+        time_a = np.array([0.0, 10.0, 20.0])
+        time_b = np.array([20.4, 0.2, 10.6])
+        assert align_times(time_a, time_b).matched == 0
+        alignment = align_times(time_a, time_b, tolerance=0.5)
+        assert alignment.index_a.tolist() == [0, 2]
+        assert alignment.index_b.tolist() == [1, 0]
+
+    def test_closest_claim_wins(self):
+        time_a = np.array([0.0, 0.9, 1.2])
+        time_b = np.array([1.0])
+        alignment = align_times(time_a, time_b, tolerance=1.0)
+        assert alignment.index_a.tolist() == [1]
+        assert alignment.index_b.tolist() == [0]
+
+    def test_datetime64_tolerance_in_seconds(self):
+        base = np.datetime64("2025-01-01T00:00:00", "ns")
+        time_a = base + np.array([0, 1, 2], dtype="timedelta64[s]")
+        time_b = time_a + np.timedelta64(300, "ms")
+        assert align_times(time_a, time_b).matched == 0
+        assert align_times(time_a, time_b, tolerance=0.5).matched == 3
+
+    def test_missing_times_never_match(self):
+        time_a = np.array([0.0, np.nan, 2.0])
+        time_b = np.array([np.nan, 0.0, 2.0])
+        alignment = align_times(time_a, time_b)
+        assert alignment.index_a.tolist() == [0, 2]
+        assert alignment.index_b.tolist() == [1, 2]
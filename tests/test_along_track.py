@@ -4,6 +4,7 @@ import numpy as np
 import pytest
 import xarray as xr
 
+from validation.analysis.cache import VariableCache
 from validation.comparators.along_track import AlongTrackComparator
 
 
@@ -114,6 +115,19 @@ class TestAlongTrackPercentiles:
         pcts = report.quality_summary["ssha_percentiles"]
         assert pcts["b"]["p50"] == pytest.approx(pcts["a"]["p50"] + 0.5, abs=1e-5)
 
+    def test_configured_quantiles_shared_with_stats(self, along_track_ds, tmp_path):
+        path_a = tmp_path / "a.nc"
+        along_track_ds.to_netcdf(path_a)
+
+        comp = AlongTrackComparator(str(path_a), str(path_a), quantiles=[0.99, 0.001])
+        report = comp.run()
+        pcts = report.quality_summary["ssha_percentiles"]["a"]
+        assert list(pcts) == ["p0.1", "p5", "p25", "p50", "p75", "p95", "p99"]
+        expected = np.quantile(along_track_ds["ssha"].values, 0.99)
+        assert pcts["p99"] == pytest.approx(expected, abs=1e-6)
+        ssha = next(vc for vc in report.variable_comparisons if vc.name == "ssha")
+        assert ssha.stats_a["quantiles"][0.99] == pytest.approx(expected)
+
 
 class TestAlongTrackQuality:
     def test_quality_counts(self, along_track_ds, tmp_path):
@@ -131,3 +145,276 @@ class TestAlongTrackQuality:
         assert quality["nasa_flag"]["a"]["bad"] == 0
         assert quality["nasa_flag"]["b"]["good"] == 90
         assert quality["nasa_flag"]["b"]["bad"] == 10
+
+    def test_flag_histograms_and_transitions(self, along_track_ds, tmp_path):
+        ds_b = along_track_ds.copy(deep=True)
+        ds_b["nasa_flag"].values[:10] = 1
+        ds_b["source_flag"].values[:4, 2] = 3
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        quality = AlongTrackComparator(str(path_a), str(path_b)).run().quality_summary
+        nasa = quality["nasa_flag"]
+        assert nasa["b"]["histogram"] == {0: 90, 1: 10}
+        assert nasa["transitions"] == {
+            "values": [0, 1],
+            "counts": [[90, 10], [0, 0]],
+            "changed": 10,
+        }
+        source = quality["source_flag"]
+        assert source["b"]["columns"] == [{0: 100}, {0: 100}, {0: 96, 3: 4}]
+        assert source["transitions"]["changed"] == 4
+
+
+class TestAlongTrackGrouped:
+    def _pair(self, along_track_ds, tmp_path):
+        ds_a = along_track_ds.copy(deep=True)
+        ds_a["pass"].values[:] = np.arange(100) // 10
+        ds_a["cycle"].values[50:] = 43
+        ds_b = ds_a.copy(deep=True)
+        ds_b["ssha"].values[30:40] += 0.5
+        ds_b["ssha"].values[35] += 1.0
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        ds_a.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+        return str(path_a), str(path_b)
+
+    def test_per_pass_and_cycle(self, along_track_ds, tmp_path):
+        quality = AlongTrackComparator(*self._pair(along_track_ds, tmp_path)).run().quality_summary
+        by_pass = quality["ssha_by_pass"]
+        assert by_pass["keys"] == list(range(10))
+        assert by_pass["count"] == [10] * 10
+        assert by_pass["bias"][3] == pytest.approx(0.6)
+        assert by_pass["max_abs"][3] == pytest.approx(1.5)
+        assert by_pass["rmsd"][4] == 0.0
+        by_cycle = quality["ssha_by_cycle"]
+        assert by_cycle["keys"] == [42, 43]
+        assert by_cycle["count"] == [50, 50]
+        assert by_cycle["bias"] == pytest.approx([0.12, 0.0])
+
+    def test_block_wise_matches(self, along_track_ds, tmp_path):
+        pair = self._pair(along_track_ds, tmp_path)
+        full = AlongTrackComparator(*pair).run().quality_summary
+        chunked = AlongTrackComparator(*pair, block_size=16).run().quality_summary
+        for key in ("ssha_by_pass", "ssha_by_cycle"):
+            assert chunked[key]["keys"] == full[key]["keys"]
+            assert chunked[key]["count"] == full[key]["count"]
+            assert chunked[key]["rmsd"] == pytest.approx(full[key]["rmsd"])
+            assert chunked[key]["max_abs"] == pytest.approx(full[key]["max_abs"])
+
+    def test_not_selected(self, along_track_pair):
+        report = AlongTrackComparator(*along_track_pair, variables=["ssha"]).run()
+        assert report.quality_summary["ssha_by_pass"] is None
+
+
+class TestAlongTrackBasins:
+    def test_per_basin_stats_and_diff(self, along_track_ds, tmp_path):
+        ds_a = along_track_ds.copy(deep=True)
+        ds_a["basin_flag"].values[:40, 0] = 1
+        ds_a["basin_flag"].values[30:, 2] = 1
+        ds_b = ds_a.copy(deep=True)
+        ds_b["ssha"].values[:10] += 0.4
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        ds_a.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        for kwargs in ({}, {"block_size": 16}):
+            basins = AlongTrackComparator(
+                str(path_a), str(path_b), **kwargs
+            ).run().quality_summary["ssha_basins"]
+            assert basins["basins"] == [0, 1, 2, 3, 4]
+            assert basins["a"]["count"] == [40, 0, 70, 0, 0]
+            assert basins["a"]["mean"][0] == pytest.approx(ds_a["ssha"].values[:40].mean())
+            assert basins["a"]["mean"][1] is None
+            assert basins["diff"]["bias"][0] == pytest.approx(0.1)
+            assert basins["diff"]["rmsd"][2] == pytest.approx(0.0, abs=1e-12)
+
+
+    def test_basin_flag_evicted_after_summary(self, along_track_pair):
+        comp = AlongTrackComparator(*along_track_pair)
+        ds_a, ds_b = comp.load_datasets()
+        comp.decoded("a", ds_a, "basin_flag")
+        comp.decoded("a", ds_a, "ssha")
+        assert comp.basin_summary(ds_a, ds_b) is not None
+        assert ("a", "basin_flag") not in comp.cache
+        assert ("a", "ssha") in comp.cache
+        comp.close_datasets()
+
+class TestAlongTrackAgreement:
+    def test_agreement_curve(self, along_track_ds, tmp_path):
+        ds_b = along_track_ds.copy(deep=True)
+        ds_b["ssha"].values[:10] += 0.03
+        ds_b["ssha"].values[10:30] += 0.08
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        for kwargs in ({}, {"block_size": 16}):
+            agreement = AlongTrackComparator(
+                str(path_a), str(path_b), thresholds=[0.01, 0.05, 0.1], **kwargs
+            ).run().quality_summary["ssha_agreement"]
+            assert agreement["threshold_m"] == 0.05
+            assert agreement["pct_within_threshold"] == 80.0
+            assert agreement["curve"] == {0.01: 70.0, 0.05: 80.0, 0.1: 100.0}
+
+    def test_single_threshold_by_default(self, along_track_pair):
+        agreement = AlongTrackComparator(*along_track_pair).run().quality_summary[
+            "ssha_agreement"
+        ]
+        assert agreement == {"threshold_m": 0.05, "pct_within_threshold": 100.0}
+
+
+class TestAlongTrackChunked:
+    def test_chunked_matches_in_memory(self, along_track_ds, tmp_path):
+        ds_b = along_track_ds.copy(deep=True)
+        ds_b["ssha"].values[5] += 0.25
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        full = AlongTrackComparator(str(path_a), str(path_b)).run()
+        chunked = AlongTrackComparator(str(path_a), str(path_b), block_size=16).run()
+        assert chunked.has_differences == full.has_differences
+        for vc_full, vc_chunk in zip(
+            full.variable_comparisons, chunked.variable_comparisons
+        ):
+            assert vc_chunk.name == vc_full.name
+            assert vc_chunk.stats_a["valid_count"] == vc_full.stats_a["valid_count"]
+            assert vc_chunk.diff["max_abs_diff"] == pytest.approx(
+                vc_full.diff["max_abs_diff"]
+            )
+
+    def test_approx_quantiles_stream_ssha_percentiles(
+        self, along_track_ds, tmp_path, monkeypatch
+    ):
+        path_a = tmp_path / "a.nc"
+        along_track_ds.to_netcdf(path_a)
+        decoded = []
+        original = VariableCache.get
+
+        def spy_get(self, label, var):
+            decoded.append(var.name)
+            return original(self, label, var)
+
+        monkeypatch.setattr(VariableCache, "get", spy_get)
+        comp = AlongTrackComparator(
+            str(path_a), str(path_a), block_size=16, approx_quantiles=True, sketch_k=32
+        )
+        report = comp.run()
+        assert "ssha" not in decoded
+        ssha = next(vc for vc in report.variable_comparisons if vc.name == "ssha")
+        assert ssha.stats_a["quantile_rank_error"] == ssha.stats_a["sketch"].rank_error
+        assert 0 < ssha.stats_a["quantile_rank_error"] < 1
+        assert ssha.stats_a["sketch"].count == 100
+        pcts = report.quality_summary["ssha_percentiles"]["a"]
+        assert pcts["p50"] == round(ssha.stats_a["quantiles"][0.5], 6)
+
+    def test_block_wise_percentiles_stream(self, along_track_ds, tmp_path, monkeypatch):
+        path_a = tmp_path / "a.nc"
+        along_track_ds.to_netcdf(path_a)
+        decoded = []
+        original = VariableCache.get
+
+        def spy_get(self, label, var):
+            decoded.append(var.name)
+            return original(self, label, var)
+
+        monkeypatch.setattr(VariableCache, "get", spy_get)
+        comp = AlongTrackComparator(str(path_a), str(path_a), block_size=16, sketch_k=32)
+        pcts = comp.run().quality_summary["ssha_percentiles"]["a"]
+        assert "ssha" not in decoded
+        assert 0 < pcts["rank_error"] < 1
+        assert set(pcts) == {"p5", "p25", "p50", "p75", "p95", "rank_error"}
+
+    def test_block_wise_flags_stream(self, along_track_ds, tmp_path, monkeypatch):
+        ds_b = along_track_ds.copy(deep=True)
+        ds_b["nasa_flag"].values[:30] = 1
+        ds_b["source_flag"].values[50:, 1] = 3
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        full = AlongTrackComparator(str(path_a), str(path_b)).run().quality_summary
+        decoded = []
+        original = VariableCache.get
+
+        def spy_get(self, label, var):
+            decoded.append(var.name)
+            return original(self, label, var)
+
+        monkeypatch.setattr(VariableCache, "get", spy_get)
+        chunked = AlongTrackComparator(
+            str(path_a), str(path_b), block_size=16
+        ).run().quality_summary
+        assert not set(decoded) & set(AlongTrackComparator.QUALITY_VARS)
+        for flag_var in AlongTrackComparator.QUALITY_VARS:
+            assert chunked[flag_var] == full[flag_var]
+        assert chunked["nasa_flag"]["transitions"]["changed"] == 30
+
+
+class TestAlongTrackTimeAlignment:
+    def test_dropped_record(self, along_track_ds, tmp_path):
+        ds_b = along_track_ds.drop_isel(time=10)
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        unaligned = AlongTrackComparator(str(path_a), str(path_b)).run()
+        ssha = next(vc for vc in unaligned.variable_comparisons if vc.name == "ssha")
+        assert ssha.diff is None
+
+        report = AlongTrackComparator(str(path_a), str(path_b), align_time=True).run()
+        assert report.quality_summary["time_alignment"] == {
+            "matched": 99,
+            "a_only": 1,
+            "b_only": 0,
+            "tolerance": 0.0,
+        }
+        for vc in report.variable_comparisons:
+            if vc.name in ("ssha", "source_flag", "basin_flag"):
+                assert vc.diff["aligned_records"] == 99
+                assert vc.diff["max_abs_diff"] == 0.0
+        assert report.quality_summary["nasa_flag"]["transitions"]["changed"] == 0
+
+    def test_block_wise_matches_in_memory(self, along_track_ds, tmp_path):
+        ds_b = along_track_ds.copy(deep=True)
+        ds_b["ssha"].values[40:60] += 0.1
+        ds_b["nasa_flag"].values[::7] = 2
+        ds_b = ds_b.drop_isel(time=[3, 4, 50])
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        full = AlongTrackComparator(str(path_a), str(path_b), align_time=True).run()
+        chunked = AlongTrackComparator(
+            str(path_a), str(path_b), align_time=True, block_size=16
+        ).run()
+        for vc_full, vc_chunk in zip(full.variable_comparisons, chunked.variable_comparisons):
+            if vc_full.diff is not None and "aligned_records" in vc_full.diff:
+                assert vc_chunk.diff["aligned_records"] == vc_full.diff["aligned_records"]
+                assert vc_chunk.diff["max_abs_diff"] == pytest.approx(
+                    vc_full.diff["max_abs_diff"]
+                )
+        full, chunked = full.quality_summary, chunked.quality_summary
+        assert chunked["nasa_flag"] == full["nasa_flag"]
+        assert chunked["ssha_agreement"] == full["ssha_agreement"]
+        assert chunked["ssha_by_pass"]["count"] == full["ssha_by_pass"]["count"]
+        assert chunked["ssha_basins"]["diff"]["bias"] == pytest.approx(
+            full["ssha_basins"]["diff"]["bias"]
+        )
+
+    def test_identical_times_use_fast_path(self, along_track_pair):
+        path_a, path_b = along_track_pair
+        report = AlongTrackComparator(path_a, path_b, align_time=True).run()
+        assert not report.has_differences
+        ssha = next(vc for vc in report.variable_comparisons if vc.name == "ssha")
+        assert ssha.diff["raw_identical"]
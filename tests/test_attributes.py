@@ -53,3 +53,8 @@ class TestCompareAttributes:
 
     def test_empty_dicts(self):
         assert compare_attributes({}, {}) == []
+
+    def test_nan_values_equal(self):
+        a = {"_FillValue": np.float64(np.nan), "valid": np.array([np.nan, 1.0])}
+        b = {"_FillValue": np.float64(np.nan), "valid": np.array([np.nan, 1.0])}
+        assert compare_attributes(a, b) == []
@@ -0,0 +1,44 @@
+"""Tests for analysis.basins module."""
+
+import numpy as np
+import pytest
+
+from validation.analysis.basins import basin_diffs, basin_stats, basin_sums
+
+
+class TestBasinSums:
+    def test_matches_loop(self):
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=(20, 30)).astype(np.float32)
+        valid = rng.random((20, 30)) > 0.2
+        membership = rng.integers(0, 2, size=(20, 30, 4)).astype(np.int32)
+        member_valid = np.ones(membership.shape, dtype=bool)
+        member_valid[0, :, 1] = False
+
+        stats = basin_stats(basin_sums(membership, member_valid, values, valid))
+        for k in range(4):
+            sel = valid & (membership[..., k] != 0) & member_valid[..., k]
+            assert stats["count"][k] == sel.sum()
+            assert stats["mean"][k] == pytest.approx(values[sel].mean(), rel=1e-6)
+            assert stats["std"][k] == pytest.approx(values[sel].std(), rel=1e-5)
+
+    def test_blocks_add_up(self):
+        rng = np.random.default_rng(1)
+        values = rng.normal(size=50)
+        valid = np.ones(50, dtype=bool)
+        membership = rng.integers(0, 2, size=(50, 3))
+        member_valid = np.ones(membership.shape, dtype=bool)
+        whole = basin_sums(membership, member_valid, values, valid)
+        parts = basin_sums(membership[:20], member_valid[:20], values[:20], valid[:20])
+        parts += basin_sums(membership[20:], member_valid[20:], values[20:], valid[20:])
+        np.testing.assert_allclose(parts, whole)
+
+    def test_empty_basin(self):
+        membership = np.zeros((4, 2), dtype=np.int8)
+        membership[:, 0] = 1
+        values = np.array([1.0, 2.0, 3.0, np.nan])
+        sums = basin_sums(membership, np.ones((4, 2), dtype=bool), values, np.isfinite(values))
+        diffs = basin_diffs(sums)
+        assert diffs["count"] == [3, 0]
+        assert diffs["bias"] == [2.0, None]
+        assert diffs["rmsd"][0] == pytest.approx(np.sqrt(14 / 3))
@@ -0,0 +1,261 @@
+"""Tests for batch comparison of many file pairs."""
+
+import pytest
+import xarray as xr
+
+import validation.batch as batch_mod
+from validation.batch import (
+    BatchSummary,
+    FilePair,
+    PairResult,
+    pair_directories,
+    read_manifest,
+    run_batch,
+    run_reference,
+)
+from validation.cli import main
+from validation.comparators.along_track import AlongTrackComparator
+
+
+@pytest.fixture
+def batch_dirs(along_track_ds, tmp_path):
+    """Three daily A files and three B files, one of which differs."""
+    dir_a = tmp_path / "a"
+    dir_b = tmp_path / "b"
+    dir_a.mkdir()
+    dir_b.mkdir()
+    for day in ("20240101", "20240102", "20240103"):
+        along_track_ds.to_netcdf(dir_a / f"prod_{day}_v1.nc")
+        ds_b = along_track_ds.copy(deep=True)
+        if day == "20240102":
+            ds_b["ssha"].values[0] += 1.0
+        ds_b.to_netcdf(dir_b / f"dev_{day}_v2.nc")
+    return str(dir_a), str(dir_b)
+
+
+class TestPairing:
+    def test_pair_by_name(self, tmp_path):
+        for sub in ("a", "b"):
+            (tmp_path / sub).mkdir()
+            (tmp_path / sub / "x.nc").touch()
+        (tmp_path / "a" / "only_a.nc").touch()
+        (tmp_path / "b" / "notes.txt").touch()
+        pairs, only_a, only_b = pair_directories(
+            str(tmp_path / "a"), str(tmp_path / "b")
+        )
+        assert [p.key for p in pairs] == ["x.nc"]
+        assert [p.split("/")[-1] for p in only_a] == ["only_a.nc"]
+        assert only_b == []
+
+    def test_pair_by_pattern(self, batch_dirs):
+        pairs, only_a, only_b = pair_directories(*batch_dirs, pattern=r"(\d{8})")
+        assert [p.key for p in pairs] == ["20240101", "20240102", "20240103"]
+        assert only_a == only_b == []
+
+    def test_duplicate_keys_rejected(self, tmp_path):
+        for sub in ("a", "b"):
+            (tmp_path / sub).mkdir()
+            (tmp_path / sub / "x_20200101_v1.nc").touch()
+        (tmp_path / "a" / "x_20200101_v2.nc").touch()
+        with pytest.raises(ValueError, match="x_20200101_v1.nc.*x_20200101_v2.nc"):
+            pair_directories(str(tmp_path / "a"), str(tmp_path / "b"), pattern=r"(\d{8})")
+        with pytest.raises(SystemExit) as exc:
+            main(
+                [
+                    "batch",
+                    str(tmp_path / "a"),
+                    str(tmp_path / "b"),
+                    "-t",
+                    "along_track",
+                    "--pattern",
+                    r"(\d{8})",
+                ]
+            )
+        assert exc.value.code == 2
+
+    def test_manifest(self, tmp_path):
+        manifest = tmp_path / "pairs.txt"
+        manifest.write_text("# comment\n/x/a1.nc /y/b1.nc\n\n/x/a2.nc,/y/b2.nc\n")
+        pairs = read_manifest(str(manifest))
+        assert pairs == [
+            FilePair("a1.nc", "/x/a1.nc", "/y/b1.nc"),
+            FilePair("a2.nc", "/x/a2.nc", "/y/b2.nc"),
+        ]
+
+    def test_manifest_bad_line(self, tmp_path):
+        manifest = tmp_path / "pairs.txt"
+        manifest.write_text("/x/a1.nc\n")
+        with pytest.raises(ValueError):
+            read_manifest(str(manifest))
+
+
+class TestRunBatch:
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_results_and_rollup(self, batch_dirs, jobs):
+        pairs, _, _ = pair_directories(*batch_dirs, pattern=r"(\d{8})")
+        results = list(run_batch(pairs, "along_track", jobs=jobs))
+        assert [r.key for r in results] == ["20240101", "20240102", "20240103"]
+        assert [r.has_differences for r in results] == [False, True, False]
+        assert results[1].max_abs_diffs["ssha"] == pytest.approx(1.0)
+
+        summary = BatchSummary()
+        for result in results:
+            summary.add(result)
+        assert (summary.matched, summary.different, summary.failed) == (2, 1, 0)
+        assert summary.variable_diff_counts == {"ssha": 1}
+        assert summary.quantile_sketches == {}
+
+    def test_unordered_yields_every_pair(self, batch_dirs):
+        pairs, _, _ = pair_directories(*batch_dirs, pattern=r"(\d{8})")
+        results = run_batch(pairs, "along_track", jobs=2, ordered=False)
+        assert sorted(r.key for r in results) == ["20240101", "20240102", "20240103"]
+
+    def test_error_is_captured(self, tmp_path):
+        pair = FilePair("missing", str(tmp_path / "a.nc"), str(tmp_path / "b.nc"))
+        (result,) = run_batch([pair], "along_track")
+        assert result.error is not None
+        summary = BatchSummary()
+        summary.add(result)
+        assert summary.failed == 1
+        assert summary.has_differences
+
+
+class TestBatchCLI:
+    def test_exit_code_and_output(self, batch_dirs, capsys):
+        rc = main(["batch", *batch_dirs, "-t", "along_track", "--pattern", r"(\d{8})"])
+        out = capsys.readouterr().out
+        assert rc == 1
+        assert "DIFF   20240102" in out
+        assert "Pairs: 3  |  Match: 2  |  Differ: 1  |  Failed: 0" in out
+
+    def test_approx_quantiles_rollup(self, batch_dirs, capsys):
+        main(
+            ["batch", *batch_dirs, "-t", "along_track", "--pattern", r"(\d{8})"]
+            + ["--approx-quantiles", "--sketch-k", "64", "--variables", "ssha"]
+        )
+        out = capsys.readouterr().out
+        assert "Quantiles over all files (merged sketches):" in out
+        assert "A: n=300  p5=" in out
+
+    def test_all_match(self, along_track_pair, tmp_path, capsys):
+        manifest = tmp_path / "pairs.txt"
+        manifest.write_text(" ".join(along_track_pair) + "\n")
+        rc = main(["batch", "--manifest", str(manifest), "-t", "along_track"])
+        assert rc == 0
+        assert "RESULT: ALL PAIRS MATCH" in capsys.readouterr().out
+
+
+class TestReference:
+    @pytest.fixture
+    def candidates(self, along_track_ds, tmp_path):
+        ref = tmp_path / "ref.nc"
+        along_track_ds.to_netcdf(ref)
+        paths = []
+        for i, shift in enumerate((0.0, 0.5, 0.0)):
+            ds = along_track_ds.copy(deep=True)
+            ds["ssha"].values[:] += shift
+            path = tmp_path / f"cand{i}.nc"
+            ds.to_netcdf(path)
+            paths.append(str(path))
+        return str(ref), paths
+
+    def test_reference_loaded_once(self, candidates, monkeypatch):
+        calls = []
+        original = batch_mod.load_reference
+        monkeypatch.setattr(
+            batch_mod,
+            "load_reference",
+            lambda path, **kwargs: calls.append(path) or original(path, **kwargs),
+        )
+        ref, paths = candidates
+        reports = list(batch_mod.run_reference(ref, paths, "along_track", jobs=2))
+        assert len(calls) == 1
+        assert [r.file_b for r in reports] == paths
+        assert [r.has_differences for r in reports] == [False, True, False]
+
+    def test_matches_pairwise_run(self, candidates):
+        ref, paths = candidates
+        (shared,) = run_reference(ref, paths[1:2], "along_track")
+        direct = AlongTrackComparator(ref, paths[1]).run()
+        for vc_s, vc_d in zip(shared.variable_comparisons, direct.variable_comparisons):
+            assert vc_s.stats_a == vc_d.stats_a
+            assert vc_s.diff == vc_d.diff
+        assert shared.quality_summary == direct.quality_summary
+
+    def test_block_wise_stats_match_candidates(self, candidates):
+        ref, paths = candidates
+        kwargs = {"block_size": 16, "sketch_k": 8}
+        (shared,) = run_reference(ref, paths[1:2], "along_track", comparator_kwargs=kwargs)
+        direct = AlongTrackComparator(ref, paths[1], **kwargs).run()
+        ssha_s = next(vc for vc in shared.variable_comparisons if vc.name == "ssha")
+        ssha_d = next(vc for vc in direct.variable_comparisons if vc.name == "ssha")
+        assert ssha_s.stats_a == ssha_d.stats_a
+        assert ssha_s.stats_a["quantile_rank_error"] is not None
+        assert ssha_s.stats_b == ssha_d.stats_b
+
+    def test_block_wise_reference_stays_lazy(self, candidates, monkeypatch):
+        ref, paths = candidates
+        reference = batch_mod.load_reference(ref, block_size=16)
+        assert reference.decoded == {}
+        assert not reference.ds["ssha"].variable._in_memory
+        opened = []
+        original = xr.open_dataset
+        monkeypatch.setattr(
+            xr, "open_dataset", lambda path, **kw: opened.append(path) or original(path, **kw)
+        )
+        for path in paths:
+            AlongTrackComparator(ref, path, block_size=16, reference=reference).run()
+        assert ref not in opened
+
+    def test_other_variant_recomputed(self, candidates):
+        ref, paths = candidates
+        reference = batch_mod.load_reference(ref)
+        shared = AlongTrackComparator(ref, paths[1], block_size=16, reference=reference).run()
+        direct = AlongTrackComparator(ref, paths[1], block_size=16).run()
+        for vc_s, vc_d in zip(shared.variable_comparisons, direct.variable_comparisons):
+            assert vc_s.stats_a == vc_d.stats_a
+
+    def test_process_pool(self, candidates):
+        ref, paths = candidates
+        reports = list(
+            run_reference(ref, paths, "along_track", jobs=2, processes=True)
+        )
+        assert [r.has_differences for r in reports] == [False, True, False]
+
+    def test_merged_sketches_count_reference_once(self, candidates):
+        ref, paths = candidates
+        kwargs = {"approx_quantiles": True, "sketch_k": 50}
+        summary = BatchSummary()
+        for report in run_reference(ref, paths, "along_track", comparator_kwargs=kwargs):
+            summary.add(batch_mod.condense_report(report.file_b, report))
+        ssha = summary.quantile_sketches["ssha"]
+        assert ssha["a"].count == 100
+        assert ssha["b"].count == 300
+
+    def test_multi_cli(self, candidates, capsys):
+        ref, paths = candidates
+        rc = main(["multi", ref, *paths, "-t", "along_track"])
+        out = capsys.readouterr().out
+        assert rc == 1
+        assert "Pairs: 3  |  Match: 2  |  Differ: 1  |  Failed: 0" in out
+
+    @pytest.mark.parametrize("jobs,processes", [(1, False), (2, False), (2, True)])
+    def test_missing_candidate_does_not_abort(self, candidates, tmp_path, jobs, processes):
+        ref, paths = candidates
+        missing = str(tmp_path / "missing.nc")
+        files = [paths[0], missing, paths[1]]
+        reports = list(
+            run_reference(ref, files, "along_track", jobs=jobs, processes=processes)
+        )
+        assert isinstance(reports[1], PairResult)
+        assert reports[1].file_b == missing
+        assert "FileNotFoundError" in reports[1].error
+        assert [r.has_differences for r in (reports[0], reports[2])] == [False, True]
+
+    def test_multi_cli_reports_failures(self, candidates, tmp_path, capsys):
+        ref, paths = candidates
+        rc = main(["multi", ref, paths[0], str(tmp_path / "missing.nc"), "-t", "along_track"])
+        out = capsys.readouterr().out
+        assert rc == 1
+        assert "Pairs: 2  |  Match: 1  |  Differ: 0  |  Failed: 1" in out
+        assert "FileNotFoundError" in out
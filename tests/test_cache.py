@@ -0,0 +1,88 @@
+"""Tests for analysis.cache module."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import xarray as xr
+
+import validation.analysis.cache as cache_mod
+from validation.analysis.cache import VariableCache
+from validation.comparators.simple_grid import SimpleGridComparator
+
+
+class TestVariableCache:
+    def test_decodes_once(self, monkeypatch):
+        calls = []
+        original = cache_mod.decode_variable
+        monkeypatch.setattr(
+            cache_mod,
+            "decode_variable",
+            lambda data: calls.append(1) or original(data),
+        )
+        var = xr.DataArray(np.array([1.0, np.nan, 3.0]), name="x")
+        cache = VariableCache()
+        first = cache.get("a", var)
+        second = cache.get("a", var)
+        assert first is second
+        assert len(calls) == 1
+        assert first.valid.tolist() == [True, False, True]
+
+    def test_evict_drops_both_sides(self):
+        var = xr.DataArray(np.zeros(3), name="x")
+        cache = VariableCache()
+        cache.get("a", var)
+        cache.get("b", var)
+        cache.get("a", var.rename("y"))
+        cache.evict("x")
+        assert ("a", "x") not in cache
+        assert ("b", "x") not in cache
+        assert ("a", "y") in cache
+
+    def test_run_decodes_each_variable_once(self, simple_grid_pair, monkeypatch):
+        seen = []
+        original = cache_mod.decode_variable
+        monkeypatch.setattr(
+            cache_mod,
+            "decode_variable",
+            lambda data: seen.append(data.shape) or original(data),
+        )
+        comp = SimpleGridComparator(*simple_grid_pair, raw_compare=False)
+        comp.run()
+        # ssha, counts and basin_flag, once per file
+        assert len(seen) == 6
+        assert len(comp.cache) == 0
+
+
+class TestPrefetch:
+    def test_prefetched_entry_is_reused(self, monkeypatch):
+        calls = []
+        original = cache_mod.decode_variable
+        monkeypatch.setattr(
+            cache_mod,
+            "decode_variable",
+            lambda data: calls.append(1) or original(data),
+        )
+        var = xr.DataArray(np.arange(4.0), name="x")
+        cache = VariableCache()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            cache.prefetch("a", var, pool)
+            cache.prefetch("a", var, pool)
+            decoded = cache.get("a", var)
+        assert len(calls) == 1
+        assert decoded.values.tolist() == [0.0, 1.0, 2.0, 3.0]
+
+    def test_evicted_variable_not_prefetched(self):
+        var = xr.DataArray(np.zeros(2), name="x")
+        cache = VariableCache()
+        cache.evict("x")
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            cache.prefetch("a", var, pool)
+        assert ("a", "x") not in cache
+
+    def test_read_ahead_matches_serial(self, simple_grid_pair):
+        serial = SimpleGridComparator(*simple_grid_pair, read_ahead=0).run()
+        ahead = SimpleGridComparator(*simple_grid_pair, read_ahead=3).run()
+        assert [vc.stats_a for vc in ahead.variable_comparisons] == [
+            vc.stats_a for vc in serial.variable_comparisons
+        ]
+        assert ahead.quality_summary == serial.quality_summary
@@ -1,6 +1,11 @@
 """Tests for the CLI entry point."""
 
+import numpy as np
+import pytest
+
+import validation.comparators.base as base_mod
 from validation.cli import main
+from validation.comparators.along_track import AlongTrackComparator
 
 
 class TestCLI:
@@ -59,3 +64,126 @@ class TestCLI:
         c2 = SimpleGridComparator(str(path_a), str(path_b), threshold=0.02)
         r2 = c2.run()
         assert r2.quality_summary["ssha_agreement"]["pct_within_threshold"] == 0.0
+
+    def test_align_time(self, along_track_ds, tmp_path, capsys):
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        along_track_ds.drop_isel(time=[3, 4]).to_netcdf(path_b)
+
+        rc = main([str(path_a), str(path_b), "-t", "along_track", "--align-time"])
+        assert rc == 1
+        out = capsys.readouterr().out
+        assert "time_alignment:" in out
+        assert "a_only: 2" in out
+
+    def test_align_time_rejected_for_grids(self, simple_grid_pair):
+        path_a, path_b = simple_grid_pair
+        with pytest.raises(SystemExit):
+            main([path_a, path_b, "-t", "simple_grid", "--align-time"])
+
+    def test_tile_size(self, simple_grid_pair, capsys):
+        rc = main([*simple_grid_pair, "-t", "simple_grid", "--tile-size", "30"])
+        assert rc == 0
+        assert "30 deg tiles: 6 x 12" in capsys.readouterr().out
+
+    def test_tile_size_rejected_for_along_track(self, along_track_pair):
+        with pytest.raises(SystemExit):
+            main([*along_track_pair, "-t", "along_track", "--tile-size", "5"])
+
+    def test_thresholds_range(self, simple_grid_pair, capsys):
+        rc = main(
+            [*simple_grid_pair, "-t", "simple_grid", "--thresholds", "0.01:0.03:0.01", "0.1"]
+        )
+        assert rc == 0
+        out = capsys.readouterr().out
+        for t in ("0.01", "0.02", "0.03", "0.05", "0.1"):
+            assert f"<= {t} m: 100.0%" in out
+
+    def test_thresholds_invalid_range(self, simple_grid_pair):
+        with pytest.raises(SystemExit):
+            main([*simple_grid_pair, "-t", "simple_grid", "--thresholds", "0.1:0.01:0.01"])
+
+    @pytest.mark.parametrize("block_size", ["0", "-1"])
+    def test_block_size_must_be_positive(self, along_track_pair, block_size):
+        with pytest.raises(SystemExit) as exc:
+            main([*along_track_pair, "-t", "along_track", "--block-size", block_size])
+        assert exc.value.code == 2
+
+    def test_comparator_rejects_non_positive_block_size(self, along_track_pair):
+        with pytest.raises(ValueError):
+            AlongTrackComparator(*along_track_pair, block_size=-1)
+
+
+class TestFailFast:
+    def test_identical(self, along_track_pair, capsys):
+        rc = main([*along_track_pair, "-t", "along_track", "--fail-fast"])
+        assert rc == 0
+        assert "RESULT: FILES MATCH" in capsys.readouterr().out
+
+    def test_dimension_mismatch_stops_before_data(
+        self, along_track_ds, tmp_path, capsys, monkeypatch
+    ):
+        ds_b = along_track_ds.isel(time=slice(0, 50))
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("variable data should not be compared")
+
+        monkeypatch.setattr(base_mod, "compute_variable_diff", fail)
+        monkeypatch.setattr(base_mod, "raw_digest", fail)
+        rc = main([str(path_a), str(path_b), "-t", "along_track", "--fail-fast"])
+        assert rc == 1
+        assert "First difference: dimension time: A=100 B=50" in capsys.readouterr().out
+
+    def test_value_difference(self, along_track_ds, tmp_path, capsys):
+        ds_b = along_track_ds.copy(deep=True)
+        ds_b["oer"].values[7] += 2.0
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        rc = main([str(path_a), str(path_b), "-t", "along_track", "--fail-fast"])
+        assert rc == 1
+        assert "variable oer values differ" in capsys.readouterr().out
+
+    def test_stops_before_hashing_larger_variables(
+        self, along_track_ds, tmp_path, capsys, monkeypatch
+    ):
+        ds_a = along_track_ds.assign(big=("x", np.zeros(10_000)))
+        ds_b = ds_a.copy(deep=True)
+        ds_b["oer"].values[7] += 2.0
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        ds_a.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+        hashed = []
+        original = base_mod.raw_digest
+
+        def spy(var, *args, **kwargs):
+            hashed.append(var.name)
+            return original(var, *args, **kwargs)
+
+        monkeypatch.setattr(base_mod, "raw_digest", spy)
+        rc = main([str(path_a), str(path_b), "-t", "along_track", "--fail-fast"])
+        assert rc == 1
+        assert "variable oer values differ" in capsys.readouterr().out
+        assert "oer" in hashed
+        assert "big" not in hashed
+
+    def test_agrees_with_full_report(self, along_track_ds, tmp_path):
+        ds_b = along_track_ds.copy()
+        ds_b.attrs["date_created"] = "2099-12-31"
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        args = [str(path_a), str(path_b), "-t", "along_track"]
+        assert main(args + ["--fail-fast"]) == main(args) == 1
+        ignore = ["--ignore-attrs", "date_created"]
+        assert main(args + ignore + ["--fail-fast"]) == main(args + ignore) == 0
@@ -0,0 +1,70 @@
+"""Tests for streaming difference-field output."""
+
+import netCDF4
+import numpy as np
+import xarray as xr
+
+from validation.cli import main
+from validation.comparators.along_track import AlongTrackComparator
+from validation.comparators.simple_grid import SimpleGridComparator
+
+
+class TestWriteDiff:
+    def test_grid_diff_blockwise(self, simple_grid_ds, tmp_path):
+        ds_a = simple_grid_ds.copy(deep=True)
+        ds_a["ssha"].attrs["units"] = "m"
+        ds_a["ssha"].values[0, :5] = np.nan
+        ds_b = ds_a.copy(deep=True)
+        ds_b["ssha"].values[50:60, :] += 0.2
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        ds_a.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+        out = tmp_path / "diff.nc"
+
+        comp = SimpleGridComparator(str(path_a), str(path_b), block_size=16)
+        written = comp.write_diff(str(out), mask=True)
+        assert written == ["basin_flag", "counts", "ssha"]
+
+        with xr.open_dataset(out) as diff:
+            expected = ds_b["ssha"].values - ds_a["ssha"].values
+            np.testing.assert_allclose(diff["ssha"].values, expected, equal_nan=True)
+            assert diff["ssha"].dtype == np.float64
+            assert diff["ssha"].attrs["units"] == "m"
+            np.testing.assert_array_equal(diff["latitude"].values, ds_a["latitude"].values)
+            assert diff["ssha_both_valid"].values[0, :5].tolist() == [0] * 5
+            assert int(diff["ssha_both_valid"].sum()) == 180 * 360 - 5
+            assert float(np.abs(diff["counts"]).max()) == 0.0
+        with netCDF4.Dataset(out) as nc:
+            assert nc["ssha"].filters()["zlib"]
+            assert nc["ssha"].chunking() == [16, 360]
+
+    def test_along_track_integer_and_time_coord(self, along_track_ds, tmp_path):
+        ds_b = along_track_ds.copy(deep=True)
+        ds_b["pass"].values[:3] += 2
+        ds_b["nasa_flag"].values[4] = 1
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+        out = tmp_path / "diff.nc"
+
+        comp = AlongTrackComparator(
+            str(path_a), str(path_b), variables=["pass", "nasa_flag"]
+        )
+        comp.write_diff(str(out))
+        with xr.open_dataset(out) as diff:
+            assert sorted(diff.data_vars) == ["nasa_flag", "pass"]
+            assert diff["pass"].dtype == np.float64
+            assert diff["nasa_flag"].dtype == np.float32
+            assert diff["pass"].values[:4].tolist() == [2, 2, 2, 0]
+            assert diff["nasa_flag"].values[4] == 1
+            np.testing.assert_array_equal(diff["time"].values, along_track_ds["time"].values)
+
+    def test_cli(self, simple_grid_pair, tmp_path, capsys):
+        out = tmp_path / "diff.nc"
+        rc = main([*simple_grid_pair, "-t", "simple_grid", "--diff-output", str(out)])
+        assert rc == 0
+        assert f"Wrote 3 difference fields to {out}" in capsys.readouterr().out
+        with xr.open_dataset(out) as diff:
+            assert float(np.abs(diff["ssha"]).max()) == 0.0
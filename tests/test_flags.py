@@ -0,0 +1,58 @@
+"""Tests for analysis.flags module."""
+
+import numpy as np
+
+from validation.analysis.flags import flag_distribution, flag_transitions
+
+
+class TestFlagDistribution:
+    def test_1d(self):
+        values = np.array([0, 0, 2, 5, 2, 127], dtype=np.int8)
+        valid = values != 127
+        dist = flag_distribution(values, valid)
+        assert dist == {
+            "good": 2,
+            "bad": 3,
+            "total": 5,
+            "histogram": {0: 2, 2: 2, 5: 1},
+        }
+
+    def test_2d_columns(self):
+        values = np.array([[0, 1], [0, 2], [3, 1]], dtype=np.int16)
+        valid = np.ones(values.shape, dtype=bool)
+        valid[2, 0] = False
+        dist = flag_distribution(values, valid)
+        assert dist["histogram"] == {0: 2, 1: 2, 2: 1}
+        assert dist["columns"] == [{0: 2}, {1: 2, 2: 1}]
+
+    def test_wide_bitmask_values(self):
+        values = np.array([0, 1 << 30, 1 << 30, -(1 << 20)], dtype=np.int64)
+        dist = flag_distribution(values, np.ones(4, dtype=bool))
+        assert dist["histogram"] == {-(1 << 20): 1, 0: 1, 1 << 30: 2}
+
+    def test_float_decoded_flags(self):
+        values = np.array([0.0, np.nan, 1.0])
+        dist = flag_distribution(values, np.isfinite(values))
+        assert dist["histogram"] == {0: 1, 1: 1}
+
+    def test_empty(self):
+        dist = flag_distribution(np.zeros((2, 3)), np.zeros((2, 3), dtype=bool))
+        assert dist["total"] == 0
+        assert dist["columns"] == [{}, {}, {}]
+
+
+class TestFlagTransitions:
+    def test_matrix(self):
+        a = np.array([0, 0, 4, 4, 9])
+        b = np.array([0, 4, 4, 0, 0])
+        valid = np.array([True, True, True, True, False])
+        result = flag_transitions(a, valid, b, np.ones(5, dtype=bool))
+        assert result == {
+            "values": [0, 4],
+            "counts": [[1, 1], [1, 1]],
+            "changed": 2,
+        }
+
+    def test_shape_mismatch(self):
+        ones = np.ones(3, dtype=bool)
+        assert flag_transitions(np.zeros(3), ones, np.zeros(4), np.ones(4, dtype=bool)) is None
@@ -0,0 +1,57 @@
+"""Tests for analysis.groups module."""
+
+import numpy as np
+import pytest
+
+from validation.analysis.groups import GroupedDiff
+
+
+def _loop_reference(keys, a, b, valid):
+    out = {}
+    for key in np.unique(keys[valid]):
+        sel = valid & (keys == key)
+        d = b[sel] - a[sel]
+        out[int(key)] = (sel.sum(), d.mean(), np.sqrt(np.mean(d * d)), np.abs(d).max())
+    return out
+
+
+class TestGroupedDiff:
+    def test_matches_loop(self):
+        rng = np.random.default_rng(0)
+        keys = rng.integers(0, 50, 2000).astype(np.int32)
+        a = rng.normal(size=2000).astype(np.float32)
+        b = a + rng.normal(scale=0.1, size=2000).astype(np.float32)
+        valid = rng.random(2000) > 0.1
+        result = GroupedDiff.from_arrays(keys, a, b, valid).result()
+        expected = _loop_reference(keys, a, b, valid)
+        assert result["keys"] == sorted(expected)
+        for i, key in enumerate(result["keys"]):
+            count, bias, rmsd, max_abs = expected[key]
+            assert result["count"][i] == count
+            assert result["bias"][i] == pytest.approx(bias, rel=1e-6, abs=1e-9)
+            assert result["rmsd"][i] == pytest.approx(rmsd, rel=1e-6)
+            assert result["max_abs"][i] == pytest.approx(max_abs, rel=1e-6)
+
+    def test_merge_equals_single_pass(self):
+        rng = np.random.default_rng(1)
+        keys = rng.integers(0, 7, 300)
+        a = rng.normal(size=300)
+        b = rng.normal(size=300)
+        valid = np.ones(300, dtype=bool)
+        whole = GroupedDiff.from_arrays(keys, a, b, valid).result()
+        parts = GroupedDiff.from_arrays(keys[:100], a[:100], b[:100], valid[:100])
+        parts = parts.merge(
+            GroupedDiff.from_arrays(keys[100:], a[100:], b[100:], valid[100:])
+        )
+        merged = parts.result()
+        assert merged["keys"] == whole["keys"]
+        assert merged["count"] == whole["count"]
+        assert merged["max_abs"] == whole["max_abs"]
+        np.testing.assert_allclose(merged["rmsd"], whole["rmsd"])
+        np.testing.assert_allclose(merged["bias"], whole["bias"], atol=1e-12)
+
+    def test_no_valid_data(self):
+        keys = np.arange(4)
+        a = np.zeros(4)
+        result = GroupedDiff.from_arrays(keys, a, a, np.zeros(4, dtype=bool)).result()
+        assert result == {"keys": [], "count": [], "bias": [], "rmsd": [], "max_abs": []}
@@ -0,0 +1,71 @@
+"""Tests for header-only (metadata) comparisons."""
+
+import xarray as xr
+
+from validation.analysis.header import compare_variable_layout, read_header
+from validation.cli import main
+from validation.comparators.along_track import AlongTrackComparator
+
+
+class TestReadHeader:
+    def test_contents(self, along_track_pair):
+        header = read_header(along_track_pair[0])
+        assert header.dimensions == {"time": 100, "src_flag_dim": 3, "basins": 5}
+        assert header.attrs["title"] == "Along-track test"
+        ssha = header.variables["ssha"]
+        assert ssha.dims == ("time",)
+        assert ssha.shape == (100,)
+        assert ssha.dtype == "float64"
+        assert ssha.compression == {}
+
+    def test_layout_diff(self, along_track_ds, tmp_path):
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        along_track_ds.to_netcdf(
+            path_b, encoding={"ssha": {"zlib": True, "complevel": 4, "chunksizes": (50,)}}
+        )
+        var_a = read_header(str(path_a)).variables["ssha"]
+        var_b = read_header(str(path_b)).variables["ssha"]
+        props = {d[0] for d in compare_variable_layout(var_a, var_b)}
+        assert "chunking" in props
+        assert "compression.zlib" in props
+        assert "compression.complevel" in props
+
+
+class TestRunMetadata:
+    def test_reads_no_data(self, along_track_pair, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("metadata-only mode must not open with xarray")
+
+        monkeypatch.setattr(xr, "open_dataset", fail)
+        report = AlongTrackComparator(*along_track_pair).run_metadata()
+        assert report.metadata_only
+        assert not report.has_differences
+        assert all(vc.stats_a is None for vc in report.variable_comparisons)
+
+    def test_dtype_drift(self, along_track_ds, tmp_path):
+        ds_b = along_track_ds.copy()
+        ds_b["cycle"] = ds_b["cycle"].astype("int16")
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        report = AlongTrackComparator(str(path_a), str(path_b)).run_metadata()
+        assert report.has_differences
+        cycle = next(vc for vc in report.variable_comparisons if vc.name == "cycle")
+        assert ("dtype", "int32", "int16") in cycle.layout_diffs
+
+    def test_netcdf3(self, along_track_ds, tmp_path):
+        path = tmp_path / "a.nc"
+        along_track_ds.to_netcdf(path, format="NETCDF3_64BIT")
+        assert read_header(str(path)).variables["ssha"].chunking == "contiguous"
+        report = AlongTrackComparator(str(path), str(path)).run_metadata()
+        assert not report.has_differences
+
+    def test_cli(self, along_track_pair, capsys):
+        rc = main([*along_track_pair, "-t", "along_track", "--metadata-only"])
+        out = capsys.readouterr().out
+        assert rc == 0
+        assert "(metadata only)" in out
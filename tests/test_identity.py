@@ -0,0 +1,83 @@
+"""Tests for the raw-byte identity fast path."""
+
+import numpy as np
+import pytest
+import xarray as xr
+
+import validation.analysis.cache as cache_mod
+from validation.analysis.identity import identical_diff, raw_digest
+from validation.analysis.statistics import compute_variable_diff, compute_variable_stats
+from validation.comparators.along_track import AlongTrackComparator
+
+
+class TestRawDigest:
+    def test_equal_for_equal_data(self):
+        a = xr.DataArray(np.arange(10, dtype=np.int16))
+        assert raw_digest(a) == raw_digest(a.copy())
+        assert raw_digest(a, block_size=3) == raw_digest(a, block_size=3)
+
+    def test_decoding_attrs_matter(self):
+        a = xr.DataArray(np.arange(10, dtype=np.int16), attrs={"scale_factor": 0.01})
+        b = a.copy()
+        b.attrs["scale_factor"] = 0.02
+        assert raw_digest(a) != raw_digest(b)
+
+    def test_non_numeric(self):
+        assert raw_digest(xr.DataArray(np.array(["a", "b"]))) is None
+
+
+class TestIdenticalDiff:
+    @pytest.mark.parametrize(
+        "data",
+        [
+            np.array([1.0, 2.0, np.nan, 4.0]),
+            np.array([3.0, 3.0, 3.0]),
+            np.array([5.0]),
+            np.array([np.nan, np.nan]),
+        ],
+    )
+    def test_matches_full_diff(self, data):
+        var = xr.DataArray(data)
+        expected = compute_variable_diff(var, var.copy())
+        result = identical_diff(compute_variable_stats(var))
+        result.pop("raw_identical", None)
+        assert result == expected
+
+
+class TestFastPath:
+    def test_identical_files_skip_decoding(self, along_track_pair, monkeypatch):
+        decoded = []
+        original = cache_mod.decode_variable
+        monkeypatch.setattr(
+            cache_mod,
+            "decode_variable",
+            lambda data: decoded.append(data.shape) or original(data),
+        )
+        report = AlongTrackComparator(*along_track_pair).run()
+        assert not report.has_differences
+        # A is decoded for its stats; B only for the flag summaries, since
+        # the ssha percentiles reuse the per-variable stats.
+        comp = AlongTrackComparator(*along_track_pair)
+        n_vars = len(comp.get_expected_variables())
+        assert len(decoded) == n_vars + len(comp.QUALITY_VARS)
+        ssha = next(vc for vc in report.variable_comparisons if vc.name == "ssha")
+        assert ssha.diff["raw_identical"] is True
+        assert ssha.stats_b == ssha.stats_a
+
+    def test_matches_slow_path(self, along_track_ds, tmp_path):
+        ds_b = along_track_ds.copy(deep=True)
+        ds_b["dac"].values[3] += 0.5
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        along_track_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        fast = AlongTrackComparator(str(path_a), str(path_b)).run()
+        slow = AlongTrackComparator(str(path_a), str(path_b), raw_compare=False).run()
+        for vc_f, vc_s in zip(fast.variable_comparisons, slow.variable_comparisons):
+            assert vc_f.stats_b == vc_s.stats_b
+            diff_f = dict(vc_f.diff or {})
+            diff_f.pop("raw_identical", None)
+            assert diff_f == pytest.approx(vc_s.diff or {})
+        dac = next(vc for vc in fast.variable_comparisons if vc.name == "dac")
+        assert "raw_identical" not in dac.diff
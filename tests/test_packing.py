@@ -0,0 +1,107 @@
+"""Tests for packed-integer comparison without CF decoding."""
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from validation.analysis.packing import (
+    Packing,
+    compute_packed_diff,
+    compute_packed_stats,
+    packing_of,
+)
+from validation.comparators.along_track import AlongTrackComparator
+
+ENCODING = {"dtype": "int16", "scale_factor": 0.001, "add_offset": 0.5, "_FillValue": -32768}
+
+
+class TestPackingOf:
+    def test_packed_integer(self):
+        var = xr.DataArray(
+            np.zeros(3, dtype=np.int16),
+            attrs={"scale_factor": 0.01, "_FillValue": np.int16(-1)},
+        )
+        assert packing_of(var) == Packing(scale=0.01, offset=0.0, fills=(-1,))
+
+    @pytest.mark.parametrize(
+        "data, attrs",
+        [
+            (np.zeros(3, dtype=np.int16), {"_FillValue": -1}),
+            (np.zeros(3, dtype=np.float32), {"scale_factor": 0.01}),
+            (np.zeros(3, dtype=np.int8), {"scale_factor": 0.01, "_Unsigned": "true"}),
+        ],
+    )
+    def test_not_packed(self, data, attrs):
+        assert packing_of(xr.DataArray(data, attrs=attrs)) is None
+
+
+class TestPackedMetrics:
+    packing = Packing(scale=-0.5, offset=10.0, fills=(-9,))
+
+    def test_stats_in_physical_units(self):
+        var = xr.DataArray(np.array([0, 2, -9, 4, 6], dtype=np.int16))
+        physical = np.array([10.0, 9.0, 8.0, 7.0])
+        for block_size in (None, 2):
+            stats = compute_packed_stats(var, self.packing, block_size)
+            assert stats["valid_count"] == 4
+            assert stats["nan_count"] == 1
+            assert stats["min"] == physical.min()
+            assert stats["max"] == physical.max()
+            assert stats["mean"] == pytest.approx(physical.mean())
+            assert stats["median"] == pytest.approx(np.median(physical))
+            assert stats["std"] == pytest.approx(physical.std())
+
+    def test_exact_diff(self):
+        a = xr.DataArray(np.array([0, 2, -9, 4], dtype=np.int16))
+        b = xr.DataArray(np.array([0, 4, -9, 4], dtype=np.int16))
+        diff = compute_packed_diff(a, b, self.packing)
+        assert diff["exact_equal"] is False
+        assert diff["max_abs_diff"] == 1.0
+        assert diff["bias"] == pytest.approx(-1.0 / 3.0)
+        assert compute_packed_diff(a, a.copy(), self.packing)["exact_equal"] is True
+
+    def test_mask_difference_is_not_exact(self):
+        a = xr.DataArray(np.array([0, 2, -9], dtype=np.int16))
+        b = xr.DataArray(np.array([0, 2, 2], dtype=np.int16))
+        diff = compute_packed_diff(a, b, self.packing, block_size=2)
+        assert diff["max_abs_diff"] == 0.0
+        assert diff["exact_equal"] is False
+
+
+@pytest.fixture
+def packed_pair(along_track_ds, tmp_path):
+    ds_a = along_track_ds.copy(deep=True)
+    ds_a["ssha"].values[3] = np.nan
+    ds_b = ds_a.copy(deep=True)
+    ds_b["ssha"].values[10] += 0.25
+    path_a = tmp_path / "a.nc"
+    path_b = tmp_path / "b.nc"
+    ds_a.to_netcdf(path_a, encoding={"ssha": ENCODING})
+    ds_b.to_netcdf(path_b, encoding={"ssha": ENCODING})
+    return str(path_a), str(path_b)
+
+
+class TestComparatorPacked:
+    @pytest.mark.parametrize("block_size", [None, 16])
+    def test_matches_decoded_path(self, packed_pair, block_size):
+        kwargs = {"raw_compare": False, "block_size": block_size}
+        decoded = AlongTrackComparator(*packed_pair, **kwargs).run()
+        packed = AlongTrackComparator(*packed_pair, packed_compare=True, **kwargs).run()
+        vc_d = {vc.name: vc for vc in decoded.variable_comparisons}["ssha"]
+        vc_p = {vc.name: vc for vc in packed.variable_comparisons}["ssha"]
+        assert vc_p.diff["packed"] is True
+        assert vc_p.diff["exact_equal"] is False
+        assert vc_p.diff["max_abs_diff"] == pytest.approx(0.25, abs=1e-9)
+        for key in ("max_abs_diff", "mean_abs_diff", "rmsd", "bias", "pearson_r"):
+            assert vc_p.diff[key] == pytest.approx(vc_d.diff[key], rel=1e-5)
+        for key in ("min", "max", "mean", "std", "valid_count", "nan_count"):
+            assert vc_p.stats_a[key] == pytest.approx(vc_d.stats_a[key], rel=1e-5)
+
+    def test_identical_packed_values_match(self, packed_pair):
+        path_a, _ = packed_pair
+        comp = AlongTrackComparator(path_a, path_a, raw_compare=False, packed_compare=True)
+        report = comp.run()
+        vc = {vc.name: vc for vc in report.variable_comparisons}["ssha"]
+        assert vc.diff["exact_equal"] is True
+        assert not report.has_differences
+        assert comp.find_first_difference() is None
@@ -0,0 +1,76 @@
+"""Tests for analysis.regrid module."""
+
+import numpy as np
+import pytest
+
+from validation.analysis.regrid import regrid_plan
+
+
+def _centres(start, stop, step):
+    return np.arange(start + step / 2, stop, step)
+
+
+class TestBlockAveraging:
+    def test_nan_aware_mean(self):
+        fine_lat, fine_lon = _centres(0, 4, 1), _centres(0, 6, 1)
+        lat, lon = _centres(0, 4, 2), _centres(0, 6, 3)
+        plan = regrid_plan(fine_lat, fine_lon, lat, lon)
+        assert plan.method == "block"
+        assert (plan.lat.ratio, plan.lon.ratio) == (2, 3)
+
+        values = np.arange(24, dtype=np.float32).reshape(4, 6)
+        values[0, 0] = np.nan
+        values[2:, 3:] = np.nan
+        out, valid = plan.apply(values, np.isfinite(values))
+        assert out.shape == (2, 2)
+        assert out[0, 0] == pytest.approx(np.nanmean(values[:2, :3]))
+        assert out[0, 1] == pytest.approx(values[:2, 3:].mean())
+        assert not valid[1, 1] and np.isnan(out[1, 1])
+
+    def test_opposite_directions(self):
+        fine_lat, fine_lon = _centres(0, 4, 1)[::-1], _centres(0, 6, 1)
+        lat, lon = _centres(0, 4, 2), _centres(0, 6, 3)[::-1]
+        plan = regrid_plan(fine_lat, fine_lon, lat, lon)
+        assert plan.method == "block"
+        assert plan.lat.reverse and plan.lon.reverse
+
+        field = 2 * fine_lat[:, None] + 0.5 * fine_lon[None, :]
+        out, _ = plan.apply(field, np.ones(field.shape, dtype=bool))
+        np.testing.assert_allclose(out, 2 * lat[:, None] + 0.5 * lon[None, :])
+
+    def test_degenerate_axis(self):
+        assert regrid_plan(_centres(0, 2, 1), _centres(0, 2, 1), [1.0], [1.0, 1.5]) is None
+
+    def test_counts_weighted(self):
+        plan = regrid_plan(
+            _centres(0, 4, 1), _centres(0, 4, 1), _centres(0, 4, 2), _centres(0, 4, 2)
+        )
+        values = np.array([[1.0, 2.0], [3.0, 4.0]]).repeat(2, 0).repeat(2, 1)
+        values[0, 0] = 10.0
+        weights = np.ones((4, 4))
+        weights[0, 0] = 5
+        out, _ = plan.apply(values, np.ones((4, 4), dtype=bool), weights)
+        assert out[0, 0] == pytest.approx((10 * 5 + 1 * 3) / 8)
+
+
+class TestInterpolation:
+    def test_linear_field_is_exact_and_plan_cached(self):
+        src_lat, src_lon = _centres(-10, 10, 0.75), _centres(0, 30, 0.75)
+        lat, lon = _centres(-9, 9, 1.0), _centres(1, 29, 1.0)
+        plan = regrid_plan(src_lat, src_lon, lat, lon)
+        assert plan.method == "interp"
+        assert regrid_plan(src_lat.copy(), src_lon, lat, lon) is plan
+
+        field = 2 * src_lat[:, None] + 0.5 * src_lon[None, :]
+        out, valid = plan.apply(field, np.ones(field.shape, dtype=bool))
+        assert valid.all()
+        np.testing.assert_allclose(out, 2 * lat[:, None] + 0.5 * lon[None, :])
+
+    def test_outside_and_missing(self):
+        src = _centres(0, 5, 1)
+        plan = regrid_plan(src, src, np.array([-3.0, 1.0, 2.5]), np.array([0.5, 1.0]))
+        values = np.ones((5, 5))
+        values[1, :] = np.nan
+        out, valid = plan.apply(values, np.isfinite(values))
+        assert not valid[0].any()  # outside the source latitudes
+        assert valid[1].all() and out[1, 0] == 1.0  # renormalised past the NaN row
@@ -0,0 +1,110 @@
+"""Tests for variable subset selection."""
+
+import pytest
+
+import validation.comparators.base as base_mod
+from validation.analysis.cache import VariableCache
+from validation.analysis.selection import select_names
+from validation.batch import run_reference
+from validation.cli import main
+from validation.comparators.along_track import AlongTrackComparator
+from validation.report import format_report
+
+NAMES = ["ssha", "ssha_smoothed", "dac", "nasa_flag", "basin_flag", "extra"]
+
+
+class TestSelectNames:
+    def test_default_selects_everything(self):
+        selected, skipped = select_names(NAMES)
+        assert selected == sorted(NAMES)
+        assert skipped == []
+
+    def test_include_globs(self):
+        selected, skipped = select_names(NAMES, include=["ssha*", "dac"])
+        assert selected == ["dac", "ssha", "ssha_smoothed"]
+        assert skipped == ["basin_flag", "extra", "nasa_flag"]
+
+    def test_exclude_wins_over_include(self):
+        selected, _ = select_names(NAMES, include=["*"], exclude=["*_flag", "ssha_*"])
+        assert selected == ["dac", "extra", "ssha"]
+
+    def test_restrict_to(self):
+        selected, skipped = select_names(NAMES, restrict_to=["ssha", "dac", "missing"])
+        assert selected == ["dac", "ssha"]
+        assert "extra" in skipped
+
+
+@pytest.fixture
+def flag_changed_pair(along_track_ds, tmp_path):
+    ds_b = along_track_ds.copy(deep=True)
+    ds_b["basin_flag"].values[:] = 1
+    ds_b["source_flag"].values[:] = 1
+    path_a = tmp_path / "a.nc"
+    path_b = tmp_path / "b.nc"
+    along_track_ds.to_netcdf(path_a)
+    ds_b.to_netcdf(path_b)
+    return str(path_a), str(path_b)
+
+
+class TestComparatorSelection:
+    def test_unselected_variables_are_not_read(self, flag_changed_pair, monkeypatch):
+        decoded, hashed = [], []
+        original_get = VariableCache.get
+        original_digest = base_mod.raw_digest
+
+        def spy_get(self, label, var):
+            decoded.append(var.name)
+            return original_get(self, label, var)
+
+        def spy_digest(var, *args):
+            hashed.append(var.name)
+            return original_digest(var, *args)
+
+        monkeypatch.setattr(VariableCache, "get", spy_get)
+        monkeypatch.setattr(base_mod, "raw_digest", spy_digest)
+        comp = AlongTrackComparator(*flag_changed_pair, variables=["ssha*"])
+        report = comp.run()
+
+        assert [vc.name for vc in report.variable_comparisons] == ["ssha", "ssha_smoothed"]
+        assert set(decoded) | set(hashed) <= {"ssha", "ssha_smoothed"}
+        assert "basin_flag" in report.skipped_variables
+        assert report.quality_summary["nasa_flag"] == {"a": None, "b": None}
+        assert not report.has_differences
+        assert "Not selected (8): basin_flag" in format_report(report)
+
+    def test_exclude_and_expected_only(self, flag_changed_pair):
+        comp = AlongTrackComparator(
+            *flag_changed_pair,
+            exclude_variables=["*_flag"],
+            expected_only=True,
+        )
+        report = comp.run()
+        names = {vc.name for vc in report.variable_comparisons}
+        assert names == {"ssha", "ssha_smoothed", "dac", "cycle", "pass", "oer"}
+        assert not report.has_differences
+
+    def test_fail_fast_and_metadata_only(self, flag_changed_pair):
+        comp = AlongTrackComparator(*flag_changed_pair, exclude_variables=["*_flag"])
+        assert comp.find_first_difference() is None
+        report = comp.run_metadata()
+        assert "basin_flag" in report.skipped_variables
+        assert "ssha" in {vc.name for vc in report.variable_comparisons}
+
+    def test_reference_loads_only_selected(self, flag_changed_pair):
+        ref_path, candidate = flag_changed_pair
+        (report,) = run_reference(
+            ref_path,
+            [candidate],
+            "along_track",
+            comparator_kwargs={"variables": ["ssha"]},
+        )
+        assert [vc.name for vc in report.variable_comparisons] == ["ssha"]
+        assert not report.has_differences
+
+
+class TestCLISelection:
+    def test_exclude_variables(self, flag_changed_pair):
+        args = [*flag_changed_pair, "-t", "along_track"]
+        assert main(args) == 1
+        assert main(args + ["--exclude-variables", "basin_flag", "source_flag"]) == 0
+        assert main(args + ["--variables", "ssha", "--fail-fast"]) == 0
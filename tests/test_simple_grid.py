@@ -1,8 +1,10 @@
 """Tests for the SimpleGridComparator."""
 
 import numpy as np
+import pytest
 import xarray as xr
 
+from validation.analysis.cache import VariableCache
 from validation.comparators.simple_grid import SimpleGridComparator
 
 
@@ -146,3 +148,222 @@ class TestSimpleGridQuality:
         # With all fill values, counts should report None for stats
         counts_q = report.quality_summary["counts"]["a"]
         assert counts_q["min"] is None
+
+    def test_per_basin_stats_and_diff(self, simple_grid_ds, tmp_path):
+        ds_a = simple_grid_ds.copy(deep=True)
+        ds_a["basin_flag"].values[:90, :, 1] = 1  # southern hemisphere
+        ds_a["basin_flag"].values[:, :180, 3] = 1
+        ds_a["ssha"].values[0, 0] = np.nan
+        ds_b = ds_a.copy(deep=True)
+        ds_b["ssha"].values[:90, :] += 0.25
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        ds_a.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        basins = SimpleGridComparator(str(path_a), str(path_b)).run().quality_summary[
+            "ssha_basins"
+        ]
+        assert basins["a"]["count"] == [0, 90 * 360 - 1, 0, 180 * 180 - 1, 0]
+        south = ds_a["ssha"].values[:90]
+        assert basins["a"]["mean"][1] == pytest.approx(np.nanmean(south))
+        assert basins["b"]["mean"][1] == pytest.approx(np.nanmean(south) + 0.25)
+        assert basins["diff"]["bias"][1] == pytest.approx(0.25)
+        assert basins["diff"]["bias"][3] == pytest.approx(0.125, rel=1e-3)
+        assert basins["diff"]["rmsd"][0] is None
+
+
+class TestSimpleGridAreaWeighted:
+    def test_polar_difference_is_downweighted(self, simple_grid_ds, tmp_path):
+        ds_b = simple_grid_ds.copy(deep=True)
+        ds_b["ssha"].values[:10, :] += 1.0  # latitudes -90..-81
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        simple_grid_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        report = SimpleGridComparator(str(path_a), str(path_b)).run()
+        weighted = report.quality_summary["ssha_area_weighted"]
+        ssha = next(vc for vc in report.variable_comparisons if vc.name == "ssha")
+        weights = np.cos(np.deg2rad(simple_grid_ds["latitude"].values.astype(float)))
+        expected_bias = weights[:10].sum() / weights.sum()
+        assert weighted["diff"]["bias"] == pytest.approx(expected_bias, rel=1e-6)
+        assert weighted["diff"]["bias"] < ssha.diff["bias"]
+        assert weighted["diff"]["pct_within_threshold"] == pytest.approx(
+            100 * (1 - expected_bias), abs=0.01
+        )
+        assert weighted["b"]["mean"] - weighted["a"]["mean"] == pytest.approx(
+            expected_bias, rel=1e-6
+        )
+
+
+def _grid(step, field=None, counts=None):
+    lat = np.arange(-30 + step / 2, 30, step)
+    lon = np.arange(step / 2, 60, step)
+    if field is None:
+        field = lambda la, lo: 0.01 * la[:, None] + 0.02 * lo[None, :]  # noqa: E731
+    data = {"ssha": (["latitude", "longitude"], field(lat, lon))}
+    if counts is not None:
+        data["counts"] = (["latitude", "longitude"], counts)
+    return xr.Dataset(data, coords={"latitude": lat, "longitude": lon})
+
+
+class TestSimpleGridRegrid:
+    def test_integer_ratio_block_average(self, tmp_path):
+        coarse = _grid(1.0)
+        fine = _grid(1 / 3)
+        fine["ssha"].values[:3, :3] = np.nan  # one coarse cell loses all its data
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        coarse.to_netcdf(path_a)
+        fine.to_netcdf(path_b)
+
+        report = SimpleGridComparator(str(path_a), str(path_b)).run()
+        ssha = next(vc for vc in report.variable_comparisons if vc.name == "ssha")
+        assert ssha.diff["regridded"] == "b block 3x3 -> a"
+        assert ssha.diff["max_abs_diff"] == pytest.approx(0.0, abs=1e-12)
+        assert report.quality_summary["ssha_agreement"]["pct_within_threshold"] == 100.0
+        assert any(d[0] == "latitude" for d in report.dimension_diffs)
+
+    def test_descending_latitude_block_average(self, tmp_path):
+        coarse = _grid(1.0)
+        fine = _grid(1 / 3).isel(latitude=slice(None, None, -1))
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        coarse.to_netcdf(path_a)
+        fine.to_netcdf(path_b)
+
+        report = SimpleGridComparator(str(path_a), str(path_b)).run()
+        ssha = next(vc for vc in report.variable_comparisons if vc.name == "ssha")
+        assert ssha.diff["regridded"] == "b block 3x3 -> a"
+        assert ssha.diff["max_abs_diff"] == pytest.approx(0.0, abs=1e-12)
+
+    def test_counts_weighting(self, tmp_path):
+        coarse = _grid(1.0, field=lambda la, lo: np.zeros((la.size, lo.size)))
+        counts = np.ones((120, 120), dtype=np.int32)
+        counts[::2, ::2] = 3
+        fine = _grid(
+            0.5,
+            field=lambda la, lo: np.where(counts == 3, 1.0, 0.0),
+            counts=counts,
+        )
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        coarse.to_netcdf(path_a)
+        fine.to_netcdf(path_b)
+
+        report = SimpleGridComparator(str(path_a), str(path_b)).run()
+        ssha = next(vc for vc in report.variable_comparisons if vc.name == "ssha")
+        assert ssha.diff["bias"] == pytest.approx(0.5)  # 3 / (3 + 1 + 1 + 1)
+
+    def test_non_integer_ratio_interpolates(self, tmp_path):
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        _grid(1.0).to_netcdf(path_a)
+        _grid(0.75).to_netcdf(path_b)
+
+        report = SimpleGridComparator(str(path_a), str(path_b)).run()
+        ssha = next(vc for vc in report.variable_comparisons if vc.name == "ssha")
+        assert ssha.diff["regridded"] == "b interp -> a (point samples, not area means)"
+        assert ssha.diff["max_abs_diff"] == pytest.approx(0.0, abs=1e-9)
+
+    def test_skipped_block_wise(self, tmp_path):
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        _grid(1.0).to_netcdf(path_a)
+        _grid(1 / 3).to_netcdf(path_b)
+
+        report = SimpleGridComparator(str(path_a), str(path_b), block_size=16).run()
+        ssha = next(vc for vc in report.variable_comparisons if vc.name == "ssha")
+        assert ssha.diff is None
+        assert report.quality_summary["ssha_agreement"] is None
+
+
+class TestSimpleGridTiles:
+    def test_localized_regression_ranks_first(self, simple_grid_ds, tmp_path):
+        ds_b = simple_grid_ds.copy(deep=True)
+        ds_b["ssha"].values[100:110, 200:210] += 0.3  # lat 10..19, lon 200..209
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        simple_grid_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        report = SimpleGridComparator(str(path_a), str(path_b), tile_size=10).run()
+        tiles = report.quality_summary["ssha_tiles"]
+        assert tiles["map"].shape == (18, 36)
+        worst = tiles["worst"][0]
+        assert (worst["lat"], worst["lon"]) == (10.0, 200.0)
+        assert worst["bias"] == pytest.approx(0.3)
+        assert worst["pct_within"] == 0.0
+        assert tiles["worst"][1]["rmsd"] == 0.0
+        assert report.quality_summary["ssha_agreement"]["pct_within_threshold"] > 99
+
+    def test_non_divisible_tiles(self, simple_grid_pair):
+        report = SimpleGridComparator(*simple_grid_pair, tile_size=7).run()
+        tiles = report.quality_summary["ssha_tiles"]["map"]
+        assert tiles.shape == (26, 52)
+        assert tiles.count.sum() == 180 * 360
+        assert tiles.coverage_pct[-1, -1] == 100.0
+
+    def test_off_by_default(self, simple_grid_pair):
+        report = SimpleGridComparator(*simple_grid_pair).run()
+        assert "ssha_tiles" not in report.quality_summary
+
+
+class TestSimpleGridBlockWise:
+    def test_quality_streams_and_matches(self, simple_grid_ds, tmp_path, monkeypatch):
+        ds_b = simple_grid_ds.copy(deep=True)
+        ds_b["ssha"].values[100:110, 200:210] += 0.3
+        ds_b["ssha"].values[:20, :] = np.nan
+        ds_b["counts"].values[5:9, :] = 0
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        simple_grid_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        full = SimpleGridComparator(str(path_a), str(path_b), tile_size=7).run()
+        decoded = []
+        original = VariableCache.get
+
+        def spy_get(self, label, var):
+            decoded.append(var.name)
+            return original(self, label, var)
+
+        monkeypatch.setattr(VariableCache, "get", spy_get)
+        chunked = SimpleGridComparator(
+            str(path_a), str(path_b), tile_size=7, block_size=16
+        ).run()
+        assert decoded == []
+
+        full, chunked = full.quality_summary, chunked.quality_summary
+        for key in ("counts", "ssha_coverage", "ssha_agreement"):
+            assert chunked[key] == full[key]
+        tiles_full, tiles_chunk = full["ssha_tiles"]["map"], chunked["ssha_tiles"]["map"]
+        np.testing.assert_array_equal(tiles_chunk.count, tiles_full.count)
+        np.testing.assert_allclose(tiles_chunk.rmsd, tiles_full.rmsd)
+        np.testing.assert_array_equal(tiles_chunk.lat, tiles_full.lat)
+        assert chunked["ssha_tiles"]["worst"][0] == pytest.approx(full["ssha_tiles"]["worst"][0])
+        for key in ("a", "b", "diff"):
+            assert chunked["ssha_area_weighted"][key] == pytest.approx(
+                full["ssha_area_weighted"][key]
+            )
+
+
+class TestSimpleGridWorkers:
+    def test_parallel_matches_serial(self, simple_grid_ds, tmp_path):
+        ds_b = simple_grid_ds.copy(deep=True)
+        ds_b["ssha"].values[10:20, :] += 0.2
+        path_a = tmp_path / "a.nc"
+        path_b = tmp_path / "b.nc"
+        simple_grid_ds.to_netcdf(path_a)
+        ds_b.to_netcdf(path_b)
+
+        serial = SimpleGridComparator(str(path_a), str(path_b)).run()
+        parallel = SimpleGridComparator(str(path_a), str(path_b), workers=4).run()
+        assert [vc.name for vc in parallel.variable_comparisons] == [
+            vc.name for vc in serial.variable_comparisons
+        ]
+        for vc_s, vc_p in zip(serial.variable_comparisons, parallel.variable_comparisons):
+            assert vc_p.stats_a == vc_s.stats_a
+            assert vc_p.diff == vc_s.diff
+        assert parallel.quality_summary == serial.quality_summary
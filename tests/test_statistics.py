@@ -4,7 +4,14 @@ import numpy as np
 import pytest
 import xarray as xr
 
-from validation.analysis.statistics import compute_variable_diff, compute_variable_stats
+import validation.analysis.statistics as statistics_mod
+from validation.analysis.statistics import (
+    _fused_stats,
+    _valid_blocks,
+    compute_variable_diff,
+    compute_variable_stats,
+    decode_variable,
+)
 
 
 class TestComputeVariableStats:
@@ -71,6 +78,97 @@ class TestComputeVariableStats:
         assert stats["nan_count"] == 2
 
 
+class TestFusedStats:
+    def test_matches_numpy_across_blocks(self):
+        rng = np.random.default_rng(0)
+        data = rng.normal(10.0, 3.0, size=(50, 41))
+        data[rng.random(data.shape) < 0.2] = np.nan
+        count, vmin, vmax, mean, m2 = _fused_stats(data, block_size=97)
+        ref = data[np.isfinite(data)]
+        assert count == ref.size
+        assert vmin == ref.min()
+        assert vmax == ref.max()
+        assert mean == pytest.approx(ref.mean(), rel=1e-12)
+        assert np.sqrt(m2 / count) == pytest.approx(ref.std(), rel=1e-12)
+        assert np.array_equal(np.concatenate(list(_valid_blocks(data, block_size=97))), ref)
+
+    def test_int_fill_masked_per_block(self):
+        fill = np.iinfo(np.int16).max
+        data = np.tile(np.array([1, fill, 3], dtype=np.int16), 100)
+        count, vmin, vmax, mean, _ = _fused_stats(data, block_size=7)
+        assert count == 200
+        assert (vmin, vmax, mean) == (1.0, 3.0, 2.0)
+
+
+class TestQuantiles:
+    @pytest.mark.parametrize("n", [2, 3, 7, 100, 1001])
+    def test_match_np_quantile(self, n):
+        rng = np.random.default_rng(n)
+        data = rng.normal(size=n)
+        data[::5] = np.nan
+        valid = data[np.isfinite(data)]
+        qs = (0.0, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 1.0)
+        stats = compute_variable_stats(xr.DataArray(data), quantiles=qs)
+        expected = np.quantile(valid, qs)
+        assert list(stats["quantiles"]) == list(qs)
+        assert list(stats["quantiles"].values()) == pytest.approx(expected, rel=1e-12)
+        assert stats["median"] == pytest.approx(np.median(valid), rel=1e-12)
+
+    @pytest.mark.parametrize(
+        "make",
+        [
+            lambda rng: rng.lognormal(sigma=3.0, size=20_000),
+            lambda rng: np.where(rng.random(20_000) < 0.9, 0.0, rng.normal(size=20_000) * 1e6),
+            lambda rng: rng.integers(0, 5, size=20_000).astype(np.int16),
+        ],
+    )
+    def test_narrowed_selection_matches_np_quantile(self, make, monkeypatch):
+        # A small copy limit forces the histogram narrowing on every range.
+        monkeypatch.setattr(statistics_mod, "_BLOCK_SIZE", 64)
+        data = make(np.random.default_rng(5))
+        qs = (0.0, 0.05, 0.25, 0.5, 0.75, 0.95, 1.0)
+        stats = compute_variable_stats(xr.DataArray(data), quantiles=qs)
+        expected = np.quantile(data.astype(np.float64), qs)
+        assert list(stats["quantiles"].values()) == pytest.approx(expected, rel=1e-12)
+
+    def test_integer_input(self):
+        stats = compute_variable_stats(xr.DataArray(np.array([1, 4, 2, 3], dtype=np.int8)))
+        assert stats["median"] == 2.5
+        assert stats["quantiles"][0.25] == 1.75
+
+
+class TestNativePrecision:
+    def test_decode_keeps_native_dtype(self):
+        fill = np.iinfo(np.int8).max
+        flags = np.array([0, 1, fill, 2], dtype=np.int8)
+        decoded = decode_variable(flags)
+        assert decoded.values.dtype == np.int8
+        assert decoded.valid.tolist() == [True, True, False, True]
+        grid = np.array([1.5, np.nan, np.inf], dtype=np.float32)
+        decoded = decode_variable(grid)
+        assert decoded.values.dtype == np.float32
+        assert decoded.valid.tolist() == [True, False, False]
+
+    @pytest.mark.parametrize("dtype", [np.int8, np.int16, np.float32])
+    def test_stats_match_float64(self, dtype):
+        rng = np.random.default_rng(3)
+        data = rng.integers(-100, 100, size=(40, 30)).astype(dtype)
+        var = xr.DataArray(data)
+        native = compute_variable_stats(var, decode_variable(data))
+        wide = compute_variable_stats(xr.DataArray(data.astype(np.float64)))
+        for key in ("min", "max", "median", "valid_count", "nan_count"):
+            assert native[key] == wide[key]
+        assert native["mean"] == pytest.approx(wide["mean"], rel=1e-12)
+        assert native["std"] == pytest.approx(wide["std"], rel=1e-12)
+
+    def test_int_diff_does_not_overflow(self):
+        a = xr.DataArray(np.array([-100, 100, 0], dtype=np.int8))
+        b = xr.DataArray(np.array([100, -100, 0], dtype=np.int8))
+        diff = compute_variable_diff(a, b)
+        assert diff["max_abs_diff"] == 200.0
+        assert diff["bias"] == pytest.approx(0.0)
+
+
 class TestComputeVariableDiff:
     def test_identical(self):
         data = np.array([1.0, 2.0, 3.0])
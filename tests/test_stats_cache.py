@@ -0,0 +1,74 @@
+"""Tests for the persistent stats cache."""
+
+import os
+
+import validation.comparators.base as base_mod
+from validation.cli import main
+from validation.comparators.simple_grid import SimpleGridComparator
+from validation.stats_cache import FileSummary, StatsCache, file_fingerprint
+
+
+class TestStatsCache:
+    def test_round_trip(self, simple_grid_pair, tmp_path):
+        cache = StatsCache(str(tmp_path / "cache"))
+        path_a, _ = simple_grid_pair
+        assert cache.load(path_a) is None
+        cache.store(path_a, FileSummary(stats={"ssha": {"mean": 1.0}}))
+        cache.store(path_a, FileSummary(stats={"counts": {"mean": 2.0}}))
+        summary = cache.load(path_a)
+        assert summary.stats == {"ssha": {"mean": 1.0}, "counts": {"mean": 2.0}}
+        assert cache.load(path_a, variant="block") is None
+
+    def test_rewritten_file_misses(self, simple_grid_ds, tmp_path):
+        path = tmp_path / "x.nc"
+        simple_grid_ds.to_netcdf(path)
+        before = file_fingerprint(str(path))
+        simple_grid_ds["ssha"].values[0, 0] += 1.0
+        simple_grid_ds.to_netcdf(path)
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+        assert file_fingerprint(str(path)) != before
+
+    def test_lru_eviction(self, simple_grid_pair, tmp_path):
+        path_a, path_b = simple_grid_pair
+        big = {"x": {"blob": "x" * 4000}}
+        cache = StatsCache(str(tmp_path / "cache"), max_bytes=6000)
+        cache.store(path_a, FileSummary(stats=big))
+        cache.store(path_b, FileSummary(stats=big))
+        assert len(cache) == 1
+        assert cache.load(path_a) is None
+        assert cache.load(path_b) is not None
+
+
+class TestComparatorCache:
+    def test_second_run_skips_stats(self, simple_grid_pair, tmp_path, monkeypatch):
+        cache = StatsCache(str(tmp_path / "cache"))
+        first = SimpleGridComparator(*simple_grid_pair, stats_cache=cache).run()
+
+        calls = []
+        original = base_mod.compute_variable_stats
+        monkeypatch.setattr(
+            base_mod,
+            "compute_variable_stats",
+            lambda *args: calls.append(1) or original(*args),
+        )
+        second = SimpleGridComparator(*simple_grid_pair, stats_cache=cache).run()
+        assert calls == []
+        assert [vc.stats_b for vc in second.variable_comparisons] == [
+            vc.stats_b for vc in first.variable_comparisons
+        ]
+
+    def test_cache_is_opt_in(self, simple_grid_pair, tmp_path):
+        cache_dir = tmp_path / "cli-cache"
+        args = [*simple_grid_pair, "-t", "simple_grid", "--cache-dir", str(cache_dir)]
+        main(args)
+        main(args + ["--no-cache"])
+        assert not cache_dir.exists()
+        main(args + ["--cache"])
+        assert len(StatsCache(str(cache_dir))) == 2
+
+    def test_only_stats_and_digests_stored(self, simple_grid_pair, tmp_path):
+        cache = StatsCache(str(tmp_path / "cache"))
+        SimpleGridComparator(*simple_grid_pair, stats_cache=cache).run()
+        summary = cache.load(simple_grid_pair[0], "full")
+        assert set(vars(summary)) == {"stats", "digests"}
+        assert "ssha" in summary.stats
@@ -0,0 +1,42 @@
+"""Tests for analysis.tiles module."""
+
+import numpy as np
+import pytest
+
+from validation.analysis.tiles import tile_diff_map
+
+
+class TestTileDiffMap:
+    def test_matches_loop_with_padding(self):
+        rng = np.random.default_rng(0)
+        a = rng.normal(size=(25, 37))
+        b = a + rng.normal(scale=0.05, size=(25, 37))
+        valid = rng.random((25, 37)) > 0.3
+        tiles = tile_diff_map(a, b, valid, 10, 10, 0.05)
+        assert tiles.shape == (3, 4)
+        for i in range(3):
+            for j in range(4):
+                sl = (slice(i * 10, i * 10 + 10), slice(j * 10, j * 10 + 10))
+                d = (b - a)[sl][valid[sl]]
+                assert tiles.count[i, j] == d.size
+                assert tiles.coverage_pct[i, j] == pytest.approx(d.size / valid[sl].size * 100)
+                assert tiles.bias[i, j] == pytest.approx(d.mean())
+                assert tiles.rmsd[i, j] == pytest.approx(np.sqrt(np.mean(d * d)))
+                assert tiles.pct_within[i, j] == pytest.approx(
+                    np.mean(np.abs(d) <= 0.05) * 100
+                )
+
+    def test_worst_tiles(self):
+        a = np.zeros((4, 6))
+        b = np.zeros((4, 6))
+        b[2:, 4:] = 1.0
+        b[:2, :2] = -0.5
+        valid = np.ones((4, 6), dtype=bool)
+        valid[:2, 2:4] = False
+        tiles = tile_diff_map(a, b, valid, 2, 2, 0.1, lat=np.arange(4) * 10.0)
+        worst = tiles.worst(2)
+        assert [(t["lat"], t["lon"]) for t in worst] == [(20.0, 4.0), (0.0, 0.0)]
+        assert worst[0]["rmsd"] == 1.0
+        assert worst[1]["bias"] == -0.5
+        assert np.isnan(tiles.rmsd[0, 1])
+        assert len(tiles.worst(10)) == 5
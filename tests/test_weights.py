@@ -0,0 +1,75 @@
+"""Tests for analysis.weights module."""
+
+import numpy as np
+import pytest
+
+from validation.analysis.weights import (
+    diff_stats,
+    latitude_weights,
+    moments_stats,
+    row_diff_sums,
+    row_moments,
+)
+
+
+class TestLatitudeWeights:
+    def test_cached_and_read_only(self):
+        lat = np.arange(-89.5, 90, 1.0, dtype=np.float32)
+        weights = latitude_weights(lat)
+        assert latitude_weights(lat.copy()) is weights
+        assert not weights.flags.writeable
+        assert weights[90] == pytest.approx(np.cos(np.deg2rad(0.5)))
+
+    def test_poles_are_zero(self):
+        weights = latitude_weights(np.array([-90.0, 0.0, 90.0]))
+        assert weights.tolist() == pytest.approx([0.0, 1.0, 0.0], abs=1e-12)
+
+
+class TestWeightedStats:
+    def _grid(self):
+        rng = np.random.default_rng(0)
+        lat = np.linspace(-80, 80, 17)
+        values = rng.normal(size=(17, 24)).astype(np.float32)
+        valid = rng.random((17, 24)) > 0.2
+        return lat, values, valid
+
+    def test_matches_full_weight_array(self):
+        lat, values, valid = self._grid()
+        weights = latitude_weights(lat)
+        w2d = np.broadcast_to(weights[:, None], values.shape)[valid]
+        x = values[valid].astype(np.float64)
+        expected_mean = np.average(x, weights=w2d)
+        expected_std = np.sqrt(np.average((x - expected_mean) ** 2, weights=w2d))
+        stats = moments_stats(row_moments(values, valid), weights)
+        assert stats["mean"] == pytest.approx(expected_mean)
+        assert stats["std"] == pytest.approx(expected_std)
+        transposed = moments_stats(row_moments(values.T, valid.T, axis=1), weights)
+        assert transposed["mean"] == pytest.approx(expected_mean)
+
+    def test_diff(self):
+        lat, a, valid = self._grid()
+        b = a + np.linspace(0, 0.1, 17, dtype=np.float32)[:, None]
+        weights = latitude_weights(lat)
+        w2d = np.broadcast_to(weights[:, None], a.shape)[valid]
+        d = (b.astype(np.float64) - a)[valid]
+        diff = diff_stats(row_diff_sums(a, b, valid, threshold=0.05), weights)
+        assert diff["bias"] == pytest.approx(np.average(d, weights=w2d))
+        assert diff["rmsd"] == pytest.approx(np.sqrt(np.average(d * d, weights=w2d)))
+        expected_pct = np.average(np.abs(d) <= 0.05, weights=w2d) * 100
+        assert diff["pct_within_threshold"] == pytest.approx(expected_pct, abs=0.01)
+
+    def test_bands_concatenate(self):
+        lat, values, valid = self._grid()
+        weights = latitude_weights(lat)
+        bands = np.concatenate(
+            [row_moments(values[:7], valid[:7]), row_moments(values[7:], valid[7:])], axis=1
+        )
+        whole = moments_stats(row_moments(values, valid), weights)
+        assert moments_stats(bands, weights) == pytest.approx(whole)
+
+    def test_no_valid_data(self):
+        weights = latitude_weights(np.array([0.0, 10.0]))
+        valid = np.zeros((2, 3), dtype=bool)
+        assert moments_stats(row_moments(np.zeros((2, 3)), valid), weights)["mean"] is None
+        sums = row_diff_sums(np.zeros((2, 3)), np.ones((2, 3)), valid, 0.1)
+        assert diff_stats(sums, weights)["bias"] is None